@@ -5,9 +5,7 @@ from chainlit.input_widget import TextInput, Select
 from providers.yandexcloud import YandexCloudProvider
 from dotenv import load_dotenv
 import subprocess
-import sys
-from mcp import ClientSession
-from mcp.client.stdio import stdio_client, StdioServerParameters
+from mcp_pool import MCPServerPool
 
 # Load environment variables
 load_dotenv()
@@ -15,112 +13,40 @@ load_dotenv()
 # Initialize the YandexCloud provider
 provider = YandexCloudProvider()
 
-# MCP Server management
-mcp_session = None
-mcp_stdio_transport = None
-mcp_stdio_context = None
-mcp_server_params = None
-mcp_session_context = None
+# MCP server pool shared by all chat sessions
+mcp_pool = MCPServerPool(["mcp_server.py"], size=int(os.getenv("MCP_POOL_SIZE", "2")))
 
-async def start_mcp_server():
-    """Start the MCP server and create a session"""
-    global mcp_session, mcp_stdio_transport, mcp_stdio_context, mcp_server_params, mcp_session_context
-    
-    print("Starting MCP server...")
-    mcp_server_params = StdioServerParameters(
-        command=sys.executable,
-        args=["mcp_server.py"]
-    )
-    
-    try:
-        # Use stdio_client context manager similar to mcp_client.py
-        mcp_stdio_context = stdio_client(mcp_server_params)
-        print("MCP stdio context created")
-        
-        # Enter the stdio context
-        stdio_transport = await mcp_stdio_context.__aenter__()
-        print("MCP stdio transport entered")
-        stdio_read, stdio_write = stdio_transport
-        
-        mcp_stdio_transport = stdio_transport
-        mcp_session = ClientSession(stdio_read, stdio_write)
-        print("MCP session created, initializing...")
-        
-        # Enter the session context
-        mcp_session_context = await mcp_session.__aenter__()
-        print("MCP session context entered")
-        
-        # Initialize the session with timeout
-        import asyncio
-        try:
-            await asyncio.wait_for(mcp_session.initialize(), timeout=30.0)
-            print("MCP session initialized successfully")
-            return mcp_session
-        except asyncio.TimeoutError:
-            print("MCP session initialization timed out")
-            await stop_mcp_server()
-            return None
-    except Exception as e:
-        print(f"MCP server start failed: {e}")
-        await stop_mcp_server()
-        return None
+async def lease_mcp_server():
+    """Lease a warm MCP server from the pool for the current chat session"""
+    lease = await mcp_pool.lease()
+    cl.user_session.set("mcp_lease", lease)
+    return lease
 
-async def stop_mcp_server():
-    """Stop the MCP server and close the session"""
-    global mcp_session, mcp_stdio_transport, mcp_stdio_context, mcp_session_context
-    
-    # First close the session context if it exists
-    if mcp_session_context:
-        try:
-            await mcp_session_context.__aexit__(None, None, None)
-        except Exception as e:
-            print(f"Error closing session context: {e}")
-        finally:
-            mcp_session_context = None
-    
-    # Then close the transport streams
-    if mcp_stdio_transport:
-        try:
-            mcp_stdio_transport[0].close()
-            mcp_stdio_transport[1].close()
-        except Exception as e:
-            print(f"Error closing transport streams: {e}")
-        finally:
-            mcp_stdio_transport = None
-    
-    # Finally close the async context (this properly closes the async generator)
-    if mcp_stdio_context:
-        try:
-            await mcp_stdio_context.__aexit__(None, None, None)
-        except Exception as e:
-            print(f"Error closing stdio context: {e}")
-        finally:
-            mcp_stdio_context = None
-    
-    mcp_session = None
-    mcp_stdio_transport = None
-    mcp_stdio_context = None
-    mcp_session_context = None
-    mcp_server_params = None
+async def release_mcp_server():
+    """Return the current chat session's MCP server to the pool"""
+    lease = cl.user_session.get("mcp_lease")
+    if lease:
+        lease.release()
+        cl.user_session.set("mcp_lease", None)
 
 async def get_mcp_tools():
-    """Get available tools from MCP server"""
-    global mcp_session
-    if mcp_session:
-        try:
-            tools = await mcp_session.list_tools()
-            return tools
-        except Exception as e:
-            print(f"Error getting MCP tools: {e}")
-            return []
+    """Get available tools from MCP server (cached by the pool)"""
+    lease = cl.user_session.get("mcp_lease")
+    if lease and lease.tools:
+        return lease.tools
     return []
 
+def get_mcp_tools_description() -> str:
+    """Get the precomputed tools description for the system prompt"""
+    lease = cl.user_session.get("mcp_lease")
+    return lease.registry.description if lease else ""
+
 async def call_mcp_tool(tool_name: str, arguments: dict = None):
     """Call an MCP tool"""
-    global mcp_session
-    if mcp_session:
+    lease = cl.user_session.get("mcp_lease")
+    if lease:
         try:
-            result = await mcp_session.call_tool(tool_name, arguments or {})
+            result = await lease.call_tool(tool_name, arguments)
             return result
         except Exception as e:
             print(f"Error calling MCP tool {tool_name}: {e}")
@@ -132,11 +58,11 @@ async def call_mcp_tool(tool_name: str, arguments: dict = None):
 async def on_chat_start():
     """Initialize the chat session"""
     print("Chat start called")
-    # Start MCP server
+    # Lease a warm MCP server from the shared pool
     try:
-        mcp_started = await start_mcp_server()
+        mcp_started = await lease_mcp_server()
         if mcp_started:
-            print("MCP Server started successfully")
+            print("MCP Server leased successfully")
             await cl.Message(content="🟢 MCP сервер запущен").send()
         else:
             print("MCP Server failed to start")
@@ -191,9 +117,7 @@ async def on_message(message: cl.Message):
     mcp_tools = await get_mcp_tools()
     tools_description = ""
     if mcp_tools and mcp_tools.tools:
-        tools_description = "\n\nДоступные инструменты MCP:\n"
-        for tool in mcp_tools.tools:
-            tools_description += f"- {tool.name}: {tool.description}\n"
+        tools_description = "\n\nДоступные инструменты MCP:\n" + get_mcp_tools_description()
 
     # Enhanced system prompt with MCP tools
     system_prompt = "Ты полезный ассистент." + tools_description
@@ -209,7 +133,7 @@ async def on_message(message: cl.Message):
     # Check if user wants to use MCP tool
     should_use_mcp = False
     mcp_result = None
-    if mcp_session and mcp_tools and mcp_tools.tools:
+    if mcp_tools and mcp_tools.tools:
         tool_names = [t.name for t in mcp_tools.tools]
         if "get_current_time" in tool_names and ("время" in user_content.lower() or "time" in user_content.lower()):
             should_use_mcp = True
@@ -290,7 +214,7 @@ async def on_settings_update(settings):
 @cl.on_chat_end
 async def on_chat_end():
     """Handle chat session end"""
-    await stop_mcp_server()
+    await release_mcp_server()
     await cl.Message(content="👋 Спасибо за общение! До свидания!").send()
 
 
@@ -0,0 +1,80 @@
+import asyncio
+from typing import List, Dict, Any, Optional
+from mcp import ClientSession, types
+
+
+class ToolRegistry:
+    """Cached MCP tool catalog with precomputed provider-specific schemas.
+
+    The catalog is fetched once with list_tools() and refreshed only when the
+    server sends a tools/list_changed notification, so building a request
+    never costs an extra RPC. Pass `handle_message` as the `message_handler`
+    of the ClientSession to receive the notifications.
+    """
+
+    def __init__(self):
+        self.session: Optional[ClientSession] = None
+        self.result: Optional[types.ListToolsResult] = None
+        self.tools: List[types.Tool] = []
+        self.openai_tools: List[Dict[str, Any]] = []
+        self.yandex_tools: List[Dict[str, Any]] = []
+        self.description = ""
+        self._refresh_task: Optional[asyncio.Task] = None
+
+    def bind(self, session: ClientSession):
+        """Attach the registry to an initialized session"""
+        self.session = session
+
+    async def refresh(self):
+        """Fetch the tool catalog and rebuild all schemas"""
+        if self.session is None:
+            return
+        result = await self.session.list_tools()
+        self.result = result
+        self.tools = list(result.tools)
+        self.openai_tools = [self._to_openai(tool) for tool in self.tools]
+        self.yandex_tools = [self._to_yandex(tool) for tool in self.tools]
+        self.description = "".join(
+            f"- {tool.name}: {tool.description}\n" for tool in self.tools
+        )
+
+    def schemas_for(self, provider_name: str) -> List[Dict[str, Any]]:
+        """Get tool schemas in the format expected by the provider"""
+        if provider_name.lower() in ("yandexcloud", "yandex"):
+            return self.yandex_tools
+        return self.openai_tools
+
+    async def handle_message(self, message) -> None:
+        """ClientSession message handler that refreshes on tools/list_changed"""
+        if isinstance(message, types.ServerNotification) and isinstance(
+            message.root, types.ToolListChangedNotification
+        ):
+            if self._refresh_task is None or self._refresh_task.done():
+                self._refresh_task = asyncio.create_task(self._refresh_safe())
+
+    async def _refresh_safe(self):
+        try:
+            await self.refresh()
+        except Exception as e:
+            print(f"Error refreshing MCP tools: {e}")
+
+    @staticmethod
+    def _to_openai(tool: types.Tool) -> Dict[str, Any]:
+        return {
+            "type": "function",
+            "function": {
+                "name": tool.name,
+                "description": tool.description or "",
+                "parameters": tool.inputSchema,
+            },
+        }
+
+    @staticmethod
+    def _to_yandex(tool: types.Tool) -> Dict[str, Any]:
+        return {
+            "function": {
+                "name": tool.name,
+                "description": tool.description or "",
+                "parameters": tool.inputSchema,
+            }
+        }
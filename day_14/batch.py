@@ -0,0 +1,183 @@
+import asyncio
+import hashlib
+import re
+import time
+from dataclasses import dataclass
+from typing import List, Optional, Callable, Awaitable, Tuple, Dict
+from urllib.parse import urlsplit, urlunsplit
+
+URL_PATTERN = re.compile(r"https?://[^\s<>\"'()\[\]]+")
+
+# fetch(url) -> (content, title); summarize(content, url) -> summary;
+# save(summary, title, url) -> filename
+FetchFn = Callable[[str], Awaitable[Tuple[str, Optional[str]]]]
+SummarizeFn = Callable[[str, str], Awaitable[str]]
+SaveFn = Callable[[str, Optional[str], str], Awaitable[str]]
+ProgressFn = Callable[["BatchProgress"], Awaitable[None]]
+
+
+def extract_urls(text: str) -> List[str]:
+    """Extract unique URLs from text, preserving their order"""
+    urls = []
+    seen = set()
+    for match in URL_PATTERN.finditer(text):
+        url = match.group(0).rstrip(".,;:!?")
+        key = normalize_url(url)
+        if key not in seen:
+            seen.add(key)
+            urls.append(url)
+    return urls
+
+
+def normalize_url(url: str) -> str:
+    """Normalize a URL for deduplication (no fragment, no trailing slash).
+
+    Only the scheme and host are case-insensitive, the path and query keep their case.
+    """
+    parts = urlsplit(url)
+    return urlunsplit((parts.scheme.lower(), parts.netloc.lower(), parts.path.rstrip("/"), parts.query, ""))
+
+
+@dataclass
+class BatchItem:
+    """State of one URL in a batch"""
+    url: str
+    status: str = "pending"
+    title: Optional[str] = None
+    filename: Optional[str] = None
+    error: Optional[str] = None
+    duplicate_of: Optional[str] = None
+
+
+@dataclass
+class BatchProgress:
+    """Aggregated batch progress"""
+    total: int
+    fetched: int = 0
+    summarized: int = 0
+    saved: int = 0
+    duplicates: int = 0
+    failed: int = 0
+    started_at: float = 0.0
+
+    @property
+    def done(self) -> int:
+        return self.saved + self.duplicates + self.failed
+
+    @property
+    def elapsed(self) -> float:
+        return time.time() - self.started_at
+
+
+class BatchProcessor:
+    """Runs fetch → summarize → save for many URLs as a concurrent pipeline.
+
+    Every stage has its own concurrency limit, so slow summaries do not hold
+    fetch slots and the LLM provider never sees more than `summarize_limit`
+    requests from the batch. Pages with identical content are summarized once:
+    later copies wait for the first one and take over if it fails.
+    """
+
+    def __init__(
+        self,
+        fetch: FetchFn,
+        summarize: SummarizeFn,
+        save: SaveFn,
+        fetch_limit: int = 8,
+        summarize_limit: int = 4,
+        save_limit: int = 4,
+        on_progress: Optional[ProgressFn] = None,
+        progress_interval: float = 1.0,
+    ):
+        self.fetch = fetch
+        self.summarize = summarize
+        self.save = save
+        self._fetch_semaphore = asyncio.Semaphore(fetch_limit)
+        self._summarize_semaphore = asyncio.Semaphore(summarize_limit)
+        self._save_semaphore = asyncio.Semaphore(save_limit)
+        self.on_progress = on_progress
+        self.progress_interval = progress_interval
+        self._last_report = 0.0
+        # content hash -> (URL summarizing it, future resolved to whether it was saved)
+        self._content_owners: Dict[str, Tuple[str, asyncio.Future]] = {}
+
+    async def process(self, urls: List[str]) -> Tuple[List[BatchItem], BatchProgress]:
+        """Process unique URLs and return per-URL results"""
+        unique = []
+        seen = set()
+        for url in urls:
+            key = normalize_url(url)
+            if key not in seen:
+                seen.add(key)
+                unique.append(url)
+
+        items = [BatchItem(url=url) for url in unique]
+        progress = BatchProgress(total=len(items), started_at=time.time())
+        await asyncio.gather(*(self._process_item(item, progress) for item in items))
+        await self._report(progress, force=True)
+        return items, progress
+
+    async def _process_item(self, item: BatchItem, progress: BatchProgress):
+        outcome: Optional[asyncio.Future] = None
+        try:
+            async with self._fetch_semaphore:
+                content, title = await self.fetch(item.url)
+            item.title = title
+            progress.fetched += 1
+
+            content_hash = hashlib.sha256(
+                " ".join(content.split()).encode("utf-8")
+            ).hexdigest()
+            outcome = await self._claim_content(content_hash, item)
+            if outcome is None:
+                progress.duplicates += 1
+                return
+
+            async with self._summarize_semaphore:
+                summary = await self.summarize(content, item.url)
+            progress.summarized += 1
+
+            async with self._save_semaphore:
+                item.filename = await self.save(summary, title, item.url)
+            item.status = "saved"
+            progress.saved += 1
+        except Exception as e:
+            item.status = "failed"
+            item.error = str(e)
+            progress.failed += 1
+        finally:
+            if outcome is not None and not outcome.done():
+                outcome.set_result(item.status == "saved")
+            await self._report(progress)
+
+    async def _claim_content(self, content_hash: str, item: BatchItem) -> Optional[asyncio.Future]:
+        """Make the item the owner of its content, returns None if it is a duplicate.
+
+        A duplicate waits until the owner is saved; if the owner fails, one of
+        its duplicates becomes the new owner and is summarized instead.
+        """
+        while True:
+            entry = self._content_owners.get(content_hash)
+            if entry is None:
+                outcome = asyncio.get_running_loop().create_future()
+                self._content_owners[content_hash] = (item.url, outcome)
+                return outcome
+            owner, owner_outcome = entry
+            if await owner_outcome:
+                item.status = "duplicate"
+                item.duplicate_of = owner
+                return None
+            if self._content_owners.get(content_hash) is entry:
+                del self._content_owners[content_hash]
+
+    async def _report(self, progress: BatchProgress, force: bool = False):
+        if not self.on_progress:
+            return
+        now = time.time()
+        if not force and now - self._last_report < self.progress_interval:
+            return
+        self._last_report = now
+        try:
+            await self.on_progress(progress)
+        except Exception as e:
+            print(f"Error reporting batch progress: {e}")
@@ -0,0 +1,273 @@
+import asyncio
+import hashlib
+import json
+import os
+import re
+import time
+from dataclasses import dataclass
+from typing import Optional, Dict, Any, Tuple
+import aiohttp
+import lxml.html
+from lxml import etree
+
+CACHE_DIR = ".http_cache"
+MAX_CONTENT_BYTES = 5 * 1024 * 1024
+USER_AGENT = "Mozilla/5.0 (compatible; ai-advent-fetcher/1.0)"
+
+# Elements that never contain the main content of a page
+NOISE_TAGS = [
+    "script", "style", "noscript", "iframe", "svg", "form", "button",
+    "nav", "header", "footer", "aside", "template",
+]
+NOISE_PATTERN = re.compile(
+    r"comment|sidebar|footer|header|menu|nav|banner|promo|share|social|related|advert|cookie",
+    re.IGNORECASE,
+)
+BLOCK_TAGS = {"p", "h1", "h2", "h3", "h4", "h5", "h6", "li", "pre", "blockquote", "td"}
+
+
+@dataclass
+class FetchResult:
+    """Body of a fetched URL"""
+    url: str
+    status: int
+    body: bytes
+    content_type: str
+    charset: Optional[str] = None
+    from_cache: bool = False
+    truncated: bool = False
+
+
+class HTTPCache:
+    """On-disk HTTP cache honoring ETag, Last-Modified and Cache-Control max-age"""
+
+    def __init__(self, cache_dir: str = CACHE_DIR):
+        self.cache_dir = cache_dir
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def _paths(self, url: str) -> Tuple[str, str]:
+        key = hashlib.sha256(url.encode("utf-8")).hexdigest()
+        base = os.path.join(self.cache_dir, key)
+        return f"{base}.json", f"{base}.body"
+
+    def get(self, url: str) -> Optional[Tuple[Dict[str, Any], bytes]]:
+        meta_path, body_path = self._paths(url)
+        try:
+            with open(meta_path, "r", encoding="utf-8") as f:
+                meta = json.load(f)
+            with open(body_path, "rb") as f:
+                body = f.read()
+            return meta, body
+        except (OSError, json.JSONDecodeError):
+            return None
+
+    def put(self, url: str, meta: Dict[str, Any], body: bytes):
+        meta_path, body_path = self._paths(url)
+        # Write the body first so a readable meta file always has its body
+        with open(body_path, "wb") as f:
+            f.write(body)
+        with open(meta_path, "w", encoding="utf-8") as f:
+            json.dump(meta, f)
+
+    def touch(self, url: str, meta: Dict[str, Any]):
+        meta_path, _ = self._paths(url)
+        with open(meta_path, "w", encoding="utf-8") as f:
+            json.dump(meta, f)
+
+
+def _max_age(cache_control: str) -> Optional[int]:
+    if "no-store" in cache_control or "no-cache" in cache_control:
+        return None
+    match = re.search(r"max-age=(\d+)", cache_control)
+    return int(match.group(1)) if match else None
+
+
+class Fetcher:
+    """Async HTTP client with connection pooling, timeouts, size limits and caching"""
+
+    def __init__(
+        self,
+        cache: Optional[HTTPCache] = None,
+        total_timeout: float = 30.0,
+        connect_timeout: float = 10.0,
+        max_bytes: int = MAX_CONTENT_BYTES,
+        max_connections: int = 20,
+    ):
+        self.cache = cache or HTTPCache()
+        self.timeout = aiohttp.ClientTimeout(total=total_timeout, connect=connect_timeout)
+        self.max_bytes = max_bytes
+        self.max_connections = max_connections
+        self._session: Optional[aiohttp.ClientSession] = None
+
+    def _get_session(self) -> aiohttp.ClientSession:
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(
+                    limit=self.max_connections, limit_per_host=4, ttl_dns_cache=300
+                ),
+                timeout=self.timeout,
+                headers={"User-Agent": USER_AGENT},
+            )
+        return self._session
+
+    async def close(self):
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    async def fetch(self, url: str) -> FetchResult:
+        """Fetch a URL, revalidating a cached copy when there is one"""
+        cached = self.cache.get(url)
+        headers = {}
+        if cached:
+            meta, body = cached
+            if meta.get("expires_at", 0) > time.time():
+                return self._from_cache(url, meta, body)
+            if meta.get("etag"):
+                headers["If-None-Match"] = meta["etag"]
+            if meta.get("last_modified"):
+                headers["If-Modified-Since"] = meta["last_modified"]
+
+        async with self._get_session().get(url, headers=headers) as response:
+            if response.status == 304 and cached:
+                meta, body = cached
+                meta["expires_at"] = self._expires_at(response)
+                self.cache.touch(url, meta)
+                return self._from_cache(url, meta, body)
+
+            response.raise_for_status()
+            body, truncated = await self._read_limited(response)
+
+            meta = {
+                "url": str(response.url),
+                "status": response.status,
+                "content_type": response.content_type,
+                "charset": response.charset,
+                "etag": response.headers.get("ETag"),
+                "last_modified": response.headers.get("Last-Modified"),
+                "expires_at": self._expires_at(response),
+                "fetched_at": time.time(),
+            }
+            if not truncated and (meta["etag"] or meta["last_modified"] or meta["expires_at"]):
+                self.cache.put(url, meta, body)
+
+            return FetchResult(
+                url=str(response.url),
+                status=response.status,
+                body=body,
+                content_type=response.content_type,
+                charset=response.charset,
+                truncated=truncated,
+            )
+
+    async def _read_limited(self, response: aiohttp.ClientResponse) -> Tuple[bytes, bool]:
+        chunks = []
+        size = 0
+        async for chunk in response.content.iter_chunked(64 * 1024):
+            chunks.append(chunk)
+            size += len(chunk)
+            if size >= self.max_bytes:
+                return b"".join(chunks)[: self.max_bytes], True
+        return b"".join(chunks), False
+
+    @staticmethod
+    def _expires_at(response: aiohttp.ClientResponse) -> float:
+        max_age = _max_age(response.headers.get("Cache-Control", ""))
+        return time.time() + max_age if max_age else 0
+
+    @staticmethod
+    def _from_cache(url: str, meta: Dict[str, Any], body: bytes) -> FetchResult:
+        return FetchResult(
+            url=meta.get("url", url),
+            status=meta.get("status", 200),
+            body=body,
+            content_type=meta.get("content_type", ""),
+            charset=meta.get("charset"),
+            from_cache=True,
+        )
+
+
+def _text_of(element) -> str:
+    return re.sub(r"\s+", " ", element.text_content()).strip()
+
+
+def _link_density(element) -> float:
+    total_length = len(_text_of(element)) or 1
+    return sum(len(_text_of(a)) for a in element.iterfind(".//a")) / total_length
+
+
+def _is_boilerplate(element) -> bool:
+    """Noise-looking containers are dropped only if mostly links or without paragraphs"""
+    if element.find(".//article") is not None or element.find(".//main") is not None:
+        return False
+    if _link_density(element) > 0.3:
+        return True
+    return element.find(".//p") is None and len(_text_of(element)) < 500
+
+
+def _score(element) -> float:
+    """Readability-style score: paragraph text, penalized by link density"""
+    text_length = sum(len(_text_of(p)) for p in element.iterfind(".//p"))
+    if not text_length:
+        return 0
+    return text_length * (1 - _link_density(element))
+
+
+def _to_text(element) -> str:
+    blocks = []
+    for block in element.iter(*BLOCK_TAGS):
+        # Skip blocks nested in other blocks, their text is already included
+        if any(parent.tag in BLOCK_TAGS for parent in block.iterancestors()):
+            continue
+        text = _text_of(block)
+        if text:
+            blocks.append(text)
+    return "\n\n".join(blocks) if blocks else _text_of(element)
+
+
+def extract_main_content(html: bytes) -> Tuple[Optional[str], str]:
+    """Extract the title and the main readable text of an HTML page"""
+    try:
+        document = lxml.html.document_fromstring(html)
+    except (etree.ParserError, ValueError):
+        return None, ""
+
+    title_element = document.find(".//title")
+    title = _text_of(title_element) if title_element is not None else None
+
+    etree.strip_elements(document, *NOISE_TAGS, etree.Comment, with_tail=False)
+    for element in list(document.iter()):
+        if not isinstance(element.tag, str) or element.getparent() is None:
+            continue
+        if element.tag in ("html", "body", "article", "main"):
+            continue
+        marker = f"{element.get('class', '')} {element.get('id', '')}"
+        if NOISE_PATTERN.search(marker) and _is_boilerplate(element):
+            element.drop_tree()
+
+    candidates = document.xpath("//article | //main | //*[@role='main']")
+    if not candidates:
+        candidates = document.xpath("//div | //section | //td")
+
+    best = max(candidates, key=_score, default=None)
+    if best is None or _score(best) == 0:
+        body = document.find(".//body")
+        best = body if body is not None else document
+
+    return title, _to_text(best)
+
+
+async def fetch_main_content(fetcher: Fetcher, url: str) -> Dict[str, Any]:
+    """Fetch a URL and return its title and main text"""
+    result = await fetcher.fetch(url)
+    if "html" in result.content_type or not result.content_type:
+        # Parsing is CPU bound, keep it off the event loop
+        title, content = await asyncio.to_thread(extract_main_content, result.body)
+    else:
+        title, content = None, result.body.decode(result.charset or "utf-8", errors="replace")
+    return {
+        "content": content,
+        "title": title,
+        "from_cache": result.from_cache,
+        "truncated": result.truncated,
+    }
@@ -1,132 +1,109 @@
 import os
 import asyncio
 import chainlit as cl
-from providers.yandexcloud import YandexCloudProvider
+import ollama
+from providers.router import create_router
+from providers.cache import CachingProvider, ResponseCache
+from providers.metrics import observe_embedding, start_metrics_server
 from dotenv import load_dotenv
 import subprocess
-import sys
-from mcp import ClientSession
-from mcp.client.stdio import stdio_client, StdioServerParameters
+from mcp_pool import MCPServerPool
+from summarization import MapReduceSummarizer
+from batch import BatchProcessor, BatchProgress, extract_urls
+from tracing import TracedProvider, span, traced
 import time
 from datetime import datetime
 import re
+import json
 
 # Load environment variables
 load_dotenv()
 
-# Initialize the YandexCloud provider
-provider = YandexCloudProvider()
-
-# MCP Server management
-mcp_session = None
-mcp_stdio_transport = None
-mcp_stdio_context = None
-mcp_server_params = None
-mcp_session_context = None
-
-async def start_mcp_server():
-    """Start the MCP server and create a session"""
-    global mcp_session, mcp_stdio_transport, mcp_stdio_context, mcp_server_params, mcp_session_context
-    
-    print("Starting MCP server...")
-    mcp_server_params = StdioServerParameters(
-        command=sys.executable,
-        args=["mcp_server.py"]
-    )
-    
-    try:
-        # Use stdio_client context manager similar to mcp_client.py
-        mcp_stdio_context = stdio_client(mcp_server_params)
-        print("MCP stdio context created")
-        
-        # Enter the stdio context
-        stdio_transport = await mcp_stdio_context.__aenter__()
-        print("MCP stdio transport entered")
-        stdio_read, stdio_write = stdio_transport
-        
-        mcp_stdio_transport = stdio_transport
-        mcp_session = ClientSession(stdio_read, stdio_write)
-        print("MCP session created, initializing...")
-        
-        # Enter the session context
-        mcp_session_context = await mcp_session.__aenter__()
-        print("MCP session context entered")
-        
-        # Initialize the session with timeout
-        import asyncio
-        try:
-            await asyncio.wait_for(mcp_session.initialize(), timeout=30.0)
-            print("MCP session initialized successfully")
-            return mcp_session
-        except asyncio.TimeoutError:
-            print("MCP session initialization timed out")
-            await stop_mcp_server()
-            return None
-    except Exception as e:
-        print(f"MCP server start failed: {e}")
-        await stop_mcp_server()
-        return None
-
-async def stop_mcp_server():
-    """Stop the MCP server and close the session"""
-    global mcp_session, mcp_stdio_transport, mcp_stdio_context, mcp_session_context
-    
-    # First close the session context if it exists
-    if mcp_session_context:
-        try:
-            await mcp_session_context.__aexit__(None, None, None)
-        except Exception as e:
-            print(f"Error closing session context: {e}")
-        finally:
-            mcp_session_context = None
-    
-    # Then close the transport streams
-    if mcp_stdio_transport:
-        try:
-            mcp_stdio_transport[0].close()
-            mcp_stdio_transport[1].close()
-        except Exception as e:
-            print(f"Error closing transport streams: {e}")
-        finally:
-            mcp_stdio_transport = None
-    
-    # Finally close the async context (this properly closes the async generator)
-    if mcp_stdio_context:
-        try:
-            await mcp_stdio_context.__aexit__(None, None, None)
-        except Exception as e:
-            print(f"Error closing stdio context: {e}")
-        finally:
-            mcp_stdio_context = None
-    
-    mcp_session = None
-    mcp_stdio_transport = None
-    mcp_stdio_context = None
-    mcp_session_context = None
-    mcp_server_params = None
+# Requests go to the fastest healthy backend listed in LLM_ROUTES (provider:model, comma separated)
+router = create_router(
+    os.getenv("LLM_ROUTES", "YandexCloud:yandexgpt-lite/latest"),
+    hedge=os.getenv("LLM_HEDGE", "false").lower() == "true",
+    route_retries=int(os.getenv("LLM_ROUTE_RETRIES", "0")),
+)
+
+EMBEDDING_MODEL = os.getenv("EMBEDDING_MODEL", "evilfreelancer/enbeddrus:latest")
+
+
+@traced("embed_texts")
+async def embed_texts(texts):
+    """Embed texts with the local Ollama embedding model"""
+    start_time = time.perf_counter()
+    response = await asyncio.to_thread(ollama.embed, model=EMBEDDING_MODEL, input=texts)
+    observe_embedding(EMBEDDING_MODEL, len(texts), time.perf_counter() - start_time)
+    return response["embeddings"]
+
+
+# Deterministic requests (temperature <= LLM_CACHE_MAX_TEMPERATURE) are answered from the cache
+provider = CachingProvider(
+    TracedProvider(router),
+    ResponseCache(os.getenv("LLM_CACHE_DB", "llm_cache.db"), ttl=float(os.getenv("LLM_CACHE_TTL", "86400"))),
+    max_temperature=float(os.getenv("LLM_CACHE_MAX_TEMPERATURE", "0")),
+    embed=embed_texts if os.getenv("LLM_CACHE_SEMANTIC", "false").lower() == "true" else None,
+    similarity_threshold=float(os.getenv("LLM_CACHE_SIMILARITY", "0.95")),
+)
+
+# Long pages are split into chunks that are summarized in parallel and merged.
+# Summaries run at temperature 0 by default, so repeated pages come from the cache
+summarizer = MapReduceSummarizer(
+    provider,
+    model="yandexgpt-lite/latest",
+    temperature=float(os.getenv("SUMMARY_TEMPERATURE", "0")),
+    chunk_tokens=int(os.getenv("SUMMARY_CHUNK_TOKENS", "2000")),
+    max_parallel=int(os.getenv("SUMMARY_MAX_PARALLEL", "4")),
+    retries=int(os.getenv("SUMMARY_RETRIES", "1")),
+)
+
+# Batch mode: concurrent URLs per pipeline stage
+BATCH_FETCH_CONCURRENCY = int(os.getenv("BATCH_FETCH_CONCURRENCY", "8"))
+BATCH_SUMMARY_CONCURRENCY = int(os.getenv("BATCH_SUMMARY_CONCURRENCY", "2"))
+BATCH_WRITE_CONCURRENCY = int(os.getenv("BATCH_WRITE_CONCURRENCY", "4"))
+
+# Prometheus metrics on http://127.0.0.1:METRICS_PORT/metrics, 0 disables
+METRICS_PORT = int(os.getenv("METRICS_PORT", "9464"))
+if METRICS_PORT:
+    start_metrics_server(METRICS_PORT)
+
+# MCP server pool shared by all chat sessions
+mcp_pool = MCPServerPool(["mcp_server.py"], size=int(os.getenv("MCP_POOL_SIZE", "2")))
+
+async def lease_mcp_server():
+    """Lease a warm MCP server from the pool for the current chat session"""
+    lease = await mcp_pool.lease()
+    cl.user_session.set("mcp_lease", lease)
+    return lease
+
+async def release_mcp_server():
+    """Return the current chat session's MCP server to the pool"""
+    lease = cl.user_session.get("mcp_lease")
+    if lease:
+        lease.release()
+        cl.user_session.set("mcp_lease", None)
 
 async def get_mcp_tools():
-    """Get available tools from MCP server"""
-    global mcp_session
-    if mcp_session:
-        try:
-            tools = await mcp_session.list_tools()
-            return tools
-        except Exception as e:
-            print(f"Error getting MCP tools: {e}")
-            return []
+    """Get available tools from MCP server (cached by the pool)"""
+    lease = cl.user_session.get("mcp_lease")
+    if lease and lease.tools:
+        return lease.tools
     return []
 
 async def call_mcp_tool(tool_name: str, arguments: dict = None):
     """Call an MCP tool"""
-    global mcp_session
-    if mcp_session:
-        try:
-            result = await mcp_session.call_tool(tool_name, arguments or {})
-            return result
-        except Exception as e:
-            print(f"Error calling MCP tool {tool_name}: {e}")
-            return None
+    lease = cl.user_session.get("mcp_lease")
+    if lease:
+        with span("call_mcp_tool", root=False, tool=tool_name) as current:
+            try:
+                result = await lease.call_tool(tool_name, arguments)
+                return result
+            except Exception as e:
+                print(f"Error calling MCP tool {tool_name}: {e}")
+                if current is not None:
+                    current.error = f"{type(e).__name__}: {e}"
+                return None
     return None
 
 
@@ -138,11 +115,11 @@ async def on_chat_start():
     print("Chat start called")
     
     
-    # Start MCP server
+    # Lease a warm MCP server from the shared pool
     try:
-        mcp_started = await start_mcp_server()
+        mcp_started = await lease_mcp_server()
         if mcp_started:
-            print("MCP Server started successfully")
+            print("MCP Server leased successfully")
             
             # Get available MCP tools
             tools_response = await get_mcp_tools()
@@ -173,6 +150,7 @@ async def on_chat_start():
 **Возможности:**
 - 📝 Обычный чат с ИИ на русском языке
 - 🔗 Обработка URL-адресов: отправьте URL, и я получу содержимое, создам краткое содержание и сохраню его в файл MD
+- 📚 Пакетная обработка: отправьте несколько URL в одном сообщении или прикрепите текстовый файл со списком ссылок
 
 **Примеры:**
 - "Расскажи о...")
@@ -184,91 +162,207 @@ async def on_chat_start():
 @cl.on_message
 async def on_message(message: cl.Message):
     """Handle incoming user messages"""
-    # Check if message contains a URL
-    url = extract_url(message.content)
-    if url:
-        # Process URL
-        await process_url_message(url, message)
-        return
-    
-    # For non-URL messages, use the standard response
-    await process_standard_message(message)
+    with span("turn", message_length=len(message.content or "")):
+        # Collect URLs from the message text and attached link lists
+        urls = extract_urls(message.content or "")
+        urls += await extract_urls_from_elements(message)
+        urls = list(dict.fromkeys(urls))
+        if len(urls) > 1:
+            await process_url_batch(urls)
+            return
+        if urls:
+            # Process URL
+            await process_url_message(urls[0], message)
+            return
+
+        # For non-URL messages, use the standard response
+        await process_standard_message(message)
 
 
 @cl.on_chat_end
 async def on_chat_end():
     """Handle chat session end"""
     
-    await stop_mcp_server()
+    await release_mcp_server()
     await cl.Message(content="👋 Спасибо за общение! До свидания!").send()
 
 
-def extract_url(text):
-    """Extract the first URL from text"""
-    url_pattern = r'https?://(?:[-\w.])+(?:[:\d]+)?(?:/(?:[\w/_.])*(?:\?(?:[\w&=%.])*)?(?:#(?:[\w.])*)?)?'
-    match = re.search(url_pattern, text)
-    return match.group(0) if match else None
+async def extract_urls_from_elements(message):
+    """Extract URLs from text files attached to the message"""
+    urls = []
+    for element in message.elements or []:
+        path = getattr(element, "path", None)
+        if not path:
+            continue
+        try:
+            with open(path, "r", encoding="utf-8", errors="replace") as f:
+                urls.extend(extract_urls(f.read()))
+        except OSError as e:
+            print(f"Error reading attached file {path}: {e}")
+    return urls
+
+
+def get_tool_text(result):
+    """Get the text of the first content item of an MCP tool result"""
+    if result and hasattr(result, 'content') and result.content:
+        return result.content[0].text if hasattr(result.content[0], 'text') else str(result.content[0])
+    return None
+
+
+MAX_FILENAME_TITLE = 50
+
+
+def clean_filename_title(title):
+    """Clean a title for use as a filename"""
+    title = re.sub(r'[^\w\s-]', '', title).strip()
+    title = re.sub(r'[-\s]+', '-', title)  # Replace spaces/hyphens with single hyphen
+    return title[:MAX_FILENAME_TITLE]  # Limit length
+
+
+@traced("fetch_url_content")
+async def fetch_url_content(url):
+    """Fetch URL content using MCP tool, returns (content_text, title)"""
+    content_data = get_tool_text(await call_mcp_tool("fetch_content", {"url": url}))
+    if content_data is None:
+        raise ValueError("Не удалось получить содержимое URL")
+
+    # Parse the content data (it's now a JSON string)
+    try:
+        content_dict = json.loads(content_data)
+        content_text = content_dict.get("content", "")
+        title = content_dict.get("title", None)
+    except json.JSONDecodeError:
+        # Fallback if it's not JSON
+        content_text = content_data
+        title = None
+
+    # Check if there was an error fetching content
+    if content_text.startswith("Error"):
+        raise ValueError(f"Ошибка при получении содержимого: {content_text}")
+
+    # Use the title from the content if available, otherwise extract from content or URL
+    if not title:
+        title = extract_title_from_content(content_text, url)
+    return content_text, title
+
+
+@traced("save_summary")
+async def save_summary(summary, title, filename=None):
+    """Save summary to a MD file using MCP tool, returns the filename
+
+    The filename is made from the title unless given, then it is used as is.
+    """
+    filename = filename or f"{clean_filename_title(title)}.md"
+    result_text = get_tool_text(await call_mcp_tool("write_file", {
+        "content": summary,
+        "filename": filename
+    }))
+    if result_text is None:
+        raise ValueError("Ошибка при сохранении файла")
+    if result_text.startswith("Error"):
+        raise ValueError(f"Ошибка при сохранении файла: {result_text}")
+    return filename
 
 
 async def process_url_message(url, message):
     """Process a message containing a URL"""
     # Send a message indicating we're processing the URL
     await cl.Message(content=f"Обрабатываю URL: {url}").send()
-    
-    # Fetch content using MCP tool
-    content_result = await call_mcp_tool("fetch_content", {"url": url})
-    
-    if content_result and hasattr(content_result, 'content') and content_result.content:
-        # Extract text and title from content
-        content_data = content_result.content[0].text if hasattr(content_result.content[0], 'text') else str(content_result.content[0])
-        
-        # Parse the content data (it's now a JSON string)
-        import json
-        try:
-            content_dict = json.loads(content_data)
-            content_text = content_dict.get("content", "")
-            title = content_dict.get("title", None)
-        except json.JSONDecodeError:
-            # Fallback if it's not JSON
-            content_text = content_data
-            title = None
-        
-        # Check if there was an error fetching content
-        if content_text.startswith("Error"):
-            await cl.Message(content=f"Ошибка при получении содержимого: {content_text}").send()
-            return
-        
-        # Generate summary using YandexGPT
-        summary = await generate_summary(content_text, url)
-        
-        # Use the title from the content if available, otherwise extract from content or URL
-        if title:
-            filename_title = title
-        else:
-            filename_title = extract_title_from_content(content_text, url)
-        
-        # Clean title for filename
-        filename_title = re.sub(r'[^\w\s-]', '', filename_title).strip()
-        filename_title = re.sub(r'[-\s]+', '-', filename_title)  # Replace spaces/hyphens with single hyphen
-        filename_title = filename_title[:50]  # Limit length
-        
-        # Save summary to file using MCP tool
-        filename = f"{filename_title}.md"
-        write_result = await call_mcp_tool("write_file", {
-            "content": summary,
-            "filename": filename
-        })
-        
-        if write_result and hasattr(write_result, 'content') and write_result.content:
-            result_text = write_result.content[0].text if hasattr(write_result.content[0], 'text') else str(write_result.content[0])
-            if not result_text.startswith("Error"):
-                await cl.Message(content=f"Содержимое сохранено в файл: {filename}").send()
-            else:
-                await cl.Message(content=f"Ошибка при сохранении файла: {result_text}").send()
+
+    try:
+        content_text, title = await fetch_url_content(url)
+    except ValueError as e:
+        await cl.Message(content=str(e)).send()
+        return
+
+    # Generate summary using YandexGPT
+    summary = await generate_summary(content_text, url)
+
+    try:
+        filename = await save_summary(summary, title)
+        await cl.Message(content=f"Содержимое сохранено в файл: {filename}").send()
+    except ValueError as e:
+        await cl.Message(content=str(e)).send()
+
+
+def format_batch_progress(progress: BatchProgress):
+    """Format batch progress for the chat"""
+    return (
+        f"📚 Пакетная обработка: {progress.done}/{progress.total} "
+        f"(загружено: {progress.fetched}, сохранено: {progress.saved}, "
+        f"дубликатов: {progress.duplicates}, ошибок: {progress.failed}) "
+        f"— {progress.elapsed:.0f} с"
+    )
+
+
+async def process_url_batch(urls):
+    """Process many URLs as a concurrent fetch → summarize → save pipeline"""
+    status_message = cl.Message(content=f"📚 Пакетная обработка {len(urls)} URL...")
+    await status_message.send()
+
+    async def report(progress: BatchProgress):
+        status_message.content = format_batch_progress(progress)
+        await status_message.update()
+
+    # Several pages may share a title, keep every summary in its own file
+    used_titles = set()
+
+    async def save(summary, title, url):
+        base_title = clean_filename_title(title) or "summary"
+        unique_title = base_title
+        index = 2
+        while unique_title.lower() in used_titles:
+            # Shorten the title so the suffix is not cut off by the length limit
+            suffix = f"-{index}"
+            unique_title = f"{base_title[:MAX_FILENAME_TITLE - len(suffix)]}{suffix}"
+            index += 1
+        used_titles.add(unique_title.lower())
+        return await save_summary(summary, title, filename=f"{unique_title}.md")
+
+    async def summarize(content, url):
+        summary = await summarizer.summarize(content, url)
+        if not summary:
+            raise ValueError("Не удалось создать краткое содержание")
+        return summary
+
+    processor = BatchProcessor(
+        fetch=fetch_url_content,
+        summarize=summarize,
+        save=save,
+        fetch_limit=BATCH_FETCH_CONCURRENCY,
+        summarize_limit=BATCH_SUMMARY_CONCURRENCY,
+        save_limit=BATCH_WRITE_CONCURRENCY,
+        on_progress=report,
+    )
+    items, progress = await processor.process(urls)
+
+    # Save an index of the batch next to the summaries
+    lines = [f"# Пакетная обработка {datetime.now().strftime('%Y-%m-%d %H:%M')}", ""]
+    for item in items:
+        if item.status == "saved":
+            lines.append(f"- [{item.title or item.url}]({item.filename}) — {item.url}")
+        elif item.status == "duplicate":
+            lines.append(f"- {item.url} — дубликат {item.duplicate_of}")
         else:
-            await cl.Message(content="Ошибка при сохранении файла").send()
-    else:
-        await cl.Message(content="Не удалось получить содержимое URL").send()
+            lines.append(f"- {item.url} — ошибка: {item.error}")
+    index_filename = f"batch-{datetime.now().strftime('%Y%m%d-%H%M%S')}.md"
+    try:
+        await save_summary("\n".join(lines) + "\n", index_filename[:-3], filename=index_filename)
+    except ValueError as e:
+        print(f"Error saving batch index: {e}")
+        index_filename = None
+
+    report_text = format_batch_progress(progress)
+    failed = [item for item in items if item.status == "failed"]
+    if failed:
+        report_text += "\n\n**Ошибки:**\n" + "\n".join(
+            f"- {item.url}: {item.error}" for item in failed[:20]
+        )
+        if len(failed) > 20:
+            report_text += f"\n- ... и еще {len(failed) - 20}"
+    if index_filename:
+        report_text += f"\n\nСписок результатов сохранен в файл: {index_filename}"
+    await cl.Message(content=report_text).send()
 
 async def process_standard_message(message):
     """Process standard messages (non-URL)"""
@@ -322,43 +416,13 @@ async def process_standard_message(message):
         await cl.Message(content=f"Ошибка при генерации ответа: {str(e)}").send()
 
 
+@traced("generate_summary")
 async def generate_summary(content, url):
-    """Generate a summary of the content using YandexGPT"""
-    # Truncate content if too long
-    max_length = 5000
-    if len(content) > max_length:
-        content = content[:max_length] + "..."
-    
-    summary_prompt = f"""Вы должны создать краткое и информативное содержание следующего текста на русском языке.
-
-Текст взят с URL: {url}
-
-Требования к краткому содержанию:
-- Пишите на русском языке
-- Выделите основные идеи и ключевые моменты
-- Сохраняйте важные факты и цифры
-- Используйте четкую и лаконичную структуру
-- Длина краткого содержания должна быть 3-5 абзацев
-
-Текст:
-{content}
-
-Краткое содержание:"""
-    
+    """Generate a summary of the content using YandexGPT (map-reduce for long texts)"""
     try:
-        # Use default values
-        model = "yandexgpt-lite/latest"
-        temperature = 0.7
-        
-        # Call YandexGPT through the provider
-        completion_response = await provider.completions(
-            messages=[{"role": "user", "content": summary_prompt}],
-            model=model,
-            temperature=temperature
-        )
-        
-        if completion_response and completion_response.text:
-            return completion_response.text
+        summary = await summarizer.summarize(content, url)
+        if summary:
+            return summary
         else:
             return "Не удалось создать краткое содержание."
     except Exception as e:
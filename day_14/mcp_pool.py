@@ -0,0 +1,221 @@
+import asyncio
+import sys
+from typing import List, Optional
+from mcp import ClientSession
+from mcp.client.stdio import stdio_client, StdioServerParameters
+from tool_registry import ToolRegistry
+
+
+class MCPServer:
+    """A warm MCP server process with an initialized client session.
+
+    The stdio transport and the session are entered and exited inside one
+    background task, so the server can be shared by chat sessions that run
+    in other tasks.
+    """
+
+    def __init__(self, server_params: StdioServerParameters, init_timeout: float = 30.0):
+        self.server_params = server_params
+        self.init_timeout = init_timeout
+        self.session: Optional[ClientSession] = None
+        self.registry = ToolRegistry()
+        self.leases = 0
+        self._ready = asyncio.Event()
+        self._stop = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def alive(self) -> bool:
+        return self.session is not None and self._task is not None and not self._task.done()
+
+    async def start(self) -> bool:
+        """Start the server process and wait until the session is initialized"""
+        self._task = asyncio.create_task(self._run())
+        await self._ready.wait()
+        return self.alive
+
+    async def _run(self):
+        try:
+            async with stdio_client(self.server_params) as (read, write):
+                async with ClientSession(
+                    read, write, message_handler=self.registry.handle_message
+                ) as session:
+                    await asyncio.wait_for(session.initialize(), timeout=self.init_timeout)
+                    self.registry.bind(session)
+                    await self.registry.refresh()
+                    self.session = session
+                    self._ready.set()
+                    await self._stop.wait()
+        except Exception as e:
+            print(f"MCP server stopped with error: {e}")
+        finally:
+            self.session = None
+            self._ready.set()
+
+    async def ping(self, timeout: float = 5.0) -> bool:
+        """Check that the server still answers requests"""
+        if not self.alive:
+            return False
+        try:
+            await asyncio.wait_for(self.session.send_ping(), timeout=timeout)
+            return True
+        except Exception as e:
+            print(f"MCP server ping failed: {e}")
+            return False
+
+    async def stop(self, timeout: float = 5.0):
+        """Close the session and terminate the server process"""
+        self._stop.set()
+        if self._task is None:
+            return
+        try:
+            await asyncio.wait_for(self._task, timeout=timeout)
+        except Exception:
+            self._task.cancel()
+        self._task = None
+
+
+class MCPLease:
+    """A chat session's handle on a pooled MCP server"""
+
+    def __init__(self, pool: "MCPServerPool", server: MCPServer):
+        self.pool = pool
+        self.server = server
+        self.server.leases += 1
+
+    @property
+    def tools(self):
+        """Cached list_tools() result"""
+        return self.pool.registry.result
+
+    @property
+    def registry(self) -> ToolRegistry:
+        """Cached tool catalog with precomputed schemas"""
+        return self.pool.registry
+
+    async def call_tool(self, tool_name: str, arguments: dict = None):
+        """Call a tool, moving to a healthy server if the leased one crashed"""
+        self._check_leased()
+        if not self.server.alive:
+            await self._reassign()
+        try:
+            return await self.server.session.call_tool(tool_name, arguments or {})
+        except Exception:
+            if await self.server.ping():
+                raise
+            # The server died during the call, retry once on a fresh one
+            asyncio.create_task(self.pool.check_health())
+            await self._reassign()
+            return await self.server.session.call_tool(tool_name, arguments or {})
+
+    async def _reassign(self):
+        # Acquire first, so a failure leaves the lease and the counts as they were
+        server = await self.pool.acquire_server(exclude=self.server)
+        self._check_leased()
+        self.server.leases -= 1
+        self.server = server
+        self.server.leases += 1
+
+    def _check_leased(self):
+        if self.server is None:
+            raise RuntimeError("MCP lease was already released")
+
+    def release(self):
+        """Return the server to the pool"""
+        if self.server is not None:
+            self.server.leases -= 1
+            self.server = None
+
+
+class MCPServerPool:
+    """Pool of warm MCP server processes shared across chat sessions.
+
+    Servers are started once and leased to chats, so a new chat does not spawn
+    a process. A background task pings the servers and restarts crashed ones.
+    The tool catalog is fetched once per server start and refreshed only on
+    tools/list_changed notifications.
+    """
+
+    def __init__(
+        self,
+        server_args: List[str],
+        size: int = 2,
+        init_timeout: float = 30.0,
+        health_interval: float = 30.0,
+    ):
+        self.server_params = StdioServerParameters(command=sys.executable, args=server_args)
+        self.size = size
+        self.init_timeout = init_timeout
+        self.health_interval = health_interval
+        self.servers: List[MCPServer] = []
+        self._lock = asyncio.Lock()
+        self._health_task: Optional[asyncio.Task] = None
+
+    @property
+    def registry(self) -> ToolRegistry:
+        """Tool catalog of the first running server"""
+        for server in self.servers:
+            if server.registry.result is not None:
+                return server.registry
+        return ToolRegistry()
+
+    async def start(self) -> bool:
+        """Start the pool if it is not running yet"""
+        async with self._lock:
+            if not self.servers:
+                print(f"Starting {self.size} MCP servers...")
+                self.servers = [
+                    MCPServer(self.server_params, self.init_timeout) for _ in range(self.size)
+                ]
+                await asyncio.gather(*(server.start() for server in self.servers))
+                self._health_task = asyncio.create_task(self._health_loop())
+            return any(server.alive for server in self.servers)
+
+    async def lease(self) -> Optional[MCPLease]:
+        """Lease the least loaded healthy server for a chat session"""
+        if not await self.start():
+            return None
+        try:
+            return MCPLease(self, await self.acquire_server())
+        except RuntimeError as e:
+            print(f"MCP lease failed: {e}")
+            return None
+
+    async def acquire_server(self, exclude: Optional[MCPServer] = None) -> MCPServer:
+        """Get the least loaded healthy server, restarting dead ones if needed"""
+        candidates = [s for s in self.servers if s.alive and s is not exclude]
+        if not candidates:
+            await self.check_health()
+            candidates = [s for s in self.servers if s.alive]
+        if not candidates:
+            raise RuntimeError("No MCP servers are available")
+        return min(candidates, key=lambda s: s.leases)
+
+    async def check_health(self):
+        """Restart servers that crashed or stopped answering"""
+        async with self._lock:
+            for index, server in enumerate(self.servers):
+                if await server.ping():
+                    continue
+                print("Restarting MCP server...")
+                await server.stop()
+                replacement = MCPServer(self.server_params, self.init_timeout)
+                await replacement.start()
+                self.servers[index] = replacement
+
+    async def _health_loop(self):
+        while True:
+            await asyncio.sleep(self.health_interval)
+            try:
+                await self.check_health()
+            except Exception as e:
+                print(f"MCP health check failed: {e}")
+
+    async def stop(self):
+        """Stop all servers"""
+        if self._health_task is not None:
+            self._health_task.cancel()
+            self._health_task = None
+        async with self._lock:
+            await asyncio.gather(*(server.stop() for server in self.servers))
+            self.servers = []
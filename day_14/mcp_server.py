@@ -1,31 +1,19 @@
 from mcp.server.fastmcp import FastMCP
 from datetime import datetime, timezone
-import requests
-from bs4 import BeautifulSoup
 import os
+from fetcher import Fetcher, fetch_main_content
 
 mcp = FastMCP(name="Time MCP Server")
 
+# Shared HTTP client: pooled connections and an on-disk cache for repeated URLs
+fetcher = Fetcher()
+
 
 @mcp.tool()
-def fetch_content(url: str) -> dict:
-    """Fetches the content of a given URL and returns it as text along with the title."""
+async def fetch_content(url: str) -> dict:
+    """Fetches the main readable content of a given URL and returns it as text along with the title."""
     try:
-        response = requests.get(url)
-        response.raise_for_status()
-        soup = BeautifulSoup(response.content, 'html.parser')
-        
-        # Extract title
-        title_tag = soup.find('title')
-        title = title_tag.get_text().strip() if title_tag else None
-        
-        # Extract text content
-        content = soup.get_text()
-        
-        return {
-            "content": content,
-            "title": title
-        }
+        return await fetch_main_content(fetcher, url)
     except Exception as e:
         return {
             "content": f"Error fetching content: {str(e)}",
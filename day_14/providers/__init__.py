@@ -5,5 +5,7 @@ from .ollama import OllamaProvider
 from .openrouter import OpenRouterProvider
 from .yandexcloud import YandexCloudProvider
 from .mistral import MistralProvider
+from .router import RoutingProvider, create_router
+from .cache import CachingProvider, ResponseCache
 
-__all__ = ["Provider", "CompletionsResponse", "GigachatProvider", "OllamaProvider", "OpenRouterProvider", "YandexCloudProvider", "MistralProvider"]
\ No newline at end of file
+__all__ = ["Provider", "CompletionsResponse", "GigachatProvider", "OllamaProvider", "OpenRouterProvider", "YandexCloudProvider", "MistralProvider", "RoutingProvider", "create_router", "CachingProvider", "ResponseCache"]
\ No newline at end of file
@@ -0,0 +1,254 @@
+import asyncio
+import hashlib
+import json
+import math
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import asdict
+from typing import List, Optional, Dict, Any, Callable, Awaitable, Tuple
+from .base import Provider
+from .completion_response import CompletionsResponse
+from .metrics import CACHE_REQUESTS
+
+# Async callable returning one embedding per text
+EmbedFn = Callable[[List[str]], Awaitable[List[List[float]]]]
+
+
+def _normalize(vector: List[float]) -> List[float]:
+    norm = math.sqrt(sum(x * x for x in vector)) or 1.0
+    return [x / norm for x in vector]
+
+
+class ResponseCache:
+    """Two-tier cache of completions: an in-memory LRU in front of SQLite.
+
+    Entries are keyed by a hash of (provider, model, temperature, messages).
+    Semantic entries additionally store the normalized embedding of the last
+    user message; a lookup matches entries with the same provider, model,
+    temperature and preceding messages whose cosine similarity to the query
+    is at least `similarity_threshold`.
+
+    Methods are called from worker threads (see CachingProvider), so the
+    memory and vector tiers are guarded by a lock; SQLite I/O runs outside it
+    on a connection per call.
+    """
+
+    def __init__(self, db_path: str = "llm_cache.db", ttl: float = 24 * 3600, max_memory_entries: int = 1000):
+        self.db_path = db_path
+        self.ttl = ttl
+        self.max_memory_entries = max_memory_entries
+        self._memory: "OrderedDict[str, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+        # scope -> [(key, expires_at, vector)], loaded from SQLite on first use
+        self._vectors: Dict[str, List[Tuple[str, float, List[float]]]] = {}
+        self._lock = threading.Lock()
+        self._init_db()
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.db_path)
+
+    def _init_db(self):
+        with self._connect() as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS responses (
+                    key TEXT PRIMARY KEY,
+                    scope TEXT NOT NULL,
+                    embedding TEXT,
+                    response TEXT NOT NULL,
+                    created_at REAL NOT NULL,
+                    expires_at REAL NOT NULL,
+                    hits INTEGER NOT NULL DEFAULT 0
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS responses_scope ON responses (scope)")
+            conn.execute("DELETE FROM responses WHERE expires_at < ?", (time.time(),))
+
+    @staticmethod
+    def make_key(provider: str, model: str, temperature: float, messages: List[Dict[str, Any]]) -> str:
+        data = json.dumps([provider, model, temperature, messages], ensure_ascii=False, sort_keys=True)
+        return hashlib.sha256(data.encode("utf-8")).hexdigest()
+
+    @staticmethod
+    def make_scope(provider: str, model: str, temperature: float, messages: List[Dict[str, Any]]) -> str:
+        """Semantic scope: everything except the last message must match exactly"""
+        return ResponseCache.make_key(provider, model, temperature, messages[:-1])
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                if entry[0] > now:
+                    self._memory.move_to_end(key)
+                else:
+                    self._memory.pop(key, None)
+                    entry = None
+        if entry is not None:
+            self._hit(key)
+            return entry[1]
+
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT response, expires_at FROM responses WHERE key = ? AND expires_at > ?",
+                (key, now),
+            ).fetchone()
+        if row is None:
+            return None
+        response = json.loads(row[0])
+        self._remember(key, row[1], response)
+        self._hit(key)
+        return response
+
+    def get_similar(self, scope: str, vector: List[float], threshold: float) -> Optional[Dict[str, Any]]:
+        """Find the most similar cached response in the scope"""
+        vector = _normalize(vector)
+        now = time.time()
+        best_key, best_score = None, threshold
+        for key, expires_at, candidate in self._scope_vectors(scope):
+            if expires_at <= now:
+                continue
+            score = sum(a * b for a, b in zip(vector, candidate))
+            if score >= best_score:
+                best_key, best_score = key, score
+        return self.get(best_key) if best_key else None
+
+    def put(self, key: str, scope: str, response: Dict[str, Any], vector: Optional[List[float]] = None,
+            ttl: Optional[float] = None):
+        now = time.time()
+        expires_at = now + (ttl if ttl is not None else self.ttl)
+        if vector is not None:
+            vector = _normalize(vector)
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO responses (key, scope, embedding, response, created_at, expires_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (key, scope, json.dumps(vector) if vector else None,
+                 json.dumps(response, ensure_ascii=False), now, expires_at),
+            )
+        self._remember(key, expires_at, response)
+        with self._lock:
+            if vector is not None and scope in self._vectors:
+                self._vectors[scope] = [v for v in self._vectors[scope] if v[0] != key]
+                self._vectors[scope].append((key, expires_at, vector))
+
+    def clear(self):
+        with self._lock:
+            self._memory.clear()
+            self._vectors.clear()
+        with self._connect() as conn:
+            conn.execute("DELETE FROM responses")
+
+    def _scope_vectors(self, scope: str) -> List[Tuple[str, float, List[float]]]:
+        """Snapshot of the scope's vectors, safe to iterate without the lock"""
+        with self._lock:
+            if scope in self._vectors:
+                return list(self._vectors[scope])
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT key, expires_at, embedding FROM responses "
+                "WHERE scope = ? AND embedding IS NOT NULL AND expires_at > ?",
+                (scope, time.time()),
+            ).fetchall()
+        loaded = [(key, expires_at, json.loads(embedding)) for key, expires_at, embedding in rows]
+        with self._lock:
+            # Another thread may have loaded the scope meanwhile, keep its list
+            return list(self._vectors.setdefault(scope, loaded))
+
+    def _remember(self, key: str, expires_at: float, response: Dict[str, Any]):
+        with self._lock:
+            self._memory[key] = (expires_at, response)
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.max_memory_entries:
+                self._memory.popitem(last=False)
+
+    def _hit(self, key: str):
+        with self._connect() as conn:
+            conn.execute("UPDATE responses SET hits = hits + 1 WHERE key = ?", (key,))
+
+
+class CachingProvider(Provider):
+    """Serves repeated deterministic requests from a ResponseCache.
+
+    Only requests with temperature at most `max_temperature` (0 by default)
+    and without tools are cached, since other requests are not expected to
+    repeat their answers. Pass `bypass_cache=True` to force a fresh answer,
+    which still refreshes the cache. With `embed`, a request that misses the
+    exact cache may be answered by a semantically similar earlier request.
+    """
+
+    def __init__(
+        self,
+        provider: Provider,
+        cache: ResponseCache,
+        max_temperature: float = 0.0,
+        embed: Optional[EmbedFn] = None,
+        similarity_threshold: float = 0.95,
+    ):
+        super().__init__(provider.name)
+        self.provider = provider
+        self.cache = cache
+        self.max_temperature = max_temperature
+        self.embed = embed
+        self.similarity_threshold = similarity_threshold
+        self.hits = 0
+        self.semantic_hits = 0
+        self.misses = 0
+
+    async def completions(self, messages: List[Dict[str, Any]], temperature: float, model: str,
+                          tools: Optional[List[Dict[str, Any]]] = None,
+                          bypass_cache: bool = False) -> Optional[CompletionsResponse]:
+        """Get completions from the cache or the wrapped provider"""
+        if tools or temperature > self.max_temperature or not messages:
+            return await self._call(messages, temperature, model, tools)
+
+        start_time = time.time()
+        key = ResponseCache.make_key(self.provider.name, model, temperature, messages)
+        scope = ResponseCache.make_scope(self.provider.name, model, temperature, messages)
+        vector = None
+
+        if not bypass_cache:
+            cached = await asyncio.to_thread(self.cache.get, key)
+            if cached is None and self.embed:
+                vector = await self._embed(messages[-1])
+                if vector is not None:
+                    cached = await asyncio.to_thread(
+                        self.cache.get_similar, scope, vector, self.similarity_threshold
+                    )
+                    self.semantic_hits += int(cached is not None)
+            if cached is not None:
+                self.hits += 1
+                CACHE_REQUESTS.labels(result="semantic_hit" if vector is not None else "hit").inc()
+                response = CompletionsResponse(**cached)
+                response.latency = time.time() - start_time
+                return response
+
+        self.misses += 1
+        CACHE_REQUESTS.labels(result="bypass" if bypass_cache else "miss").inc()
+        response = await self._call(messages, temperature, model, tools)
+        if response is not None and response.text:
+            if self.embed and vector is None:
+                vector = await self._embed(messages[-1])
+            await asyncio.to_thread(self.cache.put, key, scope, asdict(response), vector)
+        return response
+
+    async def _call(self, messages, temperature, model, tools) -> Optional[CompletionsResponse]:
+        if tools is not None:
+            return await self.provider.completions(messages, temperature, model, tools=tools)
+        return await self.provider.completions(messages, temperature, model)
+
+    async def _embed(self, message: Dict[str, Any]) -> Optional[List[float]]:
+        try:
+            return (await self.embed([message.get("content", "")]))[0]
+        except Exception as e:
+            print(f"Error embedding cache query: {e}")
+            return None
+
+    async def tokenize(self, text: str, model: str) -> Optional[int]:
+        return await self.provider.tokenize(text, model)
+
+    def format_stats(self) -> str:
+        """Get a cache hit summary"""
+        total = self.hits + self.misses
+        rate = self.hits / total if total else 0.0
+        return f"cache hits {self.hits} ({self.semantic_hits} semantic), misses {self.misses}, hit rate {rate:.0%}"
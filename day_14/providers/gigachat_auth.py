@@ -0,0 +1,118 @@
+import asyncio
+import os
+import ssl
+import time
+import uuid
+from typing import Dict, Optional, Tuple
+import aiohttp
+
+OAUTH_URL = "https://ngw.devices.sberbank.ru:9443/api/v2/oauth"
+
+
+def get_connector() -> aiohttp.TCPConnector:
+    """Connector for the Sber endpoints, whose certificates are not in the default store"""
+    ssl_context = ssl.create_default_context()
+    ssl_context.check_hostname = False
+    ssl_context.verify_mode = ssl.CERT_NONE
+    return aiohttp.TCPConnector(ssl=ssl_context)
+
+
+class GigachatTokenManager:
+    """Keeps a valid Gigachat access token.
+
+    Tokens live for 30 minutes. A background task refreshes the token
+    `refresh_margin` seconds before it expires, so requests never wait for
+    the OAuth round-trip once the first token is fetched. Concurrent callers
+    share a single in-flight refresh.
+    """
+
+    def __init__(self, api_key: str, scope: str = "GIGACHAT_API_PERS", refresh_margin: float = 120.0):
+        self.api_key = api_key
+        self.scope = scope
+        self.refresh_margin = refresh_margin
+        self.access_token: Optional[str] = None
+        self.expires_at = 0.0
+        self._lock = asyncio.Lock()
+        self._refresher: Optional[asyncio.Task] = None
+
+    def _is_valid(self) -> bool:
+        return self.access_token is not None and time.time() < self.expires_at - 5
+
+    async def get_token(self) -> Optional[str]:
+        """Get a valid access token, fetching one only if there is none yet"""
+        if self._is_valid():
+            return self.access_token
+        return await self.refresh()
+
+    async def refresh(self, stale_token: Optional[str] = None) -> Optional[str]:
+        """Fetch a new token; callers arriving during a refresh reuse its result.
+
+        With `stale_token` the refresh is skipped if the token has already
+        been replaced, e.g. by another request that also got a 401.
+        """
+        async with self._lock:
+            if self._is_valid() and self.access_token != stale_token:
+                return self.access_token
+            await self._fetch_token()
+            return self.access_token
+
+    async def _fetch_token(self):
+        # https://developers.sber.ru/docs/ru/gigachat/api/reference/rest/post-token
+        headers = {
+            'Content-Type': 'application/x-www-form-urlencoded',
+            'Accept': 'application/json',
+            'RqUID': f'{uuid.uuid4()}',
+            'Authorization': f'Basic {self.api_key}'
+        }
+        try:
+            async with aiohttp.ClientSession(connector=get_connector()) as session:
+                async with session.post(
+                        url=os.getenv("GIGACHAT_OAUTH_URL", OAUTH_URL),
+                        data=f'scope={self.scope}',
+                        headers=headers,
+                        timeout=aiohttp.ClientTimeout(total=60)
+                ) as response:
+                    if response.status == 200:
+                        result = await response.json()
+                        self.access_token = result["access_token"]
+                        # expires_at is a Unix timestamp in milliseconds
+                        self.expires_at = result.get("expires_at", 0) / 1000 or time.time() + 1800
+                        self._ensure_refresher()
+                    else:
+                        error_text = await response.text()
+                        print(f"Gigachat OAuth error: {response.status} - {error_text}")
+        except asyncio.TimeoutError:
+            print("Gigachat OAuth request timed out")
+        except Exception as e:
+            print(f"Error requesting Gigachat access token: {str(e)}")
+
+    def _ensure_refresher(self):
+        if self._refresher is None or self._refresher.done():
+            self._refresher = asyncio.create_task(self._refresh_loop())
+
+    async def _refresh_loop(self):
+        while self.access_token is not None:
+            await asyncio.sleep(max(self.expires_at - self.refresh_margin - time.time(), 0))
+            if time.time() >= self.expires_at - self.refresh_margin:
+                await self.refresh(stale_token=self.access_token)
+                if time.time() >= self.expires_at - self.refresh_margin:
+                    # The refresh failed, try again shortly
+                    await asyncio.sleep(10)
+
+    async def close(self):
+        if self._refresher is not None:
+            self._refresher.cancel()
+            self._refresher = None
+
+
+_managers: Dict[Tuple[str, str], GigachatTokenManager] = {}
+
+
+def get_token_manager(api_key: Optional[str] = None, scope: Optional[str] = None) -> GigachatTokenManager:
+    """Get the token manager shared by all providers using the same credentials"""
+    api_key = api_key if api_key is not None else os.getenv("GIGACHAT_API_KEY", "")
+    scope = scope or os.getenv("GIGACHAT_SCOPE", "GIGACHAT_API_PERS")
+    key = (api_key, scope)
+    if key not in _managers:
+        _managers[key] = GigachatTokenManager(api_key, scope)
+    return _managers[key]
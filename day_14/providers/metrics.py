@@ -0,0 +1,58 @@
+from typing import Optional
+from prometheus_client import Counter, Gauge, Histogram, start_http_server
+from .completion_response import CompletionsResponse
+
+LATENCY_BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128, 256)
+
+# LLM serving metrics shared by the providers and the app
+LLM_REQUEST_SECONDS = Histogram(
+    "llm_request_duration_seconds", "Completion latency including retries", ["provider", "model"],
+    buckets=LATENCY_BUCKETS,
+)
+LLM_REQUESTS = Counter("llm_requests_total", "Completion requests by outcome", ["provider", "model", "status"])
+LLM_TOKENS = Counter("llm_tokens_total", "Prompt and completion tokens", ["provider", "model", "type"])
+LLM_RETRIES = Counter("llm_retries_total", "Retried provider HTTP requests", ["provider", "reason"])
+LLM_QUEUE_DEPTH = Gauge("llm_queue_depth", "Requests waiting for the rate limiter or a free slot", ["provider"])
+LLM_IN_FLIGHT = Gauge("llm_requests_in_flight", "Provider HTTP requests in flight", ["provider"])
+CACHE_REQUESTS = Counter("llm_cache_requests_total", "Response cache lookups", ["result"])
+EMBEDDING_BATCH_SIZE = Histogram(
+    "embedding_batch_size", "Texts per embedding request", ["model"], buckets=SIZE_BUCKETS
+)
+EMBEDDING_SECONDS = Histogram(
+    "embedding_duration_seconds", "Embedding request latency", ["model"], buckets=LATENCY_BUCKETS
+)
+QDRANT_QUERY_SECONDS = Histogram(
+    "qdrant_query_duration_seconds", "Qdrant query latency", ["collection"], buckets=LATENCY_BUCKETS
+)
+
+
+def observe_completion(provider: str, model: str, latency: float, response: Optional[CompletionsResponse]):
+    """Record latency, outcome and token usage of one completion"""
+    model = model or ""
+    LLM_REQUEST_SECONDS.labels(provider=provider, model=model).observe(latency)
+    LLM_REQUESTS.labels(provider=provider, model=model, status="ok" if response is not None else "error").inc()
+    if response is None:
+        return
+    prompt_tokens = response.prompt_tokens or response.prompt_tokens_calculated
+    completion_tokens = response.completion_tokens or response.completion_tokens_calculated
+    if prompt_tokens:
+        LLM_TOKENS.labels(provider=provider, model=model, type="prompt").inc(prompt_tokens)
+    if completion_tokens:
+        LLM_TOKENS.labels(provider=provider, model=model, type="completion").inc(completion_tokens)
+
+
+def observe_embedding(model: str, batch_size: int, latency: float):
+    EMBEDDING_BATCH_SIZE.labels(model=model).observe(batch_size)
+    EMBEDDING_SECONDS.labels(model=model).observe(latency)
+
+
+def start_metrics_server(port: int, host: str = "127.0.0.1") -> bool:
+    """Serve GET /metrics from a background thread, returns False if the port is taken"""
+    try:
+        start_http_server(port, addr=host)
+    except OSError as e:
+        print(f"Error starting metrics server on {host}:{port}: {e}")
+        return False
+    print(f"Metrics available at http://{host}:{port}/metrics")
+    return True
@@ -1,10 +1,10 @@
 from typing import Optional, List, Dict, Any
-import aiohttp
 import os
 import time
 from tokenizers import Tokenizer
 from .base import Provider
 from .completion_response import CompletionsResponse
+from .scheduler import post_json
 
 
 class MistralProvider(Provider):
@@ -12,7 +12,7 @@ class MistralProvider(Provider):
     
     def __init__(self):
         super().__init__("Mistral")
-        self.url = "https://api.mistral.ai/v1/chat/completions"
+        self.url = f"{os.getenv('MISTRAL_BASE_URL', 'https://api.mistral.ai/v1')}/chat/completions"
     
     async def completions(self, messages: List[Dict[str, Any]], temperature: float, model: str) -> Optional[CompletionsResponse]:
         """Call Mistral API using REST"""
@@ -40,28 +40,25 @@ class MistralProvider(Provider):
                 
         start_time = time.time()
         try:
-            async with aiohttp.ClientSession() as session:
-                async with session.post(self.url, headers=headers, json=payload) as response:
-                    response.raise_for_status()
-                    result = await response.json()
-                    latency = time.time() - start_time
-                    
-                    text = result["choices"][0]["message"]["content"]
-                    usage = result.get("usage", {})
-                    
-                    # Calculate tokens using tokenize method
-                    prompt_tokens_calculated = await self.tokenize(prompt_text, model)
-                    completion_tokens_calculated = await self.tokenize(text, model)
-                    
-                    return CompletionsResponse(
-                        text=text,
-                        prompt_tokens=usage.get("prompt_tokens"),
-                        completion_tokens=usage.get("completion_tokens"),
-                        total_tokens=usage.get("total_tokens"),
-                        prompt_tokens_calculated=prompt_tokens_calculated,
-                        completion_tokens_calculated=completion_tokens_calculated,
-                        latency=latency
-                    )
+            result = await self.scheduler.run(model, lambda: post_json(self.url, headers, payload))
+            latency = time.time() - start_time
+            
+            text = result["choices"][0]["message"]["content"]
+            usage = result.get("usage", {})
+            
+            # Calculate tokens using tokenize method
+            prompt_tokens_calculated = await self.tokenize(prompt_text, model)
+            completion_tokens_calculated = await self.tokenize(text, model)
+            
+            return CompletionsResponse(
+                text=text,
+                prompt_tokens=usage.get("prompt_tokens"),
+                completion_tokens=usage.get("completion_tokens"),
+                total_tokens=usage.get("total_tokens"),
+                prompt_tokens_calculated=prompt_tokens_calculated,
+                completion_tokens_calculated=completion_tokens_calculated,
+                latency=latency
+            )
         except Exception as e:
             print(f"Error calling Mistral API: {e}")
             return None
@@ -1,10 +1,10 @@
 from typing import Optional, List, Dict, Any
-import aiohttp
 import os
 import time
 from tokenizers import Tokenizer
 from .base import Provider
 from .completion_response import CompletionsResponse
+from .scheduler import post_json
 
 
 class OpenRouterProvider(Provider):
@@ -12,7 +12,7 @@ class OpenRouterProvider(Provider):
     
     def __init__(self):
         super().__init__("OpenRouter")
-        self.url = "https://openrouter.ai/api/v1/chat/completions"
+        self.url = f"{os.getenv('OPENROUTER_BASE_URL', 'https://openrouter.ai/api/v1')}/chat/completions"
         self.http_referer = os.getenv("OPENROUTER_HTTP_REFERER", "")
         self.x_title = os.getenv("OPENROUTER_X_TITLE", "")
     
@@ -49,27 +49,24 @@ class OpenRouterProvider(Provider):
 
         start_time = time.time()
         try:
-            async with aiohttp.ClientSession() as session:
-                async with session.post(self.url, headers=headers, json=payload) as response:
-                    response.raise_for_status()
-                    result = await response.json()
-                    latency = time.time() - start_time
-                    
-                    text = result["choices"][0]["message"]["content"]
-                    usage = result.get("usage", {})
-                    
-                    # Calculate tokens using tokenize method
-                    completion_tokens_calculated = await self.tokenize(text, model)
-                    
-                    return CompletionsResponse(
-                        text=text,
-                        prompt_tokens=usage.get("prompt_tokens"),
-                        completion_tokens=usage.get("completion_tokens"),
-                        total_tokens=usage.get("total_tokens"),
-                        prompt_tokens_calculated=prompt_tokens_calculated,
-                        completion_tokens_calculated=completion_tokens_calculated,
-                        latency=latency
-                    )
+            result = await self.scheduler.run(model, lambda: post_json(self.url, headers, payload))
+            latency = time.time() - start_time
+            
+            text = result["choices"][0]["message"]["content"]
+            usage = result.get("usage", {})
+            
+            # Calculate tokens using tokenize method
+            completion_tokens_calculated = await self.tokenize(text, model)
+            
+            return CompletionsResponse(
+                text=text,
+                prompt_tokens=usage.get("prompt_tokens"),
+                completion_tokens=usage.get("completion_tokens"),
+                total_tokens=usage.get("total_tokens"),
+                prompt_tokens_calculated=prompt_tokens_calculated,
+                completion_tokens_calculated=completion_tokens_calculated,
+                latency=latency
+            )
         except Exception as e:
             print(f"Error calling OpenRouter API: {e}")
             return None
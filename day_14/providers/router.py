@@ -0,0 +1,224 @@
+import asyncio
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import List, Optional, Dict, Any, Tuple, Type
+from .base import Provider
+from .completion_response import CompletionsResponse
+from .gigachat import GigachatProvider
+from .metrics import observe_completion
+from .mistral import MistralProvider
+from .ollama import OllamaProvider
+from .openrouter import OpenRouterProvider
+from .scheduler import retry_limit
+from .yandexcloud import YandexCloudProvider
+
+PROVIDERS: Dict[str, Type[Provider]] = {
+    "YandexCloud": YandexCloudProvider,
+    "Gigachat": GigachatProvider,
+    "OpenRouter": OpenRouterProvider,
+    "Mistral": MistralProvider,
+    "Ollama": OllamaProvider,
+}
+
+
+def _percentile(values: List[float], percent: float) -> float:
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(percent / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+@dataclass
+class RouteStats:
+    """Rolling latency and error statistics of one route"""
+    window: int = 50
+    latencies: deque = field(default_factory=deque)
+    outcomes: deque = field(default_factory=deque)
+    last_failure: float = 0.0
+
+    def record(self, latency: float, ok: bool):
+        self.outcomes.append(ok)
+        if len(self.outcomes) > self.window:
+            self.outcomes.popleft()
+        if ok:
+            self.latencies.append(latency)
+            if len(self.latencies) > self.window:
+                self.latencies.popleft()
+        else:
+            self.last_failure = time.time()
+
+    @property
+    def p50(self) -> Optional[float]:
+        return _percentile(list(self.latencies), 50) if self.latencies else None
+
+    @property
+    def p95(self) -> Optional[float]:
+        return _percentile(list(self.latencies), 95) if self.latencies else None
+
+    @property
+    def error_rate(self) -> float:
+        if not self.outcomes:
+            return 0.0
+        return 1 - sum(self.outcomes) / len(self.outcomes)
+
+
+@dataclass
+class Route:
+    """A provider and the model to use with it"""
+    provider: Provider
+    model: str
+    stats: RouteStats = field(default_factory=RouteStats)
+
+    @property
+    def name(self) -> str:
+        return f"{self.provider.name}:{self.model}"
+
+
+class RoutingProvider(Provider):
+    """Sends each request to the fastest healthy route.
+
+    Routes are ranked by rolling p50 latency; routes without samples are
+    tried first so every backend gets measured. A route whose error rate is
+    above `max_error_rate` is skipped for `cooldown` seconds after its last
+    failure. Failed requests fall back to the next route. With `hedge`, a
+    second request goes to the next route if the first has not answered by
+    its p95 latency, and the first answer wins.
+
+    A route that has another route to fall back to retries at most
+    `route_retries` times (no retries by default), so a failing backend
+    hands over quickly instead of spending its provider's full retry
+    budget; the last route keeps the provider's own budget.
+
+    The `model` argument of completions() is ignored, each route has its own.
+    """
+
+    def __init__(
+        self,
+        routes: List[Tuple[Provider, str]],
+        hedge: bool = False,
+        max_error_rate: float = 0.5,
+        cooldown: float = 30.0,
+        min_hedge_delay: float = 0.5,
+        window: int = 50,
+        route_retries: int = 0,
+    ):
+        super().__init__("Router")
+        if not routes:
+            raise ValueError("RoutingProvider needs at least one route")
+        self.routes = [Route(provider, model, RouteStats(window=window)) for provider, model in routes]
+        self.hedge = hedge
+        self.max_error_rate = max_error_rate
+        self.cooldown = cooldown
+        self.min_hedge_delay = min_hedge_delay
+        self.route_retries = route_retries
+
+    def _is_healthy(self, route: Route) -> bool:
+        if route.stats.error_rate <= self.max_error_rate:
+            return True
+        return time.time() - route.stats.last_failure > self.cooldown
+
+    def ranked_routes(self) -> List[Route]:
+        """Routes in the order they should be tried"""
+        def key(route: Route):
+            p50 = route.stats.p50
+            return (not self._is_healthy(route), p50 is not None, p50 or 0.0)
+        return sorted(self.routes, key=key)
+
+    async def _call(self, route: Route, messages: List[Dict[str, Any]], temperature: float,
+                    tools: Optional[List[Dict[str, Any]]], last: bool = False) -> Optional[CompletionsResponse]:
+        start_time = time.time()
+        token = retry_limit.set(None if last else self.route_retries)
+        try:
+            if tools is not None:
+                response = await route.provider.completions(messages, temperature, route.model, tools=tools)
+            else:
+                response = await route.provider.completions(messages, temperature, route.model)
+        except Exception as e:
+            print(f"Error calling route {route.name}: {e}")
+            response = None
+        finally:
+            retry_limit.reset(token)
+        latency = time.time() - start_time
+        route.stats.record(latency, response is not None)
+        observe_completion(route.provider.name, route.model, latency, response)
+        return response
+
+    async def _hedged_call(self, primary: Route, backup: Route, messages: List[Dict[str, Any]],
+                           temperature: float, tools: Optional[List[Dict[str, Any]]],
+                           last: bool = False) -> Optional[CompletionsResponse]:
+        delay = max(primary.stats.p95 or 0.0, self.min_hedge_delay)
+        first = asyncio.create_task(self._call(primary, messages, temperature, tools))
+        done, _ = await asyncio.wait({first}, timeout=delay)
+        if done and first.result() is not None:
+            return first.result()
+
+        print(f"Route {primary.name} is slow or failed, hedging with {backup.name}")
+        pending = {asyncio.create_task(self._call(backup, messages, temperature, tools, last))}
+        if not done:
+            pending.add(first)
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.result() is not None:
+                        return task.result()
+            return None
+        finally:
+            for task in pending:
+                task.cancel()
+
+    async def completions(self, messages: List[Dict[str, Any]], temperature: float, model: str = None,
+                          tools: Optional[List[Dict[str, Any]]] = None) -> Optional[CompletionsResponse]:
+        """Get completions from the best route, falling back to the others"""
+        ranked = self.ranked_routes()
+        index = 0
+        while index < len(ranked):
+            route = ranked[index]
+            if self.hedge and index + 1 < len(ranked) and route.stats.p95 is not None:
+                last = index + 2 >= len(ranked)
+                response = await self._hedged_call(route, ranked[index + 1], messages, temperature, tools, last)
+                index += 2
+            else:
+                last = index + 1 >= len(ranked)
+                response = await self._call(route, messages, temperature, tools, last)
+                index += 1
+            if response is not None:
+                return response
+        print("All routes failed")
+        return None
+
+    async def tokenize(self, text: str, model: str) -> Optional[int]:
+        """Get token count from the best route"""
+        route = self.ranked_routes()[0]
+        return await route.provider.tokenize(text, route.model)
+
+    def format_stats(self) -> str:
+        """Get a per-route latency and error summary"""
+        lines = []
+        for route in self.ranked_routes():
+            stats = route.stats
+            p50 = f"{stats.p50:.2f}s" if stats.p50 is not None else "-"
+            p95 = f"{stats.p95:.2f}s" if stats.p95 is not None else "-"
+            health = "" if self._is_healthy(route) else " (cooling down)"
+            lines.append(
+                f"{route.name}: p50 {p50}, p95 {p95}, errors {stats.error_rate:.0%} "
+                f"of {len(stats.outcomes)}{health}"
+            )
+        return "\n".join(lines)
+
+
+def create_router(spec: str, hedge: bool = False, route_retries: int = 0) -> RoutingProvider:
+    """Create a router from a spec like "YandexCloud:yandexgpt-lite/latest,Gigachat:GigaChat"."""
+    routes = []
+    instances: Dict[str, Provider] = {}
+    for item in spec.split(","):
+        item = item.strip()
+        if not item:
+            continue
+        name, _, model = item.partition(":")
+        if name not in PROVIDERS:
+            raise ValueError(f"Unknown provider {name}, available: {', '.join(PROVIDERS)}")
+        if name not in instances:
+            instances[name] = PROVIDERS[name]()
+        routes.append((instances[name], model))
+    return RoutingProvider(routes, hedge=hedge, route_retries=route_retries)
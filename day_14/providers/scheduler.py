@@ -0,0 +1,178 @@
+import asyncio
+import contextvars
+import os
+import random
+import time
+from email.utils import parsedate_to_datetime
+from typing import Any, Dict, Optional, Callable, Awaitable, TypeVar
+import aiohttp
+from .metrics import LLM_QUEUE_DEPTH, LLM_IN_FLIGHT, LLM_RETRIES
+
+T = TypeVar("T")
+
+# HTTP statuses worth retrying: rate limited, or a transient server error
+RETRY_STATUSES = {408, 429, 500, 502, 503, 504}
+
+# Caps the retries of requests made in the current context, e.g. by a router
+# that would rather fall back to another backend than keep retrying this one
+retry_limit: contextvars.ContextVar[Optional[int]] = contextvars.ContextVar("retry_limit", default=None)
+
+
+class TokenBucket:
+    """Token bucket allowing `rate` requests per second with bursts up to `capacity`"""
+
+    def __init__(self, rate: float, capacity: int):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = float(capacity)
+        self.updated_at = time.monotonic()
+        self.blocked_until = 0.0
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        """Wait until a request may be sent"""
+        # The lock keeps waiters in arrival order
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                if now < self.blocked_until:
+                    await asyncio.sleep(self.blocked_until - now)
+                    continue
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+                self.updated_at = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+    def block(self, delay: float):
+        """Hold all requests back, e.g. after a 429 with Retry-After"""
+        self.blocked_until = max(self.blocked_until, time.monotonic() + delay)
+        self.tokens = 0
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Parse a Retry-After header given in seconds or as an HTTP date"""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+class RequestScheduler:
+    """Queues, rate limits and retries requests to one provider.
+
+    Every model gets its own token bucket, while the semaphore caps the
+    requests in flight to the provider. Rate limited (429), transient
+    server errors and connection failures are retried with exponential
+    backoff and full jitter; a Retry-After header overrides the backoff.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        rate: float = 5.0,
+        burst: int = 5,
+        max_concurrency: int = 8,
+        max_retries: int = 4,
+        base_delay: float = 0.5,
+        max_delay: float = 30.0,
+    ):
+        self.name = name
+        self.rate = rate
+        self.burst = burst
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._buckets: Dict[str, TokenBucket] = {}
+
+    def _bucket(self, key: str) -> TokenBucket:
+        if key not in self._buckets:
+            self._buckets[key] = TokenBucket(self.rate, self.burst)
+        return self._buckets[key]
+
+    def _backoff(self, attempt: int) -> float:
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+
+    async def run(self, key: str, request: Callable[[], Awaitable[T]]) -> T:
+        """Run request() for the given model, retrying transient failures.
+
+        The last error is re-raised once retries are exhausted; `retry_limit`
+        lowers the number of retries for the current context.
+        """
+        bucket = self._bucket(key)
+        limit = retry_limit.get()
+        max_retries = self.max_retries if limit is None else min(limit, self.max_retries)
+        attempt = 0
+        while True:
+            try:
+                LLM_QUEUE_DEPTH.labels(provider=self.name).inc()
+                try:
+                    await bucket.acquire()
+                    await self._semaphore.acquire()
+                finally:
+                    LLM_QUEUE_DEPTH.labels(provider=self.name).dec()
+                LLM_IN_FLIGHT.labels(provider=self.name).inc()
+                try:
+                    return await request()
+                finally:
+                    LLM_IN_FLIGHT.labels(provider=self.name).dec()
+                    self._semaphore.release()
+            except aiohttp.ClientResponseError as e:
+                if e.status not in RETRY_STATUSES or attempt >= max_retries:
+                    raise
+                retry_after = parse_retry_after(e.headers.get("Retry-After") if e.headers else None)
+                delay = min(self.max_delay, retry_after) if retry_after is not None else self._backoff(attempt)
+                if e.status == 429:
+                    bucket.block(delay)
+                LLM_RETRIES.labels(provider=self.name, reason=str(e.status)).inc()
+                print(f"{self.name} API returned {e.status}, retrying in {delay:.1f}s")
+            except (aiohttp.ClientConnectionError, asyncio.TimeoutError) as e:
+                if attempt >= max_retries:
+                    raise
+                delay = self._backoff(attempt)
+                LLM_RETRIES.labels(provider=self.name, reason="connection").inc()
+                print(f"{self.name} API connection failed ({e!r}), retrying in {delay:.1f}s")
+            attempt += 1
+            await asyncio.sleep(delay)
+
+
+_schedulers: Dict[str, RequestScheduler] = {}
+
+
+def get_scheduler(name: str) -> RequestScheduler:
+    """Get the scheduler shared by all instances of a provider.
+
+    Limits are configured with <NAME>_RATE_LIMIT (requests per second per
+    model), <NAME>_BURST, <NAME>_MAX_CONCURRENCY and <NAME>_MAX_RETRIES.
+    """
+    if name not in _schedulers:
+        prefix = name.upper()
+        _schedulers[name] = RequestScheduler(
+            name,
+            rate=float(os.getenv(f"{prefix}_RATE_LIMIT", "5")),
+            burst=int(os.getenv(f"{prefix}_BURST", "5")),
+            max_concurrency=int(os.getenv(f"{prefix}_MAX_CONCURRENCY", "8")),
+            max_retries=int(os.getenv(f"{prefix}_MAX_RETRIES", "4")),
+        )
+    return _schedulers[name]
+
+
+async def post_json(
+    url: str,
+    headers: Dict[str, str],
+    payload: Any,
+    connector: Optional[aiohttp.BaseConnector] = None,
+) -> Any:
+    """POST a JSON payload and return the JSON response, raising on HTTP errors"""
+    async with aiohttp.ClientSession(connector=connector) as session:
+        async with session.post(url, headers=headers, json=payload) as response:
+            response.raise_for_status()
+            return await response.json()
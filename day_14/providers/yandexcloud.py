@@ -1,6 +1,5 @@
 import json
 from typing import Optional, List, Dict, Any
-import aiohttp
 import os
 import time
 import sys
@@ -8,6 +7,7 @@ from mcp import ClientSession
 from mcp.client.stdio import stdio_client, StdioServerParameters
 from .base import Provider
 from .completion_response import CompletionsResponse
+from .scheduler import post_json
 
 
 class YandexCloudProvider(Provider):
@@ -15,7 +15,8 @@ class YandexCloudProvider(Provider):
     
     def __init__(self):
         super().__init__("YandexCloud")
-        self.url = "https://llm.api.cloud.yandex.net/foundationModels/v1/completion"
+        self.base_url = os.getenv("YANDEXCLOUD_BASE_URL", "https://llm.api.cloud.yandex.net")
+        self.url = f"{self.base_url}/foundationModels/v1/completion"
         self.folder_id = os.getenv("YANDEXCLOUD_FOLDER_ID", "")
     
     async def completions(self, messages: List[Dict[str, Any]], temperature: float, model: str, tools: Optional[List[Dict[str, Any]]] = None) -> Optional[CompletionsResponse]:
@@ -62,53 +63,50 @@ class YandexCloudProvider(Provider):
 
         start_time = time.time()
         try:
-            async with aiohttp.ClientSession() as session:
-                async with session.post(self.url, headers=headers, json=payload) as response:
-                    response.raise_for_status()
-                    result = await response.json()
-                    latency = time.time() - start_time
-                    
-                    print(f"RESULT: {json.dumps(result)}")
+            result = await self.scheduler.run(model, lambda: post_json(self.url, headers, payload))
+            latency = time.time() - start_time
+            
+            print(f"RESULT: {json.dumps(result)}")
 
-                    # Check if the response contains tool calls
-                    alternative = result["result"]["alternatives"][0]
-                    message = alternative["message"]
-                    usage = result["result"].get("usage", {})
+            # Check if the response contains tool calls
+            alternative = result["result"]["alternatives"][0]
+            message = alternative["message"]
+            usage = result["result"].get("usage", {})
+            
+            # If this is a tool call, we need to handle it
+            if "toolCallList" in message:
+                # Extract tool calls
+                tool_calls = message["toolCallList"]["toolCalls"]
+                
+                # Call the actual MCP tools
+                tool_results = []
+                for tool_call in tool_calls:
+                    function_call = tool_call["functionCall"]
+                    tool_name = function_call["name"]
+                    arguments = function_call["arguments"]
                     
-                    # If this is a tool call, we need to handle it
-                    if "toolCallList" in message:
-                        # Extract tool calls
-                        tool_calls = message["toolCallList"]["toolCalls"]
-                        
-                        # Call the actual MCP tools
-                        tool_results = []
-                        for tool_call in tool_calls:
-                            function_call = tool_call["functionCall"]
-                            tool_name = function_call["name"]
-                            arguments = function_call["arguments"]
-                            
-                            # Call the MCP tool
-                            tool_result = await self._call_mcp_tool(tool_name, arguments)
-                            tool_results.append({
-                                "functionResult": {
-                                    "name": tool_name,
-                                    "content": tool_result
-                                }
-                            })
-                        
-                        # Make another API call with tool results
-                        final_response = await self._call_with_tool_results(yandex_messages, tool_results, temperature, model)
-                        return final_response
-                    else:
-                        # Regular text response
-                        text = message["text"]
-                        return CompletionsResponse(
-                            text=text,
-                            prompt_tokens=usage.get("inputTextTokens"),
-                            completion_tokens=usage.get("completionTokens"),
-                            total_tokens=usage.get("totalTokens"),
-                            latency=latency
-                        )
+                    # Call the MCP tool
+                    tool_result = await self._call_mcp_tool(tool_name, arguments)
+                    tool_results.append({
+                        "functionResult": {
+                            "name": tool_name,
+                            "content": tool_result
+                        }
+                    })
+                
+                # Make another API call with tool results
+                final_response = await self._call_with_tool_results(yandex_messages, tool_results, temperature, model)
+                return final_response
+            else:
+                # Regular text response
+                text = message["text"]
+                return CompletionsResponse(
+                    text=text,
+                    prompt_tokens=usage.get("inputTextTokens"),
+                    completion_tokens=usage.get("completionTokens"),
+                    total_tokens=usage.get("totalTokens"),
+                    latency=latency
+                )
         except Exception as e:
             print(f"Error calling YandexCloud API: {e}")
             return None
@@ -174,28 +172,25 @@ class YandexCloudProvider(Provider):
         
         start_time = time.time()
         try:
-            async with aiohttp.ClientSession() as session:
-                async with session.post(self.url, headers=headers, json=payload) as response:
-                    response.raise_for_status()
-                    result = await response.json()
-                    latency = time.time() - start_time
-                    
-                    print(f"RESULT with tool results: {json.dumps(result)}")
-                    
-                    # Extract the final response
-                    alternative = result["result"]["alternatives"][0]
-                    message = alternative["message"]
-                    usage = result["result"].get("usage", {})
-                    
-                    # Return the final text response
-                    text = message["text"]
-                    return CompletionsResponse(
-                        text=text,
-                        prompt_tokens=usage.get("inputTextTokens"),
-                        completion_tokens=usage.get("completionTokens"),
-                        total_tokens=usage.get("totalTokens"),
-                        latency=latency
-                    )
+            result = await self.scheduler.run(model, lambda: post_json(self.url, headers, payload))
+            latency = time.time() - start_time
+            
+            print(f"RESULT with tool results: {json.dumps(result)}")
+            
+            # Extract the final response
+            alternative = result["result"]["alternatives"][0]
+            message = alternative["message"]
+            usage = result["result"].get("usage", {})
+            
+            # Return the final text response
+            text = message["text"]
+            return CompletionsResponse(
+                text=text,
+                prompt_tokens=usage.get("inputTextTokens"),
+                completion_tokens=usage.get("completionTokens"),
+                total_tokens=usage.get("totalTokens"),
+                latency=latency
+            )
         except Exception as e:
             print(f"Error calling YandexCloud API with tool results: {e}")
             return None
@@ -208,7 +203,7 @@ class YandexCloudProvider(Provider):
             model = os.getenv("YANDEXCLOUD_MODEL", "yandexgpt-lite/latest")
         api_key = os.getenv("YANDEXCLOUD_API_KEY", "")
          
-        url = "https://llm.api.cloud.yandex.net/foundationModels/v1/tokenizeCompletion"
+        url = f"{self.base_url}/foundationModels/v1/tokenizeCompletion"
 
         headers = {
             "Content-Type": "application/json",
@@ -226,10 +221,9 @@ class YandexCloudProvider(Provider):
         }
 
         try:
-            async with aiohttp.ClientSession() as session:
-                async with session.post(url, headers=headers, json=payload) as response:
-                    response.raise_for_status()
-                    return await response.json()
+            result = await self.scheduler.run(model, lambda: post_json(url, headers, payload))
+            # The response lists the tokens of the text
+            return len(result.get("tokens", []))
         except Exception as e:
             print(f"Error getting token count from YandexCloud API: {e}")
             return None
\ No newline at end of file
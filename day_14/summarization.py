@@ -0,0 +1,193 @@
+import asyncio
+import math
+import re
+from typing import List, Optional
+from providers.base import Provider
+
+# Conservative characters-per-token ratio for mixed Russian/English text
+CHARS_PER_TOKEN = 3
+
+MAP_PROMPT = """Вы обрабатываете часть {index} из {total} длинного текста, взятого с URL: {url}
+
+Кратко изложите на русском языке основные идеи, ключевые факты и цифры этой части. Не добавляйте вступлений и выводов.
+
+Часть текста:
+{chunk}
+
+Краткое изложение части:"""
+
+REDUCE_PROMPT = """Ниже приведены краткие изложения последовательных частей одного текста, взятого с URL: {url}
+
+Объедините их в единое краткое и информативное содержание на русском языке.
+
+Требования к краткому содержанию:
+- Пишите на русском языке
+- Выделите основные идеи и ключевые моменты
+- Сохраняйте важные факты и цифры
+- Используйте четкую и лаконичную структуру
+- Длина краткого содержания должна быть 3-5 абзацев
+
+Изложения частей:
+{summaries}
+
+Краткое содержание:"""
+
+SINGLE_PROMPT = """Вы должны создать краткое и информативное содержание следующего текста на русском языке.
+
+Текст взят с URL: {url}
+
+Требования к краткому содержанию:
+- Пишите на русском языке
+- Выделите основные идеи и ключевые моменты
+- Сохраняйте важные факты и цифры
+- Используйте четкую и лаконичную структуру
+- Длина краткого содержания должна быть 3-5 абзацев
+
+Текст:
+{content}
+
+Краткое содержание:"""
+
+# Appended to a summary when some chunks could not be summarized
+PARTIAL_NOTE = "\n\n_Краткое содержание неполное: обработано {covered} из {total} частей текста._"
+
+
+def estimate_tokens(text: str) -> int:
+    """Estimate the token count without a tokenizer round-trip"""
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+
+def split_into_chunks(text: str, max_tokens: int) -> List[str]:
+    """Split text into chunks of at most max_tokens, on paragraph and sentence boundaries"""
+    max_chars = max_tokens * CHARS_PER_TOKEN
+    pieces = []
+    for paragraph in re.split(r"\n\s*\n", text):
+        paragraph = paragraph.strip()
+        if not paragraph:
+            continue
+        if len(paragraph) <= max_chars:
+            pieces.append(paragraph)
+            continue
+        for sentence in re.split(r"(?<=[.!?…])\s+", paragraph):
+            # Hard split sentences that are still too long
+            for start in range(0, len(sentence), max_chars):
+                pieces.append(sentence[start:start + max_chars])
+
+    chunks = []
+    current = ""
+    for piece in pieces:
+        candidate = f"{current}\n\n{piece}" if current else piece
+        if len(candidate) > max_chars and current:
+            chunks.append(current)
+            current = piece
+        else:
+            current = candidate
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+class MapReduceSummarizer:
+    """Summarizes long texts by summarizing chunks concurrently and merging the results.
+
+    Failed requests are retried `retries` times. If some chunks still fail,
+    the summary covers the rest and ends with a note saying how many chunks
+    it covers; a failed intermediate merge keeps its inputs unmerged.
+    """
+
+    def __init__(
+        self,
+        provider: Provider,
+        model: str,
+        temperature: float = 0.7,
+        chunk_tokens: int = 2000,
+        max_parallel: int = 4,
+        retries: int = 1,
+    ):
+        self.provider = provider
+        self.model = model
+        self.temperature = temperature
+        self.chunk_tokens = chunk_tokens
+        self.retries = retries
+        self._semaphore = asyncio.Semaphore(max_parallel)
+
+    async def summarize(self, text: str, url: str) -> Optional[str]:
+        """Summarize text of any length"""
+        chunks = split_into_chunks(text, self.chunk_tokens)
+        if not chunks:
+            return None
+        if len(chunks) == 1:
+            return await self._complete(SINGLE_PROMPT.format(url=url, content=chunks[0]))
+
+        partials = await asyncio.gather(
+            *(
+                self._complete(
+                    MAP_PROMPT.format(index=i + 1, total=len(chunks), url=url, chunk=chunk)
+                )
+                for i, chunk in enumerate(chunks)
+            )
+        )
+        covered = [p for p in partials if p]
+        if not covered:
+            return None
+        summary = await self._reduce(covered, url)
+        if summary and len(covered) < len(chunks):
+            print(f"Summarized {len(covered)} of {len(chunks)} chunks of {url}")
+            summary += PARTIAL_NOTE.format(covered=len(covered), total=len(chunks))
+        return summary
+
+    async def _reduce(self, summaries: List[str], url: str) -> Optional[str]:
+        if not summaries:
+            return None
+        groups = self._group(summaries)
+        if len(groups) == 1:
+            return await self._complete(
+                REDUCE_PROMPT.format(url=url, summaries="\n\n".join(groups[0]))
+            )
+
+        # Too many partial summaries for one prompt, reduce them level by level
+        merged = await asyncio.gather(
+            *(
+                self._complete(REDUCE_PROMPT.format(url=url, summaries="\n\n".join(group)))
+                for group in groups
+            )
+        )
+        # A group whose merge failed is passed on unmerged, so no chunk is lost
+        merged = [m or "\n\n".join(group) for m, group in zip(merged, groups)]
+        if len(merged) >= len(summaries):
+            return "\n\n".join(merged)
+        return await self._reduce(merged, url)
+
+    def _group(self, summaries: List[str]) -> List[List[str]]:
+        groups = [[]]
+        size = 0
+        for summary in summaries:
+            tokens = estimate_tokens(summary)
+            if groups[-1] and size + tokens > self.chunk_tokens:
+                groups.append([])
+                size = 0
+            groups[-1].append(summary)
+            size += tokens
+        return groups
+
+    async def _complete(self, prompt: str) -> Optional[str]:
+        for _ in range(self.retries + 1):
+            text = await self._complete_once(prompt)
+            if text:
+                return text
+        return None
+
+    async def _complete_once(self, prompt: str) -> Optional[str]:
+        async with self._semaphore:
+            try:
+                response = await self.provider.completions(
+                    messages=[{"role": "user", "content": prompt}],
+                    model=self.model,
+                    temperature=self.temperature,
+                )
+            except Exception as e:
+                print(f"Error summarizing chunk: {e}")
+                return None
+        if response and response.text:
+            return response.text
+        return None
@@ -0,0 +1,230 @@
+import argparse
+import asyncio
+import functools
+import json
+import os
+import statistics
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import List, Optional, Dict, Any, Callable
+from providers.base import Provider
+from providers.completion_response import CompletionsResponse
+
+BAR_WIDTH = 30
+
+
+@dataclass
+class Span:
+    """One timed operation of a trace"""
+    name: str
+    trace_id: str
+    span_id: str
+    parent_id: Optional[str]
+    start: float
+    duration: Optional[float] = None
+    attributes: Dict[str, Any] = field(default_factory=dict)
+    error: Optional[str] = None
+    children: List["Span"] = field(default_factory=list)
+
+    def set(self, **attributes):
+        self.attributes.update(attributes)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "name": self.name,
+            "start": self.start,
+            "duration": self.duration,
+            "attributes": self.attributes,
+            "error": self.error,
+        }
+
+
+_current_span: ContextVar[Optional[Span]] = ContextVar("current_span", default=None)
+
+
+class Tracer:
+    """Records nested spans and exports each finished trace.
+
+    The current span lives in a ContextVar, so it follows awaits, tasks and
+    asyncio.to_thread calls. When a root span ends, all spans of its trace are
+    appended to a JSONL file (one span per line) and optionally printed as a
+    flame-style timeline. Spans opened with `root=False` are only recorded
+    inside an existing trace, so instrumented helpers called outside a chat
+    turn do not produce one-span traces.
+    """
+
+    def __init__(self, path: Optional[str] = "traces.jsonl", enabled: bool = True, print_summary: bool = True):
+        self.path = path
+        self.enabled = enabled
+        self.print_summary = print_summary
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def span(self, name: str, root: bool = True, **attributes):
+        parent = _current_span.get() if self.enabled else None
+        if not self.enabled or (parent is None and not root):
+            yield None
+            return
+
+        span = Span(
+            name=name,
+            trace_id=parent.trace_id if parent else uuid.uuid4().hex,
+            span_id=uuid.uuid4().hex[:16],
+            parent_id=parent.span_id if parent else None,
+            start=time.time(),
+            attributes=attributes,
+        )
+        if parent:
+            parent.children.append(span)
+        token = _current_span.set(span)
+        start_time = time.perf_counter()
+        try:
+            yield span
+        except BaseException as e:
+            span.error = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            span.duration = time.perf_counter() - start_time
+            _current_span.reset(token)
+            if parent is None:
+                self._export(span)
+
+    def _export(self, root: Span):
+        if self.path:
+            try:
+                with self._lock, open(self.path, "a", encoding="utf-8") as f:
+                    for span in _walk(root):
+                        f.write(json.dumps(span.to_dict(), ensure_ascii=False, default=str) + "\n")
+            except Exception as e:
+                print(f"Error exporting trace: {e}")
+        if self.print_summary:
+            print(format_flame(root))
+
+
+def _walk(span: Span):
+    yield span
+    for child in sorted(span.children, key=lambda s: s.start):
+        yield from _walk(child)
+
+
+tracer = Tracer(
+    path=os.getenv("TRACE_FILE", "traces.jsonl"),
+    enabled=os.getenv("TRACING", "0") == "1",
+    print_summary=os.getenv("TRACE_SUMMARY", "0") == "1",
+)
+
+
+def span(name: str, root: bool = True, **attributes):
+    """Context manager timing a block as a child of the current span"""
+    return tracer.span(name, root=root, **attributes)
+
+
+def current_span() -> Optional[Span]:
+    return _current_span.get()
+
+
+def traced(name: Optional[str] = None):
+    """Decorator wrapping a sync or async function in a span of the current trace"""
+    def decorator(func: Callable):
+        span_name = name or func.__qualname__
+
+        if asyncio.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                with tracer.span(span_name, root=False):
+                    return await func(*args, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with tracer.span(span_name, root=False):
+                return func(*args, **kwargs)
+        return wrapper
+
+    return decorator
+
+
+class TracedProvider(Provider):
+    """Wraps a provider so every completion is recorded as a span"""
+
+    def __init__(self, provider: Provider):
+        super().__init__(provider.name)
+        self.provider = provider
+
+    async def completions(self, messages: List[Dict[str, Any]], temperature: float, model: str,
+                          tools: Optional[List[Dict[str, Any]]] = None) -> Optional[CompletionsResponse]:
+        with tracer.span("provider.completions", root=False, provider=self.provider.name, model=model,
+                         messages=len(messages)) as current:
+            if tools is not None:
+                response = await self.provider.completions(messages, temperature, model, tools=tools)
+            else:
+                response = await self.provider.completions(messages, temperature, model)
+            if current is not None and response is not None:
+                current.set(
+                    prompt_tokens=response.prompt_tokens or response.prompt_tokens_calculated,
+                    completion_tokens=response.completion_tokens or response.completion_tokens_calculated,
+                )
+            return response
+
+    async def tokenize(self, text: str, model: str) -> Optional[int]:
+        with tracer.span("provider.tokenize", root=False, provider=self.provider.name, model=model):
+            return await self.provider.tokenize(text, model)
+
+
+def format_flame(root: Span) -> str:
+    """Format a trace as an indented timeline with bars placed by start time"""
+    total = root.duration or 0.0
+    lines = [f"Trace {root.trace_id[:8]} {root.name} {total * 1000:.0f}ms"]
+
+    def add(span: Span, depth: int):
+        duration = span.duration or 0.0
+        offset = int((span.start - root.start) / total * BAR_WIDTH) if total else 0
+        width = max(1, int(duration / total * BAR_WIDTH)) if total else 1
+        offset = min(offset, BAR_WIDTH - 1)
+        width = min(width, BAR_WIDTH - offset)
+        bar = " " * offset + "█" * width + " " * (BAR_WIDTH - offset - width)
+        label = "  " * depth + span.name
+        error = f"  ! {span.error}" if span.error else ""
+        lines.append(f"{label[:40]:<40} |{bar}| {duration * 1000:7.0f}ms{error}")
+        for child in sorted(span.children, key=lambda s: s.start):
+            add(child, depth + 1)
+
+    add(root, 0)
+    return "\n".join(lines)
+
+
+def summarize_file(path: str) -> str:
+    """Aggregate span durations of a JSONL trace file by span name"""
+    durations: Dict[str, List[float]] = {}
+    roots = 0
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            span = json.loads(line)
+            if span["duration"] is None:
+                continue
+            durations.setdefault(span["name"], []).append(span["duration"])
+            roots += span["parent_id"] is None
+
+    lines = [f"Traces: {roots}", f"{'span':<40} {'count':>6} {'mean':>9} {'p95':>9} {'total':>9}"]
+    for name, values in sorted(durations.items(), key=lambda item: -sum(item[1])):
+        ordered = sorted(values)
+        p95 = ordered[min(len(ordered) - 1, int(round(0.95 * (len(ordered) - 1))))]
+        lines.append(
+            f"{name[:40]:<40} {len(values):>6} {statistics.mean(values) * 1000:>7.0f}ms "
+            f"{p95 * 1000:>7.0f}ms {sum(values):>8.1f}s"
+        )
+    return "\n".join(lines)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Summarize a JSONL trace file")
+    parser.add_argument("path", nargs="?", default="traces.jsonl")
+    args = parser.parse_args()
+    print(summarize_file(args.path))
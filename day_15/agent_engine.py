@@ -0,0 +1,162 @@
+import asyncio
+import json
+import sys
+import time
+from dataclasses import dataclass, field
+from typing import List, Dict, Any, Optional, Tuple
+from mcp import ClientSession
+from mcp.shared.session import ProgressFnT
+
+# Tools whose effects later calls in the same turn may depend on
+BARRIER_TOOLS = {"execute_shell"}
+
+
+async def print_progress(progress: float, total: Optional[float], message: Optional[str]):
+    """Print output a tool streams while it runs, e.g. a shell command's stdout"""
+    if message:
+        print(message, end="", file=sys.stderr, flush=True)
+
+
+@dataclass
+class ToolCall:
+    """A single tool call requested by the model"""
+    name: str
+    arguments: Dict[str, Any]
+    id: str = ""
+
+
+@dataclass
+class ToolCallResult:
+    """Output of an executed tool call"""
+    call: ToolCall
+    output: str
+    latency: float
+    error: bool = False
+
+
+@dataclass
+class ToolStats:
+    """Aggregated latency of one tool"""
+    calls: int = 0
+    errors: int = 0
+    latencies: List[float] = field(default_factory=list)
+
+    @property
+    def average(self) -> float:
+        return sum(self.latencies) / len(self.latencies) if self.latencies else 0.0
+
+
+class AgentEngine:
+    """Executes model tool calls against an MCP session.
+
+    Calls from one model turn are split into batches of independent calls,
+    which run concurrently (at most `max_concurrency` at a time). A shell
+    command is a barrier: it waits for everything before it and runs before
+    everything after it. Calls touching the same file keep their order.
+    Progress notifications of running tools go to `on_progress`, which
+    prints them by default.
+    """
+
+    def __init__(
+        self,
+        session: ClientSession,
+        max_concurrency: int = 4,
+        max_iterations: int = 10,
+        on_progress: Optional[ProgressFnT] = print_progress,
+    ):
+        self.session = session
+        self.on_progress = on_progress
+        self.max_concurrency = max_concurrency
+        self.max_iterations = max_iterations
+        self.stats: Dict[str, ToolStats] = {}
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+
+    async def execute(self, tool_calls: List[ToolCall]) -> List[ToolCallResult]:
+        """Execute tool calls and return results in the original order"""
+        results: List[ToolCallResult] = []
+        for batch in self._split_batches(tool_calls):
+            results.extend(await asyncio.gather(*(self._call(c) for c in batch)))
+        return results
+
+    async def run_calls(self, calls: List[Tuple[str, Any]]) -> List[str]:
+        """Execute (name, arguments) pairs and return the text outputs.
+
+        Used as the provider tool executor.
+        """
+        tool_calls = [
+            ToolCall(name=name, arguments=self.parse_arguments(arguments))
+            for name, arguments in calls
+        ]
+        return [result.output for result in await self.execute(tool_calls)]
+
+    @staticmethod
+    def parse_arguments(arguments: Any) -> Dict[str, Any]:
+        if isinstance(arguments, str):
+            try:
+                return json.loads(arguments) if arguments else {}
+            except json.JSONDecodeError:
+                return {}
+        return arguments or {}
+
+    def format_stats(self) -> str:
+        """Get a per-tool latency summary"""
+        lines = []
+        for name, stats in sorted(self.stats.items()):
+            lines.append(
+                f"{name}: {stats.calls} calls, {stats.errors} errors, "
+                f"avg {stats.average:.2f}s, max {max(stats.latencies, default=0):.2f}s"
+            )
+        return "\n".join(lines)
+
+    def _split_batches(self, tool_calls: List[ToolCall]) -> List[List[ToolCall]]:
+        batches: List[List[ToolCall]] = []
+        current: List[ToolCall] = []
+        touched = set()
+
+        for call in tool_calls:
+            target = call.arguments.get("filename") or call.arguments.get("path")
+            barrier = call.name in BARRIER_TOOLS
+            previous_barrier = bool(current) and current[-1].name in BARRIER_TOOLS
+            if current and (barrier or previous_barrier or (target and target in touched)):
+                batches.append(current)
+                current = []
+                touched = set()
+            current.append(call)
+            if target:
+                touched.add(target)
+
+        if current:
+            batches.append(current)
+        return batches
+
+    async def _call(self, call: ToolCall) -> ToolCallResult:
+        async with self._semaphore:
+            print(f"\n[Tool Call: {call.name}]", file=sys.stderr)
+            start_time = time.time()
+            error = False
+            try:
+                result = await self.session.call_tool(
+                    call.name, call.arguments, progress_callback=self.on_progress
+                )
+                # Tool failures come back as a result flagged isError, not as an exception
+                error = bool(getattr(result, "isError", False))
+                output = ""
+                if result.content:
+                    first_content = result.content[0]
+                    if isinstance(first_content, dict):
+                        output = first_content.get("text", "")
+                    else:
+                        output = getattr(first_content, "text", "")
+            except Exception as e:
+                error = True
+                output = f"Error: {str(e)}"
+            latency = time.time() - start_time
+
+        stats = self.stats.setdefault(call.name, ToolStats())
+        stats.calls += 1
+        stats.errors += int(error)
+        stats.latencies.append(latency)
+
+        label = "Tool Error" if error else "Result"
+        print(f"[{label} {call.name} {latency:.2f}s] {output}", file=sys.stderr)
+        return ToolCallResult(call=call, output=output, latency=latency, error=error)
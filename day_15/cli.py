@@ -5,7 +5,6 @@ Connects to AI providers and uses MCP tools for file operations and shell execut
 """
 
 import asyncio
-import json
 import sys
 import os
 from pathlib import Path
@@ -23,6 +22,8 @@ from providers.yandexcloud import YandexCloudProvider
 from providers.ollama import OllamaProvider
 from mcp import ClientSession
 from mcp.client.stdio import stdio_client, StdioServerParameters
+from tool_registry import ToolRegistry
+from agent_engine import AgentEngine, ToolCall
 
 load_dotenv()
 
@@ -33,79 +34,8 @@ class AIAssistCLI:
         self.session: Optional[ClientSession] = None
         self.server_process = None
 
-        self.mcp_tools = [
-            {
-                "type": "function",
-                "function": {
-                    "name": "write_file",
-                    "description": "Write content to a file. Creates the file and any missing parent directories if they don't exist. Examples: 'quick_sort.py', 'utils/helper.py', 'api/server/main.py'.",
-                    "parameters": {
-                        "type": "object",
-                        "properties": {
-                            "filename": {
-                                "type": "string",
-                                "description": "Filename - can include subdirectories like 'subdir/nested/file.py'",
-                            },
-                            "content": {
-                                "type": "string",
-                                "description": "File content to write",
-                            },
-                        },
-                        "required": ["filename", "content"],
-                    },
-                },
-            },
-            {
-                "type": "function",
-                "function": {
-                    "name": "execute_shell",
-                    "description": "Execute a shell command. Use for testing, running scripts, listing files, etc.",
-                    "parameters": {
-                        "type": "object",
-                        "properties": {
-                            "command": {
-                                "type": "string",
-                                "description": "Shell command to execute",
-                            }
-                        },
-                        "required": ["command"],
-                    },
-                },
-            },
-            {
-                "type": "function",
-                "function": {
-                    "name": "read_file",
-                    "description": "Read content from a file. Supports files in subdirectories.",
-                    "parameters": {
-                        "type": "object",
-                        "properties": {
-                            "filename": {
-                                "type": "string",
-                                "description": "Filename - can include subdirectories like 'utils/helper.py'",
-                            }
-                        },
-                        "required": ["filename"],
-                    },
-                },
-            },
-            {
-                "type": "function",
-                "function": {
-                    "name": "list_files",
-                    "description": "List files. Optionally list files in a specific subdirectory.",
-                    "parameters": {
-                        "type": "object",
-                        "properties": {
-                            "path": {
-                                "type": "string",
-                                "description": "Optional subdirectory path (e.g., 'utils' or 'api/server')",
-                            }
-                        },
-                    },
-                },
-            },
-        ]
+        self.tool_registry = ToolRegistry()
+        self.engine: Optional[AgentEngine] = None
 
     async def start_mcp_server(self):
         """Start the MCP server as a subprocess"""
@@ -118,9 +48,20 @@ class AIAssistCLI:
         )
 
         async with stdio_client(server_params) as (read_stream, write_stream):
-            async with ClientSession(read_stream, write_stream) as session:
+            async with ClientSession(
+                read_stream,
+                write_stream,
+                message_handler=self.tool_registry.handle_message,
+            ) as session:
                 self.session = session
                 await session.initialize()
+                self.tool_registry.bind(session)
+                await self.tool_registry.refresh()
+                self.engine = AgentEngine(
+                    session,
+                    max_concurrency=int(os.getenv("MCP_TOOL_CONCURRENCY", "4")),
+                    max_iterations=int(os.getenv("MCP_MAX_TOOL_ITERATIONS", "10")),
+                )
                 print("MCP Server connected. Ready to assist!", file=sys.stderr)
                 await self.chat_loop()
 
@@ -167,6 +108,8 @@ For shell operations:
                 continue
 
             if user_input.lower() in ["quit", "exit", "q"]:
+                if self.engine and self.engine.stats:
+                    print(f"\nTool latency:\n{self.engine.format_stats()}\n")
                 print("Goodbye!")
                 break
 
@@ -184,7 +127,7 @@ For shell operations:
                     messages=messages,
                     temperature=0.1,
                     model=model,
-                    tools=self.mcp_tools,
+                    tools=self.tool_registry.schemas_for(self.provider_name),
                 )
 
                 # logger.info(f"[MODEL OUTPUT] response received")
@@ -224,87 +167,20 @@ For shell operations:
     async def handle_tool_calls(
         self, tool_calls: List[Any], messages: List[Dict[str, Any]]
     ):
-        """Handle MCP tool calls from the AI"""
-        tool_results = []
-
-        for tool_call in tool_calls:
-            # Handle both dict and object formats
-            if isinstance(tool_call, dict):
-                tool_name = tool_call.get("function", {}).get("name", "")
-                arguments_str = tool_call.get("function", {}).get("arguments", "{}")
-            else:
-                func_obj = getattr(tool_call, "function", None)
-                if func_obj is None:
-                    tool_name = ""
-                    arguments_str = "{}"
-                elif isinstance(func_obj, dict):
-                    tool_name = func_obj.get("name", "")
-                    arguments_str = func_obj.get("arguments", "{}")
-                else:
-                    tool_name = getattr(func_obj, "name", "")
-                    arguments_str = getattr(func_obj, "arguments", "{}")
-
-            try:
-                arguments = (
-                    json.loads(arguments_str)
-                    if isinstance(arguments_str, str)
-                    else arguments_str
-                )
-            except json.JSONDecodeError:
-                arguments = {}
-
-            print(f"\n[Tool Call: {tool_name}]", file=sys.stderr)
-            # logger.info(f"[TOOL CALL] name={tool_name}, arguments={json.dumps(arguments, indent=2)}")
-
-            try:
-                if self.session:
-                    result = await self.session.call_tool(tool_name, arguments)
-                    if result.content:
-                        first_content = result.content[0]
-                        if isinstance(first_content, dict):
-                            tool_output = first_content.get("text", "")
-                        else:
-                            tool_output = getattr(first_content, "text", "")
-                    else:
-                        tool_output = ""
-
-                    # logger.info(f"[TOOL RESULT] name={tool_name}, output={tool_output[:200]}..." if len(tool_output) > 200 else f"[TOOL RESULT] name={tool_name}, output={tool_output}")
-                    print(f"[Result] {tool_output}", file=sys.stderr)
-
-                    tool_results.append(
-                        {
-                            "role": "tool",
-                            "content": tool_output,
-                            "tool_call_id": tool_call.get("id", "")
-                            if isinstance(tool_call, dict)
-                            else (
-                                getattr(tool_call, "id", "")
-                                if hasattr(tool_call, "id")
-                                else ""
-                            ),
-                            "name": tool_name,
-                        }
-                    )
-
-            except Exception as e:
-                print(f"\n[Tool Error] {e}\n", file=sys.stderr)
-                tool_results.append(
-                    {
-                        "role": "tool",
-                        "content": f"Error: {str(e)}",
-                        "tool_call_id": tool_call.get("id", "")
-                        if isinstance(tool_call, dict)
-                        else (
-                            getattr(tool_call, "id", "")
-                            if hasattr(tool_call, "id")
-                            else ""
-                        ),
-                        "name": tool_name,
-                    }
-                )
-
-        if tool_results:
-            messages.extend(tool_results)
+        """Handle MCP tool calls from the AI until it stops requesting tools"""
+        for _ in range(self.engine.max_iterations):
+            results = await self.engine.execute(
+                [self._parse_tool_call(tool_call) for tool_call in tool_calls]
+            )
+            messages.extend(
+                {
+                    "role": "tool",
+                    "content": result.output,
+                    "tool_call_id": result.call.id,
+                    "name": result.call.name,
+                }
+                for result in results
+            )
 
             provider = self._create_provider()
             model = self._get_model_for_provider(self.provider_name)
@@ -312,11 +188,15 @@ For shell operations:
             # logger.info(f"[MODEL INPUT (TOOL FOLLOW-UP)] model={model}, messages_count={len(messages)}")
 
             response = await provider.completions(
-                messages=messages, temperature=0.7, model=model, tools=self.mcp_tools
+                messages=messages,
+                temperature=0.7,
+                model=model,
+                tools=self.tool_registry.schemas_for(self.provider_name),
             )
 
             # logger.info(f"[MODEL OUTPUT (TOOL FOLLOW-UP)] response received")
 
+            tool_calls = None
             if response:
                 if hasattr(response, "choices") and response.choices:
                     assistant_message = response.choices[0].message
@@ -331,35 +211,67 @@ For shell operations:
                         print(f"\nAssistant: {content}\n")
                         messages.append({"role": "assistant", "content": content})
 
-                    tool_calls_attr = None
-                    tool_calls_attr = (
+                    tool_calls = (
                         getattr(assistant_message, "tool_calls", None)
                         if hasattr(assistant_message, "tool_calls")
                         else None
                     )
-                    if tool_calls_attr is None and isinstance(assistant_message, dict):
-                        tool_calls_attr = assistant_message.get("tool_calls")
-
-                    if tool_calls_attr:
-                        # logger.info(f"[MODEL OUTPUT (TOOL FOLLOW-UP)] nested tool_calls count: {len(tool_calls_attr)}")
-                        await self.handle_tool_calls(tool_calls_attr, messages)
+                    if tool_calls is None and isinstance(assistant_message, dict):
+                        tool_calls = assistant_message.get("tool_calls")
                 elif hasattr(response, "text"):
                     text = response.text
                     if hasattr(response, "tool_calls") and response.tool_calls:
-                        # logger.info(f"[MODEL OUTPUT (TOOL FOLLOW-UP)] tool_calls count: {len(response.tool_calls)}")
-                        await self.handle_tool_calls(response.tool_calls, messages)
+                        tool_calls = response.tool_calls
                     elif text:
                         # logger.info(f"[MODEL OUTPUT (TOOL FOLLOW-UP)] text response: {text[:200]}...")
                         print(f"\nAssistant: {text}\n")
                         messages.append({"role": "assistant", "content": text})
 
+            if not tool_calls:
+                return
+
+        print(
+            f"\n[Stopped after {self.engine.max_iterations} tool iterations]\n",
+            file=sys.stderr,
+        )
+
+    def _parse_tool_call(self, tool_call: Any) -> ToolCall:
+        """Convert a dict or object tool call into a ToolCall"""
+        # Handle both dict and object formats
+        if isinstance(tool_call, dict):
+            tool_name = tool_call.get("function", {}).get("name", "")
+            arguments_str = tool_call.get("function", {}).get("arguments", "{}")
+            tool_call_id = tool_call.get("id", "")
+        else:
+            func_obj = getattr(tool_call, "function", None)
+            if func_obj is None:
+                tool_name = ""
+                arguments_str = "{}"
+            elif isinstance(func_obj, dict):
+                tool_name = func_obj.get("name", "")
+                arguments_str = func_obj.get("arguments", "{}")
+            else:
+                tool_name = getattr(func_obj, "name", "")
+                arguments_str = getattr(func_obj, "arguments", "{}")
+            tool_call_id = getattr(tool_call, "id", "") or ""
+
+        return ToolCall(
+            name=tool_name,
+            arguments=AgentEngine.parse_arguments(arguments_str),
+            id=tool_call_id,
+        )
+
     def _create_provider(self):
         """Create the specified AI provider"""
         providers = {
             "yandexcloud": YandexCloudProvider(),
             "ollama": OllamaProvider(),
         }
-        return providers.get(self.provider_name, providers["yandexcloud"])
+        provider = providers.get(self.provider_name, providers["yandexcloud"])
+        if self.engine:
+            provider.tool_executor = self.engine.run_calls
+            provider.max_tool_iterations = self.engine.max_iterations
+        return provider
 
     def _get_model_for_provider(self, provider_name: str) -> str:
         """Get the model name for the specified provider"""
@@ -5,8 +5,9 @@ Provides tools for file operations and shell script execution in the 'out' subfo
 """
 
 import os
-import subprocess
+import sys
 import json
+import time
 from pathlib import Path
 from typing import Optional
 import asyncio
@@ -14,27 +15,76 @@ from mcp.server import Server
 from mcp.server.stdio import stdio_server
 from mcp.types import Tool, TextContent
 
+from shell_runner import run_shell
+
 # Base directory for file operations (directory containing this script)
 BASE_DIR = Path(__file__).parent.resolve()
 OUT_DIR = BASE_DIR / "out"
 OUT_DIR.mkdir(exist_ok=True)
 
+DEFAULT_SHELL_TIMEOUT = 30
+MIN_SHELL_TIMEOUT = 1
+MAX_SHELL_TIMEOUT = 600
+# Characters of stdout/stderr kept for the model (head and tail)
+MAX_SHELL_OUTPUT = 20000
+PROGRESS_INTERVAL = 0.25
+
+shell_semaphore = asyncio.Semaphore(int(os.getenv("MCP_MAX_SHELL_COMMANDS", "4")))
+
 app = Server("ai-assist-server")
 
 
+class ProgressStreamer:
+    """Streams command output to the client as MCP progress notifications"""
+
+    def __init__(self, session, progress_token):
+        self.session = session
+        self.progress_token = progress_token
+        self.progress = 0
+        self.pending = []
+        self.last_sent = 0.0
+
+    @classmethod
+    def from_request(cls) -> Optional["ProgressStreamer"]:
+        """Create a streamer if the client asked for progress of this request"""
+        ctx = app.request_context
+        if ctx.meta is None or ctx.meta.progressToken is None:
+            return None
+        return cls(ctx.session, ctx.meta.progressToken)
+
+    async def on_output(self, stream: str, text: str):
+        self.pending.append(text)
+        self.progress += len(text)
+        if time.monotonic() - self.last_sent >= PROGRESS_INTERVAL:
+            await self.flush()
+
+    async def flush(self):
+        if not self.pending:
+            return
+        message = "".join(self.pending)
+        self.pending = []
+        self.last_sent = time.monotonic()
+        try:
+            await self.session.send_progress_notification(
+                self.progress_token, self.progress, message=message
+            )
+        except Exception as e:
+            print(f"Error sending progress notification: {e}", file=sys.stderr)
+
+
 @app.list_tools()
 async def list_tools() -> list[Tool]:
     """List available tools"""
     return [
         Tool(
             name="write_file",
-            description="Write content to a file. Creates the file if it doesn't exist.",
+            description="Write content to a file. Creates the file and any missing parent directories if they don't exist. Examples: 'quick_sort.py', 'utils/helper.py', 'api/server/main.py'.",
             inputSchema={
                 "type": "object",
                 "properties": {
                     "filename": {
                         "type": "string",
-                        "description": "Filename (e.g., 'quick_sort.py' or 'subfolder/file.txt')",
+                        "description": "Filename - can include subdirectories like 'subdir/nested/file.py'",
                     },
                     "content": {
                         "type": "string",
@@ -46,38 +96,45 @@ async def list_tools() -> list[Tool]:
         ),
         Tool(
             name="execute_shell",
-            description="Execute a shell command",
+            description="Execute a shell command. Use for testing, running scripts, listing files, etc.",
             inputSchema={
                 "type": "object",
                 "properties": {
                     "command": {
                         "type": "string",
                         "description": "Shell command to execute (e.g., 'ls -la', 'python script.py')",
-                    }
+                    },
+                    "timeout": {
+                        "type": "number",
+                        "description": f"Timeout in seconds (default {DEFAULT_SHELL_TIMEOUT}, max {MAX_SHELL_TIMEOUT})",
+                    },
                 },
                 "required": ["command"],
             },
         ),
         Tool(
             name="read_file",
-            description="Read content from a file",
+            description="Read content from a file. Supports files in subdirectories.",
             inputSchema={
                 "type": "object",
                 "properties": {
-                    "filename": {"type": "string", "description": "Filename"}
+                    "filename": {
+                        "type": "string",
+                        "description": "Filename - can include subdirectories like 'utils/helper.py'",
+                    }
                 },
                 "required": ["filename"],
             },
         ),
         Tool(
             name="list_files",
-            description="List files",
+            description="List files. Optionally list files in a specific subdirectory.",
             inputSchema={
                 "type": "object",
                 "properties": {
                     "path": {
                         "type": "string",
-                        "description": "Optional subdirectory path",
+                        "description": "Optional subdirectory path (e.g., 'utils' or 'api/server')",
                     }
                 },
             },
@@ -134,30 +191,38 @@ async def call_tool(name: str, arguments: dict) -> list[TextContent]:
                         )
                     ]
 
-            # Execute command in out directory
             try:
-                result = subprocess.run(
-                    command,
-                    shell=True,
-                    cwd=str(OUT_DIR),
-                    capture_output=True,
-                    text=True,
-                    timeout=30,
-                )
+                timeout = float(arguments.get("timeout", DEFAULT_SHELL_TIMEOUT))
+            except (TypeError, ValueError):
+                timeout = DEFAULT_SHELL_TIMEOUT
+            if not timeout > 0:  # zero, negative or NaN
+                timeout = DEFAULT_SHELL_TIMEOUT
+            timeout = min(max(timeout, MIN_SHELL_TIMEOUT), MAX_SHELL_TIMEOUT)
+
+            # Execute command in out directory, streaming output as progress
+            progress = ProgressStreamer.from_request()
+            try:
+                async with shell_semaphore:
+                    result = await run_shell(
+                        command,
+                        cwd=str(OUT_DIR),
+                        timeout=timeout,
+                        max_output=MAX_SHELL_OUTPUT,
+                        on_output=progress.on_output if progress else None,
+                    )
+                if progress:
+                    await progress.flush()
 
-                output = f"Command: {command}\nExit code: {result.returncode}\n"
+                if result.timed_out:
+                    output = f"Command: {command}\nError: Command timed out after {timeout:g} seconds\n"
+                else:
+                    output = f"Command: {command}\nExit code: {result.exit_code}\n"
                 if result.stdout:
                     output += f"Stdout:\n{result.stdout}"
                 if result.stderr:
                     output += f"\nStderr:\n{result.stderr}"
 
                 return [TextContent(type="text", text=output)]
-            except subprocess.TimeoutExpired:
-                return [
-                    TextContent(
-                        type="text", text="Error: Command timed out after 30 seconds"
-                    )
-                ]
             except Exception as e:
                 return [
                     TextContent(type="text", text=f"Error executing command: {str(e)}")
@@ -1,6 +1,7 @@
 from abc import ABC, abstractmethod
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Tuple, Callable, Awaitable
 from .completion_response import CompletionsResponse
+from .scheduler import RequestScheduler, get_scheduler
 
 
 class Provider(ABC):
@@ -8,8 +9,31 @@ class Provider(ABC):
     
     def __init__(self, name: str):
         self.name = name
+        # Optional async callable running a batch of (name, arguments) tool calls
+        self.tool_executor: Optional[Callable[[List[Tuple[str, Any]]], Awaitable[List[str]]]] = None
+        self.max_tool_iterations = 10
     
+    @property
+    def scheduler(self) -> RequestScheduler:
+        """Rate limiting and retries shared by all instances of the provider.
+
+        Created on first use, so providers that only wrap other providers
+        never get one.
+        """
+        return get_scheduler(self.name)
+
     @abstractmethod
     async def completions(self, messages: List[Dict[str, Any]], temperature: float, model: str, tools: Optional[List[Dict[str, Any]]] = None) -> Optional[CompletionsResponse]:
         """Get completions from the AI provider"""
         pass
+
+    async def _run_tools(self, calls: List[Tuple[str, Any]]) -> List[str]:
+        """Run tool calls with the configured executor, or one by one"""
+        if self.tool_executor:
+            return await self.tool_executor(calls)
+        return [await self._call_mcp_tool(name, arguments) for name, arguments in calls]
+
+    @abstractmethod
+    async def _call_mcp_tool(self, tool_name: str, arguments: Dict[str, Any]) -> str:
+        """Call an MCP tool and return the result as a string"""
+        pass
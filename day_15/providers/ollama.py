@@ -16,7 +16,7 @@ class OllamaProvider(Provider):
 
     def __init__(self):
         super().__init__("Ollama")
-        self.url = "http://localhost:11434/v1/chat/completions"
+        self.url = f"{os.getenv('OLLAMA_HOST', 'http://localhost:11434')}/v1/chat/completions"
 
     def _get_headers(self) -> Dict[str, str]:
         return {"Content-Type": "application/json"}
@@ -111,6 +111,7 @@ class OllamaProvider(Provider):
         temperature: float,
         model: str,
         tool_results: Optional[List[Dict[str, Any]]] = None,
+        iteration: int = 0,
     ) -> Optional[CompletionsResponse]:
         """Handle tool calls in the response, recursively if needed."""
         api_result = result.get("result", result)
@@ -130,24 +131,33 @@ class OllamaProvider(Provider):
         if not tool_calls:
             return self._extract_response(api_result, latency)
 
+        if iteration >= self.max_tool_iterations:
+            print(f"Stopped after {iteration} tool iterations")
+            return CompletionsResponse(
+                text=message.get("content") or f"Stopped after {iteration} tool iterations.",
+                latency=latency,
+            )
+
         ollama_messages = self._convert_messages(messages)
         ollama_messages.append(
             {"role": "assistant", "content": message.get("content", "")}
         )
 
-        current_tool_results = []
-
-        for tool_call in tool_calls:
-            function_call = tool_call.get("function", {})
-            tool_name = function_call.get("name", "")
-            arguments = function_call.get("arguments", "")
-            tool_result = await self._call_mcp_tool(tool_name, arguments)
-            current_tool_results.append(
-                {
-                    "role": "tool",
-                    "content": json.dumps({"name": tool_name, "result": tool_result}),
-                }
+        calls = [
+            (
+                tool_call.get("function", {}).get("name", ""),
+                tool_call.get("function", {}).get("arguments", ""),
             )
+            for tool_call in tool_calls
+        ]
+        outputs = await self._run_tools(calls)
+        current_tool_results = [
+            {
+                "role": "tool",
+                "content": json.dumps({"name": tool_name, "result": tool_result}),
+            }
+            for (tool_name, _), tool_result in zip(calls, outputs)
+        ]
 
         all_tool_results = (tool_results or []) + current_tool_results
 
@@ -159,7 +169,12 @@ class OllamaProvider(Provider):
 
         if follow_up:
             return await self._handle_tool_calls(
-                ollama_messages, follow_up, temperature, model, all_tool_results
+                ollama_messages,
+                follow_up,
+                temperature,
+                model,
+                all_tool_results,
+                iteration + 1,
             )
 
         return None
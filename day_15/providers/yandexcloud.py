@@ -1,6 +1,5 @@
 import json
 from typing import Optional, List, Dict, Any
-import aiohttp
 import os
 import time
 import sys
@@ -10,6 +9,7 @@ from mcp.client.stdio import stdio_client, StdioServerParameters
 from util.log_curl import log_curl_request
 from .base import Provider
 from .completion_response import CompletionsResponse
+from .scheduler import post_json
 
 
 class YandexCloudProvider(Provider):
@@ -17,7 +17,8 @@ class YandexCloudProvider(Provider):
 
     def __init__(self):
         super().__init__("YandexCloud")
-        self.url = "https://llm.api.cloud.yandex.net/foundationModels/v1/completion"
+        self.base_url = os.getenv("YANDEXCLOUD_BASE_URL", "https://llm.api.cloud.yandex.net")
+        self.url = f"{self.base_url}/foundationModels/v1/completion"
         self.folder_id = os.getenv("YANDEXCLOUD_FOLDER_ID", "")
 
     def _get_headers(self) -> Dict[str, str]:
@@ -64,7 +65,10 @@ class YandexCloudProvider(Provider):
 
         # print(f"PAYLOAD: {payload}")
 
-        if tools:
+        if tools and all("type" not in tool for tool in tools):
+            # Already in YandexCloud format (precomputed by ToolRegistry)
+            payload["tools"] = tools
+        elif tools:
             yandex_tools = []
             for tool in tools:
                 func = tool.get("function", {})
@@ -112,18 +116,11 @@ class YandexCloudProvider(Provider):
         """Make HTTP request and return raw result for further processing."""
         start_time = time.time()
         try:
-            async with aiohttp.ClientSession() as session:
-                # tc = aiohttp.TraceConfig()
-                # log_curl_request(session, tc)
-                # session._trace_configs.append(tc)
-
-                async with session.post(
-                    self.url, headers=headers, json=payload
-                ) as response:
-                    response.raise_for_status()
-                    result = await response.json()
-                    latency = time.time() - start_time
-                    return {"result": result, "latency": latency}
+            result = await self.scheduler.run(
+                payload["modelUri"], lambda: post_json(self.url, headers, payload)
+            )
+            latency = time.time() - start_time
+            return {"result": result, "latency": latency}
         except Exception as e:
             print(f"Error calling YandexCloud API: {e}")
             return None
@@ -135,6 +132,7 @@ class YandexCloudProvider(Provider):
         temperature: float,
         model: str,
         tool_results: Optional[List[Dict[str, Any]]] = None,
+        iteration: int = 0,
     ) -> Optional[CompletionsResponse]:
         """Handle tool calls in the response, recursively if needed."""
         api_result = result.get("result", result)
@@ -154,23 +152,29 @@ class YandexCloudProvider(Provider):
         if "toolCallList" not in message:
             return self._extract_response(api_result, latency)
 
+        if iteration >= self.max_tool_iterations:
+            print(f"Stopped after {iteration} tool iterations")
+            return CompletionsResponse(
+                text=f"Stopped after {iteration} tool iterations.", latency=latency
+            )
+
         tool_calls = message["toolCallList"]["toolCalls"]
         yandex_messages = self._convert_messages(messages)
-        current_tool_results = []
-
-        for tool_call in tool_calls:
-            function_call = tool_call["functionCall"]
-            tool_name = function_call["name"]
-            arguments = function_call["arguments"]
-            tool_result = await self._call_mcp_tool(tool_name, arguments)
-            current_tool_results.append(
-                {
-                    "functionResult": {
-                        "name": tool_name,
-                        "content": tool_result,
-                    }
+
+        calls = [
+            (tool_call["functionCall"]["name"], tool_call["functionCall"]["arguments"])
+            for tool_call in tool_calls
+        ]
+        outputs = await self._run_tools(calls)
+        current_tool_results = [
+            {
+                "functionResult": {
+                    "name": tool_name,
+                    "content": tool_result,
                 }
-            )
+            }
+            for (tool_name, _), tool_result in zip(calls, outputs)
+        ]
 
         all_tool_results = (tool_results or []) + current_tool_results
 
@@ -182,7 +186,12 @@ class YandexCloudProvider(Provider):
 
         if follow_up:
             return await self._handle_tool_calls(
-                yandex_messages, follow_up, temperature, model, all_tool_results
+                yandex_messages,
+                follow_up,
+                temperature,
+                model,
+                all_tool_results,
+                iteration + 1,
             )
 
         return None
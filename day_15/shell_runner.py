@@ -0,0 +1,143 @@
+"""
+Async shell command execution with streamed, size-capped output.
+"""
+
+import asyncio
+import codecs
+import os
+import signal
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Optional, Callable, Awaitable
+
+# Callback receiving ("stdout" | "stderr", text) as output arrives
+OutputCallback = Callable[[str, str], Awaitable[None]]
+
+
+class OutputBuffer:
+    """Keeps the head and the tail of a stream within a character limit"""
+
+    def __init__(self, limit: int):
+        self.head_limit = limit // 2
+        self.tail_limit = limit - self.head_limit
+        self.head = []
+        self.head_size = 0
+        self.tail = deque()
+        self.tail_size = 0
+        self.dropped = 0
+
+    def append(self, text: str):
+        if self.head_size < self.head_limit:
+            part = text[: self.head_limit - self.head_size]
+            self.head.append(part)
+            self.head_size += len(part)
+            text = text[len(part):]
+        if not text:
+            return
+        self.tail.append(text)
+        self.tail_size += len(text)
+        while self.tail_size > self.tail_limit:
+            overflow = self.tail_size - self.tail_limit
+            first = self.tail[0]
+            if len(first) <= overflow:
+                self.tail.popleft()
+                self.tail_size -= len(first)
+                self.dropped += len(first)
+            else:
+                self.tail[0] = first[overflow:]
+                self.tail_size -= overflow
+                self.dropped += overflow
+
+    def getvalue(self) -> str:
+        head = "".join(self.head)
+        tail = "".join(self.tail)
+        if self.dropped:
+            return f"{head}\n... [{self.dropped} characters truncated] ...\n{tail}"
+        return head + tail
+
+
+@dataclass
+class ShellResult:
+    """Result of a finished (or timed out) shell command"""
+    command: str
+    exit_code: Optional[int]
+    stdout: str
+    stderr: str
+    duration: float
+    timed_out: bool = False
+
+
+async def _pump(
+    stream: asyncio.StreamReader,
+    name: str,
+    buffer: OutputBuffer,
+    on_output: Optional[OutputCallback],
+):
+    # Incremental decoding keeps multibyte characters split across reads intact
+    decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+    while True:
+        chunk = await stream.read(4096)
+        text = decoder.decode(chunk, final=not chunk)
+        if text:
+            buffer.append(text)
+            if on_output:
+                await on_output(name, text)
+        if not chunk:
+            break
+
+
+def _kill(process: asyncio.subprocess.Process):
+    try:
+        # The shell runs in its own session, so kill the whole process group
+        os.killpg(process.pid, signal.SIGKILL)
+    except (ProcessLookupError, PermissionError):
+        pass
+
+
+async def run_shell(
+    command: str,
+    cwd: str,
+    timeout: float = 30,
+    max_output: int = 20000,
+    on_output: Optional[OutputCallback] = None,
+) -> ShellResult:
+    """Run a shell command without blocking the event loop"""
+    start_time = time.time()
+    stdout = OutputBuffer(max_output)
+    stderr = OutputBuffer(max_output)
+
+    process = await asyncio.create_subprocess_shell(
+        command,
+        cwd=cwd,
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.PIPE,
+        start_new_session=True,
+    )
+
+    timed_out = False
+    try:
+        await asyncio.wait_for(
+            asyncio.gather(
+                _pump(process.stdout, "stdout", stdout, on_output),
+                _pump(process.stderr, "stderr", stderr, on_output),
+                process.wait(),
+            ),
+            timeout=timeout,
+        )
+    except asyncio.TimeoutError:
+        timed_out = True
+        _kill(process)
+        await process.wait()
+    except asyncio.CancelledError:
+        _kill(process)
+        raise
+
+    return ShellResult(
+        command=command,
+        exit_code=process.returncode,
+        stdout=stdout.getvalue(),
+        stderr=stderr.getvalue(),
+        duration=time.time() - start_time,
+        timed_out=timed_out,
+    )
@@ -12,6 +12,8 @@ import numpy as np
 from qdrant_client import QdrantClient
 from qdrant_client.models import PointStruct
 
+from ollama_residency import ModelResidencyManager
+
 
 COLLECTION_NAME = "pdf_documents"
 EMBEDDING_MODEL = "evilfreelancer/enbeddrus:latest"
@@ -196,6 +198,12 @@ def main():
 
     client = initialize_qdrant()
 
+    # Load the three models while the user types and keep them loaded between questions
+    residency = ModelResidencyManager(
+        chat_models=[LLM_MODEL], embedding_models=[EMBEDDING_MODEL, RERANKING_MODEL]
+    )
+    residency.start()
+
     try:
         while True:
             query_text = input("\nEnter your question: ").strip()
@@ -234,6 +242,9 @@ def main():
         print("\n\nInterrupted by user. Exiting...")
     except Exception as e:
         print(f"An error occurred: {e}")
+    finally:
+        residency.stop(unload=True)
+        print(f"Model loads: {residency.loads}, evictions: {residency.evictions}")
 
 
 if __name__ == "__main__":
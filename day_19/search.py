@@ -11,6 +11,8 @@ import ollama
 from qdrant_client import QdrantClient
 from qdrant_client.models import PointStruct, SearchRequest
 
+from ollama_residency import ModelResidencyManager
+
 
 COLLECTION_NAME = "pdf_documents"
 EMBEDDING_MODEL = "evilfreelancer/enbeddrus:latest"
@@ -110,9 +112,13 @@ def main():
 
     client = initialize_qdrant()
 
+    # Load the models while the user types and keep them loaded between questions
+    residency = ModelResidencyManager(chat_models=[LLM_MODEL], embedding_models=[EMBEDDING_MODEL])
+    residency.start()
+
     try:
         while True:
-            query_text = input("\User: ").strip()
+            query_text = input("\nUser: ").strip()
 
             if query_text.lower() in ["quit", "exit", "q"]:
                 print("Goodbye!")
@@ -142,6 +148,9 @@ def main():
         print("\n\nInterrupted by user. Exiting...")
     except Exception as e:
         print(f"An error occurred: {e}")
+    finally:
+        residency.stop(unload=True)
+        print(f"Model loads: {residency.loads}, evictions: {residency.evictions}")
 
 
 if __name__ == "__main__":
@@ -1,18 +1,49 @@
+import asyncio
+import os
 import chainlit as cl
 from typing import List, Dict, Any, Optional
 from qdrant_client import QdrantClient
 from qdrant_client.models import Filter, FieldCondition, MatchText
-import ollama
 from providers.ollama import OllamaProvider
+from providers.metered import MeteredProvider
+from providers.metrics import QDRANT_QUERY_SECONDS, observe_residency_event, start_metrics_server
+from embedding_batcher import get_embedding_batcher
+from ollama_residency import ModelResidencyManager, parse_keep_alive
 from history_store import HistoryStore
+from summarizer import IncrementalSummarizer
+from semantic_memory import SemanticMemory
+from tracing import TracedProvider, span, traced
 
 HISTORY_SUMMARY_THRESHOLD = 10
+HISTORY_KEEP_RECENT = 5
+MEMORY_RECALL_LIMIT = 5
 COLLECTION_NAME = "pdf_documents"
 EMBEDDING_MODEL = "evilfreelancer/enbeddrus:latest"
 LLM_MODEL = "qwen3:8b"
 
-ollama_provider = OllamaProvider()
+ollama_provider = TracedProvider(MeteredProvider(OllamaProvider()))
 history_store = HistoryStore()
+summarizer = IncrementalSummarizer(ollama_provider, history_store, model=LLM_MODEL)
+semantic_memory = SemanticMemory(history_store.db_path, model=EMBEDDING_MODEL)
+# Clearing the chat history also forgets its vectors, so it is not recalled later
+history_store.on_clear = semantic_memory.delete_all
+# Query embeddings of all sessions are coalesced into batched Ollama calls
+embedding_batcher = get_embedding_batcher(EMBEDDING_MODEL)
+
+# Keep the chat and embedding models loaded, so user requests never wait for a model load
+residency = ModelResidencyManager(
+    chat_models=[LLM_MODEL],
+    embedding_models=[EMBEDDING_MODEL],
+    keep_alive=parse_keep_alive(os.getenv("OLLAMA_KEEP_ALIVE", "-1")),
+    on_event=observe_residency_event,
+)
+if os.getenv("OLLAMA_WARM_UP", "true").lower() == "true":
+    residency.start()
+
+# Prometheus metrics on http://127.0.0.1:METRICS_PORT/metrics, 0 disables
+METRICS_PORT = int(os.getenv("METRICS_PORT", "9464"))
+if METRICS_PORT:
+    start_metrics_server(METRICS_PORT)
 
 
 def get_qdrant_client() -> QdrantClient:
@@ -20,17 +51,22 @@ def get_qdrant_client() -> QdrantClient:
     return QdrantClient(url="http://localhost:6333")
 
 
-def search_qdrant(query: str, limit: int = 5) -> List[Dict]:
+@traced("search_qdrant")
+async def search_qdrant(query: str, limit: int = 5) -> List[Dict]:
     """Search Qdrant for relevant documents"""
     try:
         client = get_qdrant_client()
-        query_embedding = ollama.embed(model=EMBEDDING_MODEL, input=[query])[
-            "embeddings"
-        ][0]
-
-        results = client.search(
-            collection_name=COLLECTION_NAME, query_vector=query_embedding, limit=limit
-        )
+        with span("ollama.embed", root=False, model=EMBEDDING_MODEL):
+            query_embedding = await embedding_batcher.embed(query)
+
+        with span("qdrant.search", root=False, collection=COLLECTION_NAME, limit=limit), \
+                QDRANT_QUERY_SECONDS.labels(collection=COLLECTION_NAME).time():
+            results = await asyncio.to_thread(
+                client.search,
+                collection_name=COLLECTION_NAME,
+                query_vector=query_embedding,
+                limit=limit,
+            )
 
         return [
             {
@@ -45,9 +81,9 @@ def search_qdrant(query: str, limit: int = 5) -> List[Dict]:
         return []
 
 
-def get_rag_context(query: str, limit: int = 5) -> str:
+async def get_rag_context(query: str, limit: int = 5) -> str:
     """Get RAG context from Qdrant"""
-    results = search_qdrant(query, limit)
+    results = await search_qdrant(query, limit)
     if not results:
         return ""
 
@@ -60,23 +96,15 @@ def get_rag_context(query: str, limit: int = 5) -> str:
     return "\n\n".join(context_parts)
 
 
-async def generate_summary(messages: List[Dict[str, str]]) -> str:
-    """Generate a summary of the chat history"""
-    try:
-        system_prompt = """You are a helpful assistant that summarizes chat conversations. Provide a concise but comprehensive summary of the key points discussed. Keep the summary under 200 words."""
+async def get_memory_context(query: str, limit: int = MEMORY_RECALL_LIMIT) -> str:
+    """Get relevant earlier messages that are no longer in the chat window"""
+    results = await semantic_memory.search(
+        query, limit=limit, exclude_ids=history_store.get_message_ids()
+    )
+    if not results:
+        return ""
 
-        all_messages = [{"role": "system", "content": system_prompt}] + messages
-
-        response = await ollama_provider.completions(
-            messages=all_messages, temperature=0.3, model=LLM_MODEL
-        )
-
-        if response:
-            return response.text
-        return "Error generating summary."
-    except Exception as e:
-        print(f"Error generating summary: {e}")
-        return "Error generating summary."
+    return "\n".join(f"{result['role']}: {result['content']}" for result in results)
 
 
 async def get_ai_response(
@@ -84,12 +112,23 @@ async def get_ai_response(
 ) -> str:
     """Get AI response using chat history and optionally RAG"""
     try:
-        rag_context = ""
+        # Both lookups embed the same query, so the batcher sends it to Ollama once
         if use_rag:
-            rag_context = get_rag_context(user_query)
+            rag_context, memory_context = await asyncio.gather(
+                get_rag_context(user_query), get_memory_context(user_query)
+            )
+        else:
+            rag_context, memory_context = "", await get_memory_context(user_query)
 
         system_message = """You are a helpful AI assistant. Answer the user's questions based on the chat history and any relevant context provided."""
 
+        if memory_context:
+            system_message += f"""
+
+Relevant earlier messages from this conversation:
+{memory_context}
+"""
+
         if rag_context:
             system_message += f"""
 
@@ -124,11 +163,18 @@ async def on_chat_start():
 @cl.on_message
 async def on_message(message: cl.Message):
     """Handle incoming messages"""
+    with span("turn", message_length=len(message.content)):
+        await handle_message(message)
+
+
+async def handle_message(message: cl.Message):
+    """Answer a user message and fold old turns into the summary"""
     user_content = message.content
 
-    history_store.add_message("user", user_content)
+    message_id = history_store.add_message("user", user_content)
+    semantic_memory.add_message(message_id, "user", user_content)
 
-    messages = history_store.get_all_messages()
+    messages = summarizer.get_context_messages() + history_store.get_all_messages()
 
     msg = cl.Message(content="")
     await msg.send()
@@ -137,18 +183,22 @@ async def on_message(message: cl.Message):
 
     await msg.stream_token(ai_response)
 
-    history_store.add_message("assistant", ai_response)
+    message_id = history_store.add_message("assistant", ai_response)
+    semantic_memory.add_message(message_id, "assistant", ai_response)
 
     message_count = history_store.get_message_count()
     if message_count > HISTORY_SUMMARY_THRESHOLD:
         try:
-            summary = await generate_summary(messages)
-            recent_messages = messages[-5:]
-            history_store.update_messages_with_summary(summary, recent_messages)
-            summary_msg = cl.Message(
-                content=f"\n\n[Summarized {message_count - 5} previous messages]"
-            )
-            await summary_msg.send()
+            # Fold only the turns that are not summarized yet into the rolling summary
+            new_messages = history_store.get_all_messages()[:-HISTORY_KEEP_RECENT]
+            result = await summarizer.fold(new_messages)
+            if result:
+                history_store.keep_recent_messages(HISTORY_KEEP_RECENT)
+                summary_msg = cl.Message(
+                    content=f"\n\n[Summarized {result.messages_folded} previous messages, "
+                    f"saved {result.saved_tokens} prompt tokens]"
+                )
+                await summary_msg.send()
         except Exception as e:
             print(f"Error during summarization: {e}")
 
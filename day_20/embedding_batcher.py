@@ -0,0 +1,148 @@
+import asyncio
+import os
+import time
+from typing import List, Dict, Optional, Set, Tuple
+import ollama
+from providers.metrics import observe_embedding
+
+EMBEDDING_MODEL = "evilfreelancer/enbeddrus:latest"
+
+
+class EmbeddingBatcher:
+    """Coalesces concurrent embedding requests into batched Ollama calls.
+
+    Requests from all sessions are queued; a worker waits at most `max_wait`
+    seconds after the first queued text (or until `max_batch_size` texts are
+    collected), sends them as one `input=[...]` request and resolves each
+    caller's future with its vector. Identical texts in a batch are embedded
+    once; if a batch fails, its texts are retried one by one. Up to
+    `max_concurrent_batches` batches are in flight at a time.
+    """
+
+    def __init__(
+        self,
+        model: str = EMBEDDING_MODEL,
+        max_batch_size: int = 32,
+        max_wait: float = 0.005,
+        max_concurrent_batches: int = 2,
+    ):
+        self.model = model
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+        # The loop keeps only weak references to tasks, so batches in flight are held here
+        self._sending: Set[asyncio.Task] = set()
+        self._slots = asyncio.Semaphore(max_concurrent_batches)
+        self.requests = 0
+        self.batches = 0
+
+    async def embed(self, text: str) -> List[float]:
+        """Get the embedding of one text"""
+        return (await self.embed_many([text]))[0]
+
+    async def embed_many(self, texts: List[str]) -> List[List[float]]:
+        """Get embeddings of several texts, batched together with other callers"""
+        if not texts:
+            return []
+        self._ensure_worker()
+        loop = asyncio.get_running_loop()
+        futures = []
+        for text in texts:
+            future = loop.create_future()
+            self._queue.put_nowait((text, future))
+            futures.append(future)
+        self.requests += len(texts)
+        return list(await asyncio.gather(*futures))
+
+    async def close(self):
+        if self._worker is not None:
+            self._worker.cancel()
+            self._worker = None
+
+    def _ensure_worker(self):
+        if self._queue is None:
+            self._queue = asyncio.Queue()
+        if self._worker is None or self._worker.done():
+            self._worker = asyncio.get_running_loop().create_task(self._run())
+
+    async def _run(self):
+        while True:
+            batch = await self._next_batch()
+            await self._slots.acquire()
+            task = asyncio.get_running_loop().create_task(self._send(batch))
+            self._sending.add(task)
+            task.add_done_callback(self._sending.discard)
+
+    async def _next_batch(self) -> List[Tuple[str, asyncio.Future]]:
+        """Collect up to max_batch_size texts, waiting at most max_wait"""
+        batch = [await self._queue.get()]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            if not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+                continue
+            timeout = deadline - time.monotonic()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _send(self, batch: List[Tuple[str, asyncio.Future]]):
+        try:
+            unique = list(dict.fromkeys(text for text, _ in batch))
+            try:
+                vectors = dict(zip(unique, await self._request(unique)))
+            except Exception as e:
+                if len(unique) == 1:
+                    raise
+                # One bad input must not fail the other callers, retry the texts one by one
+                print(f"Error embedding a batch of {len(unique)} texts, retrying one by one: {e}")
+                vectors = {}
+                for text in unique:
+                    try:
+                        vectors[text] = (await self._request([text]))[0]
+                    except Exception as text_error:
+                        vectors[text] = text_error
+            for text, future in batch:
+                if future.done():
+                    continue
+                if isinstance(vectors[text], Exception):
+                    future.set_exception(vectors[text])
+                else:
+                    future.set_result(vectors[text])
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+        finally:
+            self._slots.release()
+
+    async def _request(self, texts: List[str]) -> List[List[float]]:
+        start_time = time.perf_counter()
+        response = await asyncio.to_thread(ollama.embed, model=self.model, input=texts)
+        observe_embedding(self.model, len(texts), time.perf_counter() - start_time)
+        self.batches += 1
+        return response["embeddings"]
+
+
+_batchers: Dict[str, EmbeddingBatcher] = {}
+
+
+def get_embedding_batcher(model: str = EMBEDDING_MODEL) -> EmbeddingBatcher:
+    """Get the batcher shared by all sessions for the model.
+
+    Configured with EMBEDDING_BATCH_SIZE, EMBEDDING_BATCH_WAIT_MS and
+    EMBEDDING_MAX_CONCURRENT_BATCHES.
+    """
+    if model not in _batchers:
+        _batchers[model] = EmbeddingBatcher(
+            model,
+            max_batch_size=int(os.getenv("EMBEDDING_BATCH_SIZE", "32")),
+            max_wait=float(os.getenv("EMBEDDING_BATCH_WAIT_MS", "5")) / 1000,
+            max_concurrent_batches=int(os.getenv("EMBEDDING_MAX_CONCURRENT_BATCHES", "2")),
+        )
+    return _batchers[model]
@@ -1,6 +1,7 @@
 import sqlite3
-from typing import List, Dict
+from typing import List, Dict, Callable, Optional
 from datetime import datetime
+from tracing import traced
 
 
 class HistoryStore:
@@ -8,6 +9,8 @@ class HistoryStore:
 
     def __init__(self, db_path: str = "chat_history.db"):
         self.db_path = db_path
+        # Called after delete_all_messages(), e.g. to drop indexes built from the history
+        self.on_clear: Optional[Callable[[], None]] = None
         self._init_db()
 
     def _get_connection(self):
@@ -28,10 +31,31 @@ class HistoryStore:
                     created_at TEXT NOT NULL
                 )
             """)
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS summaries (
+                    level INTEGER PRIMARY KEY,
+                    content TEXT NOT NULL,
+                    folds INTEGER NOT NULL DEFAULT 0,
+                    updated_at TEXT NOT NULL
+                )
+            """)
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS summary_folds (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    level INTEGER NOT NULL,
+                    messages_folded INTEGER NOT NULL,
+                    new_tokens INTEGER NOT NULL,
+                    prompt_tokens INTEGER NOT NULL,
+                    full_history_tokens INTEGER NOT NULL,
+                    saved_tokens INTEGER NOT NULL,
+                    created_at TEXT NOT NULL
+                )
+            """)
             conn.commit()
 
-    def add_message(self, role: str, content: str):
-        """Add a message to the global history"""
+    @traced("history.add_message")
+    def add_message(self, role: str, content: str) -> int:
+        """Add a message to the global history and return its ID"""
         with self._get_connection() as conn:
             cursor = conn.cursor()
             now = datetime.utcnow().isoformat()
@@ -40,7 +64,9 @@ class HistoryStore:
                 (role, content, now),
             )
             conn.commit()
+            return cursor.lastrowid
 
+    @traced("history.get_all_messages")
     def get_all_messages(self) -> List[Dict]:
         """Get all messages from history"""
         with self._get_connection() as conn:
@@ -51,6 +77,15 @@ class HistoryStore:
             rows = cursor.fetchall()
             return [{"role": row["role"], "content": row["content"]} for row in rows]
 
+    @traced("history.get_message_ids")
+    def get_message_ids(self) -> List[int]:
+        """Get the IDs of all messages currently in history"""
+        with self._get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("SELECT id FROM messages ORDER BY id ASC")
+            return [row["id"] for row in cursor.fetchall()]
+
+    @traced("history.get_message_count")
     def get_message_count(self) -> int:
         """Get the total number of messages"""
         with self._get_connection() as conn:
@@ -60,13 +95,17 @@ class HistoryStore:
             count = result[0] if result else 0
             return int(count)
 
+    @traced("history.delete_all_messages")
     def delete_all_messages(self):
         """Delete all messages"""
         with self._get_connection() as conn:
             cursor = conn.cursor()
             cursor.execute("DELETE FROM messages")
             conn.commit()
+        if self.on_clear:
+            self.on_clear()
 
+    @traced("history.update_messages_with_summary")
     def update_messages_with_summary(self, summary: str, recent_messages: List[Dict]):
         """Replace all messages with a summary message and recent messages"""
         with self._get_connection() as conn:
@@ -83,3 +122,115 @@ class HistoryStore:
                     (msg["role"], msg["content"], now),
                 )
             conn.commit()
+
+    @traced("history.keep_recent_messages")
+    def keep_recent_messages(self, count: int):
+        """Delete all messages except the most recent `count` ones"""
+        with self._get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(
+                "DELETE FROM messages WHERE id NOT IN "
+                "(SELECT id FROM messages ORDER BY id DESC LIMIT ?)",
+                (count,),
+            )
+            conn.commit()
+
+    @traced("history.get_summaries")
+    def get_summaries(self) -> List[Dict]:
+        """Get stored summaries ordered from the oldest (highest) level to the newest"""
+        with self._get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(
+                "SELECT level, content, folds FROM summaries ORDER BY level DESC"
+            )
+            rows = cursor.fetchall()
+            return [
+                {"level": row["level"], "content": row["content"], "folds": row["folds"]}
+                for row in rows
+            ]
+
+    @traced("history.set_summary")
+    def set_summary(self, level: int, content: str, folds: int):
+        """Insert or replace the summary for the given level"""
+        with self._get_connection() as conn:
+            cursor = conn.cursor()
+            now = datetime.utcnow().isoformat()
+            cursor.execute(
+                "INSERT OR REPLACE INTO summaries (level, content, folds, updated_at) VALUES (?, ?, ?, ?)",
+                (level, content, folds, now),
+            )
+            conn.commit()
+
+    @traced("history.delete_summary")
+    def delete_summary(self, level: int):
+        """Delete the summary for the given level"""
+        with self._get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("DELETE FROM summaries WHERE level = ?", (level,))
+            conn.commit()
+
+    @traced("history.add_fold_stats")
+    def add_fold_stats(
+        self,
+        level: int,
+        messages_folded: int,
+        new_tokens: int,
+        prompt_tokens: int,
+        full_history_tokens: int,
+    ):
+        """Record prompt-token usage of a single summary fold"""
+        with self._get_connection() as conn:
+            cursor = conn.cursor()
+            now = datetime.utcnow().isoformat()
+            cursor.execute(
+                "INSERT INTO summary_folds (level, messages_folded, new_tokens, prompt_tokens, "
+                "full_history_tokens, saved_tokens, created_at) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (
+                    level,
+                    messages_folded,
+                    new_tokens,
+                    prompt_tokens,
+                    full_history_tokens,
+                    full_history_tokens - prompt_tokens,
+                    now,
+                ),
+            )
+            conn.commit()
+
+    @traced("history.get_folded_tokens")
+    def get_folded_tokens(self) -> int:
+        """Get the total number of raw message tokens folded into summaries so far"""
+        with self._get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(
+                "SELECT COALESCE(SUM(new_tokens), 0) FROM summary_folds WHERE level = 0"
+            )
+            result = cursor.fetchone()
+            return int(result[0]) if result else 0
+
+    @traced("history.get_fold_stats")
+    def get_fold_stats(self) -> Dict:
+        """Get aggregated prompt-token savings over all summary folds"""
+        with self._get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(
+                "SELECT COUNT(*), COALESCE(SUM(prompt_tokens), 0), "
+                "COALESCE(SUM(full_history_tokens), 0), COALESCE(SUM(saved_tokens), 0) "
+                "FROM summary_folds"
+            )
+            row = cursor.fetchone()
+            return {
+                "folds": int(row[0]),
+                "prompt_tokens": int(row[1]),
+                "full_history_tokens": int(row[2]),
+                "saved_tokens": int(row[3]),
+            }
+
+    @traced("history.delete_all_summaries")
+    def delete_all_summaries(self):
+        """Delete all summaries and fold statistics"""
+        with self._get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("DELETE FROM summaries")
+            cursor.execute("DELETE FROM summary_folds")
+            conn.commit()
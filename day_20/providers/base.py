@@ -1,6 +1,7 @@
 from abc import ABC, abstractmethod
 from typing import List, Optional, Dict, Any
 from .completion_response import CompletionsResponse
+from .scheduler import RequestScheduler, get_scheduler
 
 
 class Provider(ABC):
@@ -9,6 +10,15 @@ class Provider(ABC):
     def __init__(self, name: str):
         self.name = name
     
+    @property
+    def scheduler(self) -> RequestScheduler:
+        """Rate limiting and retries shared by all instances of the provider.
+
+        Created on first use, so providers that only wrap other providers
+        never get one.
+        """
+        return get_scheduler(self.name)
+
     @abstractmethod
     async def completions(self, messages: List[Dict[str, Any]], temperature: float, model: str, tools: Optional[List[Dict[str, Any]]] = None) -> Optional[CompletionsResponse]:
         """Get completions from the AI provider"""
@@ -0,0 +1,29 @@
+import time
+from typing import List, Optional, Dict, Any
+from .base import Provider
+from .completion_response import CompletionsResponse
+from .metrics import observe_completion
+
+
+class MeteredProvider(Provider):
+    """Wraps a provider so every completion is recorded in the metrics"""
+
+    def __init__(self, provider: Provider):
+        super().__init__(provider.name)
+        self.provider = provider
+
+    async def completions(self, messages: List[Dict[str, Any]], temperature: float, model: str,
+                          tools: Optional[List[Dict[str, Any]]] = None) -> Optional[CompletionsResponse]:
+        start_time = time.perf_counter()
+        response = None
+        try:
+            if tools is not None:
+                response = await self.provider.completions(messages, temperature, model, tools=tools)
+            else:
+                response = await self.provider.completions(messages, temperature, model)
+            return response
+        finally:
+            observe_completion(self.provider.name, model, time.perf_counter() - start_time, response)
+
+    async def tokenize(self, text: str, model: str) -> Optional[int]:
+        return await self.provider.tokenize(text, model)
@@ -13,7 +13,7 @@ class OllamaProvider(Provider):
     
     def __init__(self):
         super().__init__("Ollama")
-        self.url = "http://localhost:11434/v1/chat/completions"
+        self.url = f"{os.getenv('OLLAMA_HOST', 'http://localhost:11434')}/v1/chat/completions"
     
     async def completions(self, messages: List[Dict[str, Any]], temperature: float, model: str) -> Optional[CompletionsResponse]:
         """Call Ollama API using REST"""
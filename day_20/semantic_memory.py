@@ -0,0 +1,174 @@
+import asyncio
+import os
+import time
+from typing import List, Dict, Optional, Tuple
+from qdrant_client import QdrantClient
+from qdrant_client.models import PointStruct, VectorParams, Distance
+from providers.metrics import QDRANT_QUERY_SECONDS
+from embedding_batcher import get_embedding_batcher
+from tracing import traced
+
+COLLECTION_NAME = "chat_messages"
+EMBEDDING_MODEL = "evilfreelancer/enbeddrus:latest"
+
+
+class SemanticMemory:
+    """Vector index over stored chat messages for long-term recall.
+
+    Messages are queued at write time and embedded in batches by a background
+    task, so adding a message never waits for Ollama. Vectors are kept in a
+    local on-disk Qdrant collection next to the SQLite history database.
+    """
+
+    def __init__(
+        self,
+        db_path: str = "chat_history.db",
+        model: str = EMBEDDING_MODEL,
+        batch_size: int = 16,
+        flush_interval: float = 0.5,
+    ):
+        self.index_path = f"{os.path.splitext(db_path)[0]}_vectors"
+        self.model = model
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.client = QdrantClient(path=self.index_path)
+        self.batcher = get_embedding_batcher(model)
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+        self._lock = asyncio.Lock()
+        # Bumped by delete_all(), messages queued before that are not indexed
+        self._generation = 0
+        self._clearing: Optional[asyncio.Task] = None
+
+    def add_message(self, message_id: int, role: str, content: str):
+        """Queue a stored message for background embedding"""
+        if not content.strip():
+            return
+        self._ensure_worker()
+        self._queue.put_nowait((self._generation, message_id, role, content))
+
+    @traced("semantic_memory.search")
+    async def search(
+        self, query: str, limit: int = 5, exclude_ids: Optional[List[int]] = None
+    ) -> List[Dict]:
+        """Get the most relevant past messages for the query"""
+        try:
+            async with self._lock:
+                if not self.client.collection_exists(COLLECTION_NAME):
+                    return []
+            query_embedding = (await self._embed([query]))[0]
+            exclude = set(exclude_ids or [])
+            async with self._lock:
+                with QDRANT_QUERY_SECONDS.labels(collection=COLLECTION_NAME).time():
+                    hits = await asyncio.to_thread(
+                        self.client.search,
+                        collection_name=COLLECTION_NAME,
+                        query_vector=query_embedding,
+                        limit=limit + len(exclude),
+                    )
+            return [
+                {
+                    "id": hit.id,
+                    "role": hit.payload.get("role", ""),
+                    "content": hit.payload.get("content", ""),
+                    "score": hit.score,
+                }
+                for hit in hits
+                if hit.id not in exclude
+            ][:limit]
+        except Exception as e:
+            print(f"Error searching semantic memory: {e}")
+            return []
+
+    async def flush(self):
+        """Wait until all queued messages are indexed"""
+        if self._queue is not None:
+            await self._queue.join()
+
+    async def close(self):
+        """Index the remaining messages and stop the background worker"""
+        await self.flush()
+        if self._worker is not None:
+            self._worker.cancel()
+            self._worker = None
+        self.client.close()
+
+    def delete_all(self):
+        """Delete all indexed messages, including queued and in-flight ones"""
+        self._generation += 1
+        if self._lock.locked():
+            # A search or upsert is using the client, delete once it is done
+            self._clearing = asyncio.get_running_loop().create_task(self._delete_locked())
+        else:
+            self._delete_collection()
+
+    async def _delete_locked(self):
+        async with self._lock:
+            self._delete_collection()
+
+    def _delete_collection(self):
+        if self.client.collection_exists(COLLECTION_NAME):
+            self.client.delete_collection(COLLECTION_NAME)
+
+    def _ensure_worker(self):
+        if self._queue is None:
+            self._queue = asyncio.Queue()
+        if self._worker is None or self._worker.done():
+            self._worker = asyncio.get_running_loop().create_task(self._run())
+
+    async def _run(self):
+        while True:
+            batch = await self._next_batch()
+            try:
+                await self._index(batch)
+            except Exception as e:
+                print(f"Error indexing {len(batch)} messages: {e}")
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+    async def _next_batch(self) -> List[Tuple[int, int, str, str]]:
+        """Collect up to batch_size messages, waiting at most flush_interval"""
+        batch = [await self._queue.get()]
+        deadline = time.monotonic() + self.flush_interval
+        while len(batch) < self.batch_size:
+            timeout = deadline - time.monotonic()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _index(self, batch: List[Tuple[int, int, str, str]]):
+        batch = [item for item in batch if item[0] == self._generation]
+        if not batch:
+            return
+        embeddings = await self._embed([content for _, _, _, content in batch])
+        async with self._lock:
+            # Skip messages whose history was cleared while they were embedded
+            points = [
+                PointStruct(
+                    id=message_id,
+                    vector=embedding,
+                    payload={"role": role, "content": content},
+                )
+                for (generation, message_id, role, content), embedding in zip(batch, embeddings)
+                if generation == self._generation
+            ]
+            if not points:
+                return
+            if not self.client.collection_exists(COLLECTION_NAME):
+                self.client.create_collection(
+                    collection_name=COLLECTION_NAME,
+                    vectors_config=VectorParams(
+                        size=len(embeddings[0]), distance=Distance.COSINE
+                    ),
+                )
+            await asyncio.to_thread(
+                self.client.upsert, collection_name=COLLECTION_NAME, points=points
+            )
+
+    async def _embed(self, texts: List[str]) -> List[List[float]]:
+        return await self.batcher.embed_many(texts)
@@ -0,0 +1,160 @@
+import json
+from dataclasses import dataclass
+from typing import List, Dict, Optional
+from providers.base import Provider
+from history_store import HistoryStore
+from tracing import traced
+
+FOLD_SYSTEM_PROMPT = """You are a helpful assistant that maintains a running summary of a chat conversation. You are given the current summary and the new messages that happened after it. Return an updated summary that merges the new information into the existing one. Keep the key facts, decisions and open questions. Keep the summary under 200 words."""
+
+LEVEL_TITLES = {0: "Chat summary (recent)"}
+
+
+@dataclass
+class FoldResult:
+    """Result of folding new content into a summary level"""
+
+    level: int
+    summary: str
+    messages_folded: int
+    prompt_tokens: int
+    full_history_tokens: int
+
+    @property
+    def saved_tokens(self) -> int:
+        return self.full_history_tokens - self.prompt_tokens
+
+
+class IncrementalSummarizer:
+    """Hierarchical rolling summarizer.
+
+    Level 0 holds the summary of the most recent turns. Each fold sends only the
+    current level summary plus the new turns, so the prompt size does not depend
+    on the conversation length. After `fanout` folds a level is itself folded into
+    the level above and reset, which keeps older context in coarser summaries.
+    """
+
+    def __init__(
+        self,
+        provider: Provider,
+        store: HistoryStore,
+        model: str,
+        fanout: int = 4,
+        max_levels: int = 3,
+        temperature: float = 0.3,
+    ):
+        self.provider = provider
+        self.store = store
+        self.model = model
+        self.fanout = fanout
+        self.max_levels = max_levels
+        self.temperature = temperature
+
+    def get_context_messages(self) -> List[Dict[str, str]]:
+        """Get summary system messages, oldest level first"""
+        return [
+            {
+                "role": "system",
+                "content": f"{self._level_title(summary['level'])}: {summary['content']}",
+            }
+            for summary in self.store.get_summaries()
+        ]
+
+    @traced("summarizer.fold")
+    async def fold(self, new_messages: List[Dict[str, str]]) -> Optional[FoldResult]:
+        """Fold new chat turns into the level 0 summary"""
+        if not new_messages:
+            return None
+
+        new_text = self._format_messages(new_messages)
+        new_tokens = await self._count_tokens(new_text)
+        folded_tokens = self.store.get_folded_tokens()
+
+        result = await self._fold_level(0, new_text, len(new_messages), "New messages")
+        if result is None:
+            return None
+
+        # Re-summarizing the full history would have sent every folded turn again
+        result.full_history_tokens = (
+            await self._count_tokens(FOLD_SYSTEM_PROMPT) + folded_tokens + new_tokens
+        )
+        self.store.add_fold_stats(
+            level=0,
+            messages_folded=result.messages_folded,
+            new_tokens=new_tokens,
+            prompt_tokens=result.prompt_tokens,
+            full_history_tokens=result.full_history_tokens,
+        )
+        return result
+
+    async def _fold_level(
+        self, level: int, new_text: str, messages_folded: int, new_title: str
+    ) -> Optional[FoldResult]:
+        summaries = {s["level"]: s for s in self.store.get_summaries()}
+        current = summaries.get(level)
+        current_text = current["content"] if current else ""
+        folds = current["folds"] if current else 0
+
+        prompt = [
+            {"role": "system", "content": FOLD_SYSTEM_PROMPT},
+            {
+                "role": "user",
+                "content": f"Current summary:\n{current_text or '(empty)'}\n\n{new_title}:\n{new_text}",
+            },
+        ]
+
+        response = await self.provider.completions(
+            messages=prompt, temperature=self.temperature, model=self.model
+        )
+        if not response or not response.text:
+            print(f"Error folding summary level {level}: empty response")
+            return None
+
+        prompt_tokens = response.prompt_tokens or response.prompt_tokens_calculated
+        if prompt_tokens is None:
+            prompt_tokens = await self._count_tokens(
+                json.dumps(prompt, separators=(",", ":"), ensure_ascii=False)
+            )
+
+        result = FoldResult(
+            level=level,
+            summary=response.text,
+            messages_folded=messages_folded,
+            prompt_tokens=prompt_tokens,
+            full_history_tokens=prompt_tokens,
+        )
+
+        folds += 1
+        if folds >= self.fanout and level + 1 < self.max_levels:
+            # Promote this level into the coarser one above and start it over
+            promoted = await self._fold_level(
+                level + 1, response.text, messages_folded, "Newer summary"
+            )
+            if promoted is not None:
+                self.store.add_fold_stats(
+                    level=level + 1,
+                    messages_folded=messages_folded,
+                    new_tokens=0,
+                    prompt_tokens=promoted.prompt_tokens,
+                    full_history_tokens=promoted.prompt_tokens,
+                )
+                self.store.delete_summary(level)
+                return result
+
+        self.store.set_summary(level, response.text, folds)
+        return result
+
+    async def _count_tokens(self, text: str) -> int:
+        count = await self.provider.tokenize(text, self.model)
+        if isinstance(count, int):
+            return count
+        # Rough estimate when the provider cannot tokenize
+        return len(text) // 4
+
+    @staticmethod
+    def _format_messages(messages: List[Dict[str, str]]) -> str:
+        return "\n".join(f"{msg['role']}: {msg['content']}" for msg in messages)
+
+    @staticmethod
+    def _level_title(level: int) -> str:
+        return LEVEL_TITLES.get(level, f"Chat summary (earlier, level {level})")
@@ -1,8 +1,13 @@
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.responses import Response
 from pydantic import BaseModel
+from starlette.routing import Match
 from typing import List, Optional
 import sqlite3
 import os
+import time
+from prometheus_client import CONTENT_TYPE_LATEST, generate_latest
+from metrics import HTTP_REQUEST_SECONDS, HTTP_REQUESTS, HTTP_IN_FLIGHT, DB_QUERY_SECONDS
 
 # Initialize FastAPI app
 app = FastAPI(title="TODO API", description="A simple TODO list API with FastAPI and SQLite")
@@ -50,7 +55,39 @@ class Todo(BaseModel):
     class Config:
         from_attributes = True
 
+def get_route_template(request: Request) -> str:
+    """Get the route path template, e.g. /todos/{todo_id}, to keep metric labels bounded"""
+    for route in app.routes:
+        match, _ = route.matches(request.scope)
+        if match == Match.FULL:
+            return route.path
+    return "unmatched"
+
+@app.middleware("http")
+async def record_request_metrics(request: Request, call_next):
+    """Record latency and status of every API request"""
+    if request.url.path == "/metrics":
+        return await call_next(request)
+
+    HTTP_IN_FLIGHT.inc()
+    start_time = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        HTTP_IN_FLIGHT.dec()
+        route = get_route_template(request)
+        HTTP_REQUEST_SECONDS.labels(method=request.method, route=route).observe(time.perf_counter() - start_time)
+        HTTP_REQUESTS.labels(method=request.method, route=route, status=str(status)).inc()
+
 # API routes
+@app.get("/metrics", include_in_schema=False)
+def metrics():
+    """Prometheus metrics"""
+    return Response(content=generate_latest(), media_type=CONTENT_TYPE_LATEST)
+
 @app.get("/")
 def read_root():
     """Root endpoint with API information"""
@@ -61,7 +98,8 @@ def get_todos():
     """Get all todos"""
     conn = sqlite3.connect(DB_NAME)
     cursor = conn.cursor()
-    cursor.execute("SELECT id, title, description, completed FROM todos")
+    with DB_QUERY_SECONDS.labels(operation="select").time():
+        cursor.execute("SELECT id, title, description, completed FROM todos")
     todos = cursor.fetchall()
     conn.close()
     
@@ -79,7 +117,8 @@ def get_todo(todo_id: int):
     """Get a specific todo by ID"""
     conn = sqlite3.connect(DB_NAME)
     cursor = conn.cursor()
-    cursor.execute("SELECT id, title, description, completed FROM todos WHERE id = ?", (todo_id,))
+    with DB_QUERY_SECONDS.labels(operation="select").time():
+        cursor.execute("SELECT id, title, description, completed FROM todos WHERE id = ?", (todo_id,))
     todo = cursor.fetchone()
     conn.close()
     
@@ -98,10 +137,11 @@ def create_todo(todo: TodoCreate):
     """Create a new todo"""
     conn = sqlite3.connect(DB_NAME)
     cursor = conn.cursor()
-    cursor.execute(
-        "INSERT INTO todos (title, description, completed) VALUES (?, ?, ?)",
-        (todo.title, todo.description, False)
-    )
+    with DB_QUERY_SECONDS.labels(operation="insert").time():
+        cursor.execute(
+            "INSERT INTO todos (title, description, completed) VALUES (?, ?, ?)",
+            (todo.title, todo.description, False)
+        )
     todo_id = cursor.lastrowid
     conn.commit()
     conn.close()
@@ -119,7 +159,8 @@ def update_todo(todo_id: int, todo_update: TodoUpdate):
     # First check if todo exists
     conn = sqlite3.connect(DB_NAME)
     cursor = conn.cursor()
-    cursor.execute("SELECT id, title, description, completed FROM todos WHERE id = ?", (todo_id,))
+    with DB_QUERY_SECONDS.labels(operation="select").time():
+        cursor.execute("SELECT id, title, description, completed FROM todos WHERE id = ?", (todo_id,))
     existing_todo = cursor.fetchone()
     
     if not existing_todo:
@@ -131,10 +172,11 @@ def update_todo(todo_id: int, todo_update: TodoUpdate):
     description = todo_update.description if todo_update.description is not None else existing_todo[2]
     completed = todo_update.completed if todo_update.completed is not None else bool(existing_todo[3])
     
-    cursor.execute(
-        "UPDATE todos SET title = ?, description = ?, completed = ? WHERE id = ?",
-        (title, description, completed, todo_id)
-    )
+    with DB_QUERY_SECONDS.labels(operation="update").time():
+        cursor.execute(
+            "UPDATE todos SET title = ?, description = ?, completed = ? WHERE id = ?",
+            (title, description, completed, todo_id)
+        )
     conn.commit()
     conn.close()
     
@@ -150,7 +192,8 @@ def delete_todo(todo_id: int):
     """Delete a todo"""
     conn = sqlite3.connect(DB_NAME)
     cursor = conn.cursor()
-    cursor.execute("DELETE FROM todos WHERE id = ?", (todo_id,))
+    with DB_QUERY_SECONDS.labels(operation="delete").time():
+        cursor.execute("DELETE FROM todos WHERE id = ?", (todo_id,))
     rows_affected = cursor.rowcount
     conn.commit()
     conn.close()
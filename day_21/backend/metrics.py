@@ -0,0 +1,13 @@
+from prometheus_client import Counter, Gauge, Histogram
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# HTTP and database metrics of the API
+HTTP_REQUEST_SECONDS = Histogram(
+    "http_request_duration_seconds", "Request latency by route", ["method", "route"], buckets=LATENCY_BUCKETS
+)
+HTTP_REQUESTS = Counter("http_requests_total", "Requests by route and status", ["method", "route", "status"])
+HTTP_IN_FLIGHT = Gauge("http_requests_in_flight", "Requests being handled")
+DB_QUERY_SECONDS = Histogram(
+    "db_query_duration_seconds", "SQLite query latency by operation", ["operation"], buckets=LATENCY_BUCKETS
+)
@@ -13,7 +13,9 @@ from const import (
     MAKE_FILES_SYSTEM_PROMPT,
     HELP_WITH_CODE_SYSTEM_PROMPT,
     GIT_COMMIT_SYSTEM_PROMPT,
+    CONTEXT_TOKEN_BUDGET,
 )
+from project_index import ProjectIndex
 # from providers.ollama_provider import OllamaProvider
 from providers.yandex_provider import YandexProvider
 
@@ -22,6 +24,7 @@ class AICoder:
     def __init__(self):
         self.allowed_root = None
         self.current_dir = None
+        self.index = None
         # self.provider = OllamaProvider()
         self.provider = YandexProvider()
 
@@ -45,6 +48,7 @@ class AICoder:
 
         self.allowed_root = folder
         self.current_dir = folder
+        self.index = ProjectIndex(folder)
         return f"Working directory set to: {folder}\nAll file operations restricted to this directory."
 
     def read_file(self, path: Path) -> str:
@@ -103,18 +107,13 @@ class AICoder:
             return f"Error listing files: {e}"
 
     def read_all_files(self) -> str:
-        """Read all files in directory for AI context"""
+        """Read project text files for AI context, re-reading only changed files"""
         if not self.current_dir:
             return ""
 
-        files_content = []
-        for path in sorted(self.current_dir.rglob("*")):
-            if path.is_file():
-                if self.is_safe_path(path):
-                    content = self.read_file(path)
-                    rel_path = path.relative_to(self.current_dir)
-                    files_content.append(f"\n=== {rel_path} ===\n{content}")
-        return "\n".join(files_content)
+        self.index.refresh()
+        print(self.index.format_stats())
+        return self.index.build_context(max_tokens=CONTEXT_TOKEN_BUDGET)
 
     def make_files(self, prompt: str) -> str:
         """Create/update files based on user request"""
@@ -5,6 +5,9 @@ from dotenv import load_dotenv
 
 load_dotenv()
 
+# Approximate token budget for project files included in /make and /help prompts
+CONTEXT_TOKEN_BUDGET = int(os.environ.get("CONTEXT_TOKEN_BUDGET", "24000"))
+
 # OLLAMA_HOST = os.environ.get("OLLAMA_HOST", "http://localhost:11434")
 # DEFAULT_MODEL = os.environ.get("OLLAMA_MODEL", "llama3.2")
 
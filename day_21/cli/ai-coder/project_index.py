@@ -0,0 +1,233 @@
+"""Incremental project context indexer for AI Coder"""
+
+import os
+import re
+from dataclasses import dataclass
+from pathlib import Path
+from typing import List, Dict, Optional, Tuple
+
+# Always skipped, whether or not the project has a .gitignore
+DEFAULT_IGNORES = [
+    ".git/", ".hg/", ".svn/", "node_modules/", "__pycache__/", ".venv/", "venv/", "env/",
+    ".mypy_cache/", ".pytest_cache/", ".ruff_cache/", ".tox/", ".idea/", ".vscode/",
+    "dist/", "build/", "*.egg-info/", "*.pyc", "*.pyo", "*.so", "*.dll", "*.exe",
+    ".DS_Store", "*.lock", "package-lock.json",
+]
+MAX_FILE_SIZE = 256 * 1024
+SNIFF_SIZE = 8192
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token estimate, about 4 characters per token"""
+    return len(text) // 4 + 1
+
+
+def _pattern_to_regex(pattern: str) -> str:
+    """Translate a gitignore glob to a regex matching a relative path"""
+    result = ""
+    i = 0
+    while i < len(pattern):
+        c = pattern[i]
+        if pattern[i:i + 3] == "**/":
+            result += "(?:.*/)?"
+            i += 3
+            continue
+        if pattern[i:i + 2] == "**":
+            result += ".*"
+            i += 2
+            continue
+        if c == "*":
+            result += "[^/]*"
+        elif c == "?":
+            result += "[^/]"
+        elif c == "[":
+            end = pattern.find("]", i + 1)
+            if end == -1:
+                result += re.escape(c)
+            else:
+                result += "[" + pattern[i + 1:end].replace("!", "^", 1) + "]"
+                i = end
+        else:
+            result += re.escape(c)
+        i += 1
+    return result
+
+
+@dataclass
+class IgnoreRule:
+    base: str
+    regex: "re.Pattern"
+    negate: bool
+    dir_only: bool
+
+    def matches(self, rel_path: str, is_dir: bool) -> bool:
+        if self.dir_only and not is_dir:
+            return False
+        if self.base:
+            if not rel_path.startswith(self.base + "/"):
+                return False
+            rel_path = rel_path[len(self.base) + 1:]
+        return self.regex.fullmatch(rel_path) is not None
+
+
+def parse_ignore_rules(lines: List[str], base: str = "") -> List[IgnoreRule]:
+    """Parse .gitignore lines; `base` is the directory of the file relative to the root"""
+    rules = []
+    for line in lines:
+        line = line.rstrip("\n").rstrip()
+        if not line or line.startswith("#"):
+            continue
+        negate = line.startswith("!")
+        if negate:
+            line = line[1:]
+        if line.startswith("\\"):
+            line = line[1:]
+        dir_only = line.endswith("/")
+        line = line.rstrip("/")
+        if not line:
+            continue
+        # A pattern with a slash is relative to its .gitignore, otherwise it matches at any depth
+        anchored = "/" in line
+        line = line.lstrip("/")
+        regex = _pattern_to_regex(line)
+        if not anchored:
+            regex = "(?:.*/)?" + regex
+        rules.append(IgnoreRule(base, re.compile(regex), negate, dir_only))
+    return rules
+
+
+@dataclass
+class CachedFile:
+    mtime_ns: int
+    size: int
+    content: Optional[str]  # None for binary or unreadable files
+    tokens: int
+
+
+class ProjectIndex:
+    """Cached view of the text files of a project.
+
+    refresh() walks the project, skipping everything matched by .gitignore
+    files (including nested ones) and DEFAULT_IGNORES without descending into
+    ignored directories. File contents are cached by (path, mtime, size), so
+    only new or changed files are read again. Binary files are detected by
+    sniffing their first bytes and left out.
+    """
+
+    def __init__(self, root: Path, max_file_size: int = MAX_FILE_SIZE):
+        self.root = root.resolve()
+        self.max_file_size = max_file_size
+        self.files: Dict[str, CachedFile] = {}
+        self.last_read = 0
+        self.last_reused = 0
+        self.last_removed = 0
+
+    def _is_ignored(self, rel_path: str, is_dir: bool, rules: List[IgnoreRule]) -> bool:
+        ignored = False
+        for rule in rules:
+            if rule.matches(rel_path, is_dir):
+                ignored = not rule.negate
+        return ignored
+
+    def _read(self, path: Path, size: int) -> Optional[str]:
+        if size > self.max_file_size:
+            return None
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+        except OSError:
+            return None
+        if b"\0" in data[:SNIFF_SIZE]:
+            return None
+        try:
+            return data.decode("utf-8")
+        except UnicodeDecodeError:
+            return None
+
+    def refresh(self) -> Tuple[int, int, int]:
+        """Bring the cache up to date, returns (read, reused, removed) file counts"""
+        read = reused = 0
+        seen = set()
+        base_rules = parse_ignore_rules(DEFAULT_IGNORES)
+        rules_by_dir: Dict[str, List[IgnoreRule]] = {}
+
+        for dir_path, dir_names, file_names in os.walk(self.root):
+            rel_dir = os.path.relpath(dir_path, self.root).replace(os.sep, "/")
+            rel_dir = "" if rel_dir == "." else rel_dir
+            parent = rel_dir.rpartition("/")[0] if rel_dir else None
+            rules = list(rules_by_dir.get(parent, base_rules)) if rel_dir else list(base_rules)
+            if ".gitignore" in file_names:
+                try:
+                    with open(os.path.join(dir_path, ".gitignore"), "r", encoding="utf-8") as f:
+                        rules += parse_ignore_rules(f.readlines(), rel_dir)
+                except (OSError, UnicodeDecodeError):
+                    pass
+            rules_by_dir[rel_dir] = rules
+
+            def rel(name: str) -> str:
+                return f"{rel_dir}/{name}" if rel_dir else name
+
+            dir_names[:] = sorted(
+                name for name in dir_names
+                if not os.path.islink(os.path.join(dir_path, name))
+                and not self._is_ignored(rel(name), True, rules)
+            )
+
+            for name in file_names:
+                rel_path = rel(name)
+                if self._is_ignored(rel_path, False, rules):
+                    continue
+                path = Path(dir_path) / name
+                try:
+                    path.resolve().relative_to(self.root)
+                    stat = path.stat()
+                except (OSError, ValueError):
+                    # Symlinks pointing outside the project are skipped
+                    continue
+                seen.add(rel_path)
+                cached = self.files.get(rel_path)
+                if cached and cached.mtime_ns == stat.st_mtime_ns and cached.size == stat.st_size:
+                    reused += 1
+                    continue
+                content = self._read(path, stat.st_size)
+                self.files[rel_path] = CachedFile(
+                    stat.st_mtime_ns, stat.st_size, content,
+                    estimate_tokens(content) if content is not None else 0,
+                )
+                read += 1
+
+        removed = [path for path in self.files if path not in seen]
+        for path in removed:
+            del self.files[path]
+        self.last_read, self.last_reused, self.last_removed = read, reused, len(removed)
+        return read, reused, len(removed)
+
+    def build_context(self, max_tokens: Optional[int] = None) -> str:
+        """Concatenate text files in path order, within the token budget.
+
+        Files that do not fit are listed by path only, so the model still
+        knows they exist.
+        """
+        parts = []
+        omitted = []
+        used = 0
+        for rel_path in sorted(self.files):
+            cached = self.files[rel_path]
+            if cached.content is None:
+                continue
+            if max_tokens is not None and used + cached.tokens > max_tokens:
+                omitted.append(rel_path)
+                continue
+            used += cached.tokens
+            parts.append(f"\n=== {rel_path} ===\n{cached.content}")
+        if omitted:
+            parts.append("\n=== Files omitted to fit the context budget ===\n" + "\n".join(omitted))
+        return "\n".join(parts)
+
+    def format_stats(self) -> str:
+        text_files = [f for f in self.files.values() if f.content is not None]
+        tokens = sum(f.tokens for f in text_files)
+        return (
+            f"Indexed {len(text_files)} text files (~{tokens} tokens): "
+            f"{self.last_read} read, {self.last_reused} cached, {self.last_removed} removed"
+        )
@@ -6,6 +6,8 @@ AI Coder - Command-line utility for programming assistance using Ollama
 import json
 import subprocess
 import readline
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import List, Optional
 from pathlib import Path
 
 
@@ -14,7 +16,22 @@ from const import (
     HELP_WITH_CODE_SYSTEM_PROMPT,
     GIT_COMMIT_SYSTEM_PROMPT,
     CODE_REVIEW_SYSTEM_PROMPT,
+    FILE_REVIEW_SYSTEM_PROMPT,
+    REVIEW_MERGE_SYSTEM_PROMPT,
+    REVIEW_CHUNK_TOKENS,
+    REVIEW_WORKERS,
+    REVIEW_RETRIES,
+    CONTEXT_TOKEN_BUDGET,
+    CODE_INDEX_OLLAMA_HOST,
+    CODE_EMBEDDING_MODEL,
+    CODE_INDEX_DIR,
+    RETRIEVAL_TOP_K,
 )
+from code_index import CodeIndex, OllamaEmbedder
+from diff_review import split_diff, make_review_units, group_by_budget, truncate_to_budget
+from file_edits import EditError, apply_edits, group_edits
+from project_index import ProjectIndex, estimate_tokens
+from streaming import StreamResult, stream_to_terminal
 # from providers.ollama_provider import OllamaProvider
 from providers.yandex_provider import YandexProvider
 
@@ -23,9 +40,21 @@ class AICoder:
     def __init__(self):
         self.allowed_root = None
         self.current_dir = None
+        self.index = None
+        self.code_index = None
+        self.streamed = False
         # self.provider = OllamaProvider()
         self.provider = YandexProvider()
 
+    def ask(self, user_prompt: str, system_prompt: str, echo: bool = True) -> StreamResult:
+        """Stream a response to the terminal, Ctrl-C cancels it"""
+        self.streamed = echo
+        return stream_to_terminal(
+            self.provider.generate_stream(user_prompt, system_prompt),
+            echo=echo,
+            token_count=lambda: self.provider.last_completion_tokens,
+        )
+
     def is_safe_path(self, path: Path) -> bool:
         """Check if path is within allowed directory"""
         if not self.allowed_root:
@@ -46,6 +75,10 @@ class AICoder:
 
         self.allowed_root = folder
         self.current_dir = folder
+        self.index = ProjectIndex(folder)
+        self.code_index = CodeIndex(
+            self.index, OllamaEmbedder(CODE_EMBEDDING_MODEL, CODE_INDEX_OLLAMA_HOST), Path(CODE_INDEX_DIR)
+        )
         return f"Working directory set to: {folder}\nAll file operations restricted to this directory."
 
     def read_file(self, path: Path) -> str:
@@ -104,25 +137,37 @@ class AICoder:
             return f"Error listing files: {e}"
 
     def read_all_files(self) -> str:
-        """Read all files in directory for AI context"""
+        """Read project text files for AI context, re-reading only changed files"""
         if not self.current_dir:
             return ""
 
-        files_content = []
-        for path in sorted(self.current_dir.rglob("*")):
-            if path.is_file():
-                if self.is_safe_path(path):
-                    content = self.read_file(path)
-                    rel_path = path.relative_to(self.current_dir)
-                    files_content.append(f"\n=== {rel_path} ===\n{content}")
-        return "\n".join(files_content)
+        self.index.refresh()
+        print(self.index.format_stats())
+        return self.index.build_context(max_tokens=CONTEXT_TOKEN_BUDGET)
+
+    def relevant_context(self, query: str, whole_files: bool = False) -> str:
+        """File tree and code relevant to the query, all files if retrieval is unavailable"""
+        if not self.current_dir:
+            return ""
+
+        try:
+            files, chunks = self.code_index.update()
+            if chunks:
+                print(f"Embedded {chunks} chunks from {files} changed files")
+            print(self.code_index.format_stats())
+            return self.code_index.build_context(
+                query, max_tokens=CONTEXT_TOKEN_BUDGET, top_k=RETRIEVAL_TOP_K, whole_files=whole_files
+            )
+        except Exception as e:
+            print(f"Code retrieval unavailable ({e}), sending project files instead")
+            return self.read_all_files()
 
     def make_files(self, prompt: str) -> str:
         """Create/update files based on user request"""
         if not self.current_dir:
             return "No folder selected. Use /open PATH first."
 
-        all_files = self.read_all_files()
+        all_files = self.relevant_context(prompt, whole_files=True)
 
         user_prompt = f"""Project structure and existing files:
 {all_files if all_files else "(empty directory)"}
@@ -131,7 +176,10 @@ User request: {prompt}
 
 Create or modify the necessary files to fulfill this request. Consider the existing files and their relationships."""
 
-        response = self.provider.generate(user_prompt, MAKE_FILES_SYSTEM_PROMPT)
+        result = self.ask(user_prompt, MAKE_FILES_SYSTEM_PROMPT, echo=False)
+        if result.cancelled:
+            return "Cancelled, no files were modified."
+        response = result.text
 
         try:
             response = response.strip()
@@ -168,6 +216,28 @@ Create or modify the necessary files to fulfill this request. Consider the exist
             else:
                 results.append(f"Failed to write: {path}")
 
+        for path, edits in group_edits(data.get("edits", [])):
+            file_path = self.current_dir / path
+            if not self.is_safe_path(file_path):
+                results.append(
+                    f"BLOCKED: Attempted to edit outside allowed directory: {path}"
+                )
+                continue
+            if not file_path.is_file():
+                results.append(f"Failed to edit: {path} (file does not exist)")
+                continue
+
+            try:
+                content = apply_edits(path, self.read_file(file_path), edits)
+            except EditError as e:
+                results.append(f"Failed to edit: {path} ({e}), file left unchanged")
+                continue
+
+            if self.write_file(file_path, content):
+                results.append(f"Edited: {path} ({len(edits)} change{'s' if len(edits) > 1 else ''})")
+            else:
+                results.append(f"Failed to write: {path}")
+
         for path in data.get("delete", []):
             file_path = self.current_dir / path
             if not self.is_safe_path(file_path):
@@ -191,7 +261,7 @@ Create or modify the necessary files to fulfill this request. Consider the exist
         if not self.current_dir:
             return "No folder selected. Use /open PATH first."
 
-        all_files = self.read_all_files()
+        all_files = self.relevant_context(question)
         if not all_files:
             return "No files found in the project."
 
@@ -202,7 +272,7 @@ Question: {question}
 
 Provide a comprehensive answer based on the code above."""
 
-        return self.provider.generate(user_prompt, HELP_WITH_CODE_SYSTEM_PROMPT)
+        return self.ask(user_prompt, HELP_WITH_CODE_SYSTEM_PROMPT).text
 
     def git_commit_message(self) -> str:
         """Generate git commit message from staged/unstaged changes"""
@@ -256,7 +326,7 @@ Provide a comprehensive answer based on the code above."""
 Summary of changed files:
 {diff_stat}"""
 
-            return self.provider.generate(user_prompt, GIT_COMMIT_SYSTEM_PROMPT)
+            return self.ask(user_prompt, GIT_COMMIT_SYSTEM_PROMPT).text
 
         except subprocess.SubprocessError as e:
             return f"Git error: {str(e)}"
@@ -328,6 +398,9 @@ Summary of changed files:
             )
             
             commit_messages = log_result.stdout.strip()
+
+            if estimate_tokens(diff_content) > REVIEW_CHUNK_TOKENS:
+                return self.review_in_parts(diff_content, commit_messages)
             
             user_prompt = f"""Review the following code changes between the last two commits:
 
@@ -339,7 +412,7 @@ Code changes:
 
 Please provide a detailed code review based on these changes."""
 
-            return self.provider.generate(user_prompt, CODE_REVIEW_SYSTEM_PROMPT)
+            return self.ask(user_prompt, CODE_REVIEW_SYSTEM_PROMPT).text
 
         except subprocess.SubprocessError as e:
             return f"Git error: {str(e)}"
@@ -348,6 +421,119 @@ Please provide a detailed code review based on these changes."""
         except Exception as e:
             return f"Error during review: {str(e)}"
 
+    def generate_parallel(self, prompts: List[str], system_prompt: str, action: str) -> Optional[List[str]]:
+        """Run prompts on REVIEW_WORKERS threads, returns None if cancelled with Ctrl-C.
+
+        Prompts answered with an error are retried REVIEW_RETRIES times,
+        results that still failed keep the error message.
+        """
+        results = [""] * len(prompts)
+        pending = list(range(len(prompts)))
+        executor = ThreadPoolExecutor(max_workers=REVIEW_WORKERS)
+        try:
+            for attempt in range(REVIEW_RETRIES + 1):
+                if attempt:
+                    print(f"Retrying {len(pending)} failed requests")
+                futures = {
+                    executor.submit(self.provider.generate, prompts[i], system_prompt): i
+                    for i in pending
+                }
+                for done, future in enumerate(as_completed(futures), 1):
+                    results[futures[future]] = future.result()
+                    print(f"\r{action}: {done}/{len(futures)}", end="", flush=True)
+                print()
+                pending = [i for i in pending if is_error(results[i])]
+                if not pending:
+                    break
+        except KeyboardInterrupt:
+            print("\nCancelled.")
+            executor.shutdown(wait=False, cancel_futures=True)
+            return None
+        executor.shutdown()
+        return results
+
+    def review_in_parts(self, diff_content: str, commit_messages: str) -> str:
+        """Review a large diff file by file in parallel, then merge the findings"""
+        files = split_diff(diff_content)
+        units = make_review_units(files, REVIEW_CHUNK_TOKENS)
+        print(f"Large diff: reviewing {len(units)} parts of {len(files)} files with {REVIEW_WORKERS} workers")
+
+        prompts = [
+            f"""Commit:
+{commit_messages}
+
+Changes in {unit.label}:
+{unit.text}"""
+            for unit in units
+        ]
+        reviews = self.generate_parallel(prompts, FILE_REVIEW_SYSTEM_PROMPT, "Reviewed")
+        if reviews is None:
+            return "Review cancelled."
+        unreviewed = [unit.label for unit, review in zip(units, reviews) if is_error(review)]
+        if len(unreviewed) == len(units):
+            return reviews[0]
+        if unreviewed:
+            print(f"Could not review {len(unreviewed)} parts: {', '.join(unreviewed)}")
+
+        # Each finding gets at most half the budget, so any two of them can be merged
+        finding_budget = REVIEW_CHUNK_TOKENS // 2
+        findings = [
+            truncate_to_budget(f"### {unit.label}\n{review.strip()}", finding_budget)
+            for unit, review in zip(units, reviews)
+            if not is_error(review)
+        ]
+
+        # Merge findings in groups until they fit into the final prompt
+        while estimate_tokens("\n\n".join(findings)) > REVIEW_CHUNK_TOKENS:
+            groups = group_by_budget(findings, REVIEW_CHUNK_TOKENS)
+            merged = self.generate_parallel(
+                ["\n\n".join(group) for group in groups], REVIEW_MERGE_SYSTEM_PROMPT, "Merged"
+            )
+            if merged is None:
+                return "Review cancelled."
+            # Groups whose merge failed keep their findings as they were
+            merged_findings = []
+            for group, text in zip(groups, merged):
+                if is_error(text):
+                    merged_findings.extend(group)
+                else:
+                    merged_findings.append(truncate_to_budget(text, finding_budget))
+            if len(merged_findings) == len(findings):
+                break
+            findings = merged_findings
+
+        changed_files = "\n".join(file.path for file in files)
+        findings_text = truncate_to_budget("\n\n".join(findings), REVIEW_CHUNK_TOKENS)
+        unreviewed_text = "\n".join(unreviewed) or "none"
+        user_prompt = f"""Review the following commit. The diff was too large for one review, so each part was reviewed separately.
+
+Recent commits:
+{commit_messages}
+
+Changed files:
+{changed_files}
+
+Findings by file:
+{findings_text}
+
+Parts that could not be reviewed:
+{unreviewed_text}
+
+Please provide a detailed code review based on these findings. Mention the parts that could not be reviewed, if any."""
+
+        return self.ask(user_prompt, CODE_REVIEW_SYSTEM_PROMPT).text
+
+
+def is_error(text: str) -> bool:
+    """Providers return failed requests as text starting with Error"""
+    return text.startswith("Error")
+
+
+def show(coder: AICoder, output: str):
+    """Print the output of a command unless it was already streamed"""
+    if not coder.streamed:
+        print(output)
+
 
 def main():
     coder = AICoder()
@@ -373,6 +559,7 @@ def main():
 
         if not user_input:
             continue
+        coder.streamed = False
 
         if user_input.startswith("/open "):
             path = user_input[6:].strip()
@@ -389,18 +576,18 @@ def main():
         elif user_input.startswith("/help "):
             question = user_input[6:].strip()
             print("\nAnalyzing code...")
-            print(coder.help_with_code(question))
+            show(coder, coder.help_with_code(question))
 
         elif user_input == "/commit":
             print("\nAnalyzing changes...")
-            print(coder.git_commit_message())
+            show(coder, coder.git_commit_message())
 
         elif user_input == "/git":
             print(coder.git_info())
 
         elif user_input == "/review":
             print("\nAnalyzing code changes...")
-            print(coder.git_review())
+            show(coder, coder.git_review())
 
         elif user_input in ["/exit", "/quit", "exit", "quit"]:
             print("Goodbye!")
@@ -0,0 +1,337 @@
+"""Embedding-based code retrieval for AI Coder"""
+
+import ast
+import hashlib
+import json
+import math
+import os
+import re
+from dataclasses import dataclass, asdict
+from pathlib import Path
+from typing import List, Dict, Optional, Tuple
+import requests
+
+from project_index import ProjectIndex, estimate_tokens
+
+MAX_CHUNK_LINES = 80
+WINDOW_LINES = 60
+MAX_EMBED_CHARS = 2000
+EMBED_BATCH_SIZE = 32
+MAX_TREE_FILES = 400
+INDEX_VERSION = 2
+
+# Start of a top-level definition in languages without an AST parser here; the
+# defined name is captured as `name` (after the keyword) or `binding` (arrow functions)
+DEFINITION_RE = re.compile(
+    r"^(?:export\s+)?(?:default\s+)?(?:pub(?:\(\w+\))?\s+)?(?:async\s+)?(?:static\s+)?"
+    r"(?:(?:def|class|function|func|fn|interface|struct|enum|impl|trait|type|module|object)\b"
+    r"\s*(?:\([^)]*\)\s*)?\*?\s*(?P<name>[\w$]+)?|"
+    r"(?:const|let|var)\s+(?P<binding>[\w$]+)\s*=\s*(?:async\s*)?(?:\([^)]*\)|[\w$]+)\s*=>)"
+)
+MARKDOWN_HEADING_RE = re.compile(r"^#{1,3}\s")
+
+
+@dataclass
+class Chunk:
+    path: str
+    name: str
+    start_line: int
+    end_line: int
+    text: str
+    vector: Optional[List[float]] = None
+
+    @property
+    def label(self) -> str:
+        return f"{self.path}:{self.start_line}-{self.end_line} ({self.name})"
+
+
+def _windows(path: str, lines: List[str], start: int, end: int, name: str) -> List[Chunk]:
+    """Split lines[start:end] into chunks of at most WINDOW_LINES lines"""
+    chunks = []
+    for window_start in range(start, end, WINDOW_LINES):
+        window_end = min(end, window_start + WINDOW_LINES)
+        text = "".join(lines[window_start:window_end])
+        if text.strip():
+            chunks.append(Chunk(path, name, window_start + 1, window_end, text))
+    return chunks
+
+
+def _python_chunks(path: str, content: str) -> Optional[List[Chunk]]:
+    """One chunk per top-level function or class, large classes are split by method"""
+    try:
+        tree = ast.parse(content)
+    except (SyntaxError, ValueError):
+        return None
+
+    lines = content.splitlines(keepends=True)
+    definitions = (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)
+    chunks = []
+    covered = 0  # lines before this index already belong to a chunk
+
+    def first_line(node) -> int:
+        return min([node.lineno] + [d.lineno for d in node.decorator_list]) - 1
+
+    for node in tree.body:
+        if not isinstance(node, definitions):
+            continue
+        start, end = first_line(node), node.end_lineno
+        if start > covered:
+            chunks.extend(_windows(path, lines, covered, start, "module"))
+
+        methods = [n for n in node.body if isinstance(n, definitions)] if isinstance(node, ast.ClassDef) else []
+        if end - start <= MAX_CHUNK_LINES:
+            chunks.append(Chunk(path, node.name, start + 1, end, "".join(lines[start:end])))
+        elif not methods:
+            chunks.extend(_windows(path, lines, start, end, node.name))
+        else:
+            # Class header (docstring, attributes) followed by one chunk per method
+            header_end = first_line(methods[0])
+            chunks.append(Chunk(path, node.name, start + 1, header_end, "".join(lines[start:header_end])))
+            position = header_end
+            for method in methods:
+                method_start, method_end = first_line(method), method.end_lineno
+                if method_start > position:
+                    chunks.extend(_windows(path, lines, position, method_start, node.name))
+                name = f"{node.name}.{method.name}"
+                if method_end - method_start > MAX_CHUNK_LINES:
+                    chunks.extend(_windows(path, lines, method_start, method_end, name))
+                else:
+                    chunks.append(Chunk(path, name, method_start + 1, method_end,
+                                        "".join(lines[method_start:method_end])))
+                position = method_end
+            if end > position:
+                chunks.extend(_windows(path, lines, position, end, node.name))
+        covered = end
+
+    if covered < len(lines):
+        chunks.extend(_windows(path, lines, covered, len(lines), "module"))
+    return chunks
+
+
+def _heuristic_chunks(path: str, content: str) -> List[Chunk]:
+    """Cut at unindented definition lines (or headings in Markdown), then by size"""
+    lines = content.splitlines(keepends=True)
+    pattern = MARKDOWN_HEADING_RE if path.endswith((".md", ".rst")) else DEFINITION_RE
+    starts = [i for i, line in enumerate(lines) if pattern.match(line)]
+    if not starts or starts[0] != 0:
+        starts.insert(0, 0)
+
+    chunks = []
+    for start, end in zip(starts, starts[1:] + [len(lines)]):
+        name = "module"
+        match = pattern.match(lines[start])
+        if match:
+            if pattern is MARKDOWN_HEADING_RE:
+                name = lines[start].lstrip("#").strip()[:60]
+            else:
+                # e.g. `export async function load(` -> load, `const f = (a) => a;` -> f
+                name = match.group("name") or match.group("binding") or name
+        chunks.extend(_windows(path, lines, start, end, name))
+    return chunks
+
+
+def chunk_file(path: str, content: str) -> List[Chunk]:
+    """Split a source file into chunks along function and class boundaries"""
+    if path.endswith(".py"):
+        chunks = _python_chunks(path, content)
+        if chunks is not None:
+            return chunks
+    return _heuristic_chunks(path, content)
+
+
+def _normalize(vector: List[float]) -> List[float]:
+    norm = math.sqrt(sum(x * x for x in vector)) or 1.0
+    # Rounded to keep the on-disk index small, far below what affects the ranking
+    return [round(x / norm, 6) for x in vector]
+
+
+class OllamaEmbedder:
+    """Embeddings from a local Ollama model via /api/embed"""
+
+    def __init__(self, model: str, host: str):
+        self.model = model
+        self.host = host
+
+    def embed(self, texts: List[str]) -> List[List[float]]:
+        vectors = []
+        for i in range(0, len(texts), EMBED_BATCH_SIZE):
+            response = requests.post(
+                f"{self.host}/api/embed",
+                json={"model": self.model, "input": texts[i:i + EMBED_BATCH_SIZE]},
+                timeout=300,
+            )
+            response.raise_for_status()
+            vectors.extend(response.json()["embeddings"])
+        return vectors
+
+
+class CodeIndex:
+    """Chunk embeddings of a project, stored on disk and updated by mtime.
+
+    update() refreshes the ProjectIndex and re-chunks and re-embeds only the
+    files whose mtime or size changed since the stored index was written.
+    build_context() returns the project file tree plus the chunks most
+    similar to the query, within a token budget.
+    """
+
+    def __init__(self, project: ProjectIndex, embedder: OllamaEmbedder, index_dir: Path):
+        self.project = project
+        self.embedder = embedder
+        root_hash = hashlib.sha1(str(project.root).encode("utf-8")).hexdigest()[:16]
+        self.path = index_dir / f"{root_hash}.json"
+        self.files: Dict[str, Dict] = {}
+        self._load()
+
+    def _load(self):
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return
+        if data.get("version") != INDEX_VERSION or data.get("model") != self.embedder.model:
+            return
+        self.files = {
+            path: {**entry, "chunks": [Chunk(**chunk) for chunk in entry["chunks"]]}
+            for path, entry in data.get("files", {}).items()
+        }
+
+    def _save(self):
+        data = {
+            "version": INDEX_VERSION,
+            "model": self.embedder.model,
+            "root": str(self.project.root),
+            "files": {
+                path: {**entry, "chunks": [asdict(chunk) for chunk in entry["chunks"]]}
+                for path, entry in self.files.items()
+            },
+        }
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_suffix(".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False)
+        os.replace(tmp_path, self.path)
+
+    def update(self) -> Tuple[int, int]:
+        """Embed new and changed files, returns (files re-embedded, chunks embedded)"""
+        self.project.refresh()
+        changed = []
+        for rel_path, cached in self.project.files.items():
+            if cached.content is None:
+                continue
+            entry = self.files.get(rel_path)
+            if entry and entry["mtime_ns"] == cached.mtime_ns and entry["size"] == cached.size:
+                continue
+            changed.append(rel_path)
+
+        removed = [path for path in self.files
+                   if path not in self.project.files or self.project.files[path].content is None]
+        for path in removed:
+            del self.files[path]
+
+        new_chunks = []
+        for rel_path in changed:
+            cached = self.project.files[rel_path]
+            chunks = chunk_file(rel_path, cached.content)
+            new_chunks.extend(chunks)
+            self.files[rel_path] = {"mtime_ns": cached.mtime_ns, "size": cached.size, "chunks": chunks}
+
+        if new_chunks:
+            texts = [f"{chunk.path} {chunk.name}\n{chunk.text}"[:MAX_EMBED_CHARS] for chunk in new_chunks]
+            try:
+                vectors = self.embedder.embed(texts)
+            except Exception:
+                # Keep the stored index consistent: changed files get embedded next time
+                for rel_path in changed:
+                    self.files.pop(rel_path, None)
+                raise
+            for chunk, vector in zip(new_chunks, vectors):
+                chunk.vector = _normalize(vector)
+
+        if changed or removed:
+            self._save()
+        return len(changed), len(new_chunks)
+
+    def search(self, query: str, top_k: int) -> List[Tuple[float, Chunk]]:
+        """Chunks most similar to the query, best first"""
+        query_vector = _normalize(self.embedder.embed([query])[0])
+        scored = []
+        for entry in self.files.values():
+            for chunk in entry["chunks"]:
+                if chunk.vector:
+                    score = sum(a * b for a, b in zip(query_vector, chunk.vector))
+                    scored.append((score, chunk))
+        scored.sort(key=lambda item: -item[0])
+        return scored[:top_k]
+
+    def format_tree(self) -> str:
+        """Indented tree of the project's files"""
+        lines = []
+        shown_dirs = set()
+        paths = sorted(self.project.files)
+        for rel_path in paths[:MAX_TREE_FILES]:
+            parts = rel_path.split("/")
+            for depth in range(len(parts) - 1):
+                directory = "/".join(parts[:depth + 1])
+                if directory not in shown_dirs:
+                    shown_dirs.add(directory)
+                    lines.append("  " * depth + parts[depth] + "/")
+            lines.append("  " * (len(parts) - 1) + parts[-1])
+        if len(paths) > MAX_TREE_FILES:
+            lines.append(f"... and {len(paths) - MAX_TREE_FILES} more files")
+        return "\n".join(lines)
+
+    def build_context(self, query: str, max_tokens: int, top_k: int, whole_files: bool = False) -> str:
+        """File tree plus the top_k chunks relevant to the query.
+
+        With whole_files the files containing those chunks are included in
+        full instead, for requests that rewrite files.
+        """
+        if not self.project.files:
+            return ""
+        tree = self.format_tree()
+        parts = [f"Project file tree:\n{tree}"]
+        used = estimate_tokens(tree)
+        results = self.search(query, top_k)
+
+        if whole_files:
+            # Retrieved chunks by file, files in order of their best chunk
+            by_path: Dict[str, List[Chunk]] = {}
+            for _, chunk in results:
+                by_path.setdefault(chunk.path, []).append(chunk)
+            omitted = []
+            for path, chunks in by_path.items():
+                cached = self.project.files.get(path)
+                if cached is not None and cached.content is not None and used + cached.tokens <= max_tokens:
+                    used += cached.tokens
+                    parts.append(f"\n=== {path} ===\n{cached.content}")
+                    continue
+                # Too large to include in full: its relevant parts still allow search/replace edits
+                excerpts = 0
+                for chunk in sorted(chunks, key=lambda c: c.start_line):
+                    tokens = estimate_tokens(chunk.text)
+                    if used + tokens > max_tokens:
+                        continue
+                    used += tokens
+                    excerpts += 1
+                    parts.append(f"\n=== {chunk.label}, excerpt of a larger file ===\n{chunk.text}")
+                if not excerpts:
+                    omitted.append(path)
+            if omitted:
+                parts.append("\nRelevant files left out to fit the context: " + ", ".join(omitted))
+            return "\n".join(parts)
+
+        # Show snippets in file order so neighbouring chunks read naturally
+        selected = []
+        for _, chunk in results:
+            tokens = estimate_tokens(chunk.text)
+            if used + tokens > max_tokens:
+                continue
+            used += tokens
+            selected.append(chunk)
+        for chunk in sorted(selected, key=lambda c: (c.path, c.start_line)):
+            parts.append(f"\n=== {chunk.label} ===\n{chunk.text}")
+        return "\n".join(parts)
+
+    def format_stats(self) -> str:
+        chunks = sum(len(entry["chunks"]) for entry in self.files.values())
+        return f"Code index: {len(self.files)} files, {chunks} chunks ({self.path})"
@@ -5,11 +5,31 @@ from dotenv import load_dotenv
 
 load_dotenv()
 
+# Approximate token budget for project files included in /make and /help prompts
+CONTEXT_TOKEN_BUDGET = int(os.environ.get("CONTEXT_TOKEN_BUDGET", "24000"))
+
+# /review splits diffs larger than this (approximate tokens) into parts reviewed in parallel
+REVIEW_CHUNK_TOKENS = int(os.environ.get("REVIEW_CHUNK_TOKENS", "6000"))
+REVIEW_WORKERS = int(os.environ.get("REVIEW_WORKERS", "4"))
+# Retries of review requests that came back with an error
+REVIEW_RETRIES = int(os.environ.get("REVIEW_RETRIES", "1"))
+
+# Code retrieval for /help and /make: chunks are embedded with a local Ollama model
+CODE_INDEX_OLLAMA_HOST = os.environ.get("OLLAMA_HOST", "http://localhost:11434")
+CODE_EMBEDDING_MODEL = os.environ.get("CODE_EMBEDDING_MODEL", "nomic-embed-text")
+CODE_INDEX_DIR = os.path.expanduser(os.environ.get("CODE_INDEX_DIR", "~/.cache/ai-coder"))
+RETRIEVAL_TOP_K = int(os.environ.get("RETRIEVAL_TOP_K", "12"))
+
 # OLLAMA_HOST = os.environ.get("OLLAMA_HOST", "http://localhost:11434")
 # DEFAULT_MODEL = os.environ.get("OLLAMA_MODEL", "llama3.2")
 
 MAKE_FILES_SYSTEM_PROMPT = """You are a coding assistant that creates/edits files. Output ONLY a JSON object with file operations.
-For each file to create/update, include a "files" array with objects containing:
+To change an existing file, include an "edits" array with search/replace blocks:
+- "path": relative path from project root
+- "search": exact lines copied from the current file, enough of them to be unique
+- "replace": the lines that replace them (empty string to remove them)
+
+To create a new file, include a "files" array with objects containing:
 - "path": relative path from project root
 - "content": complete file content
 
@@ -17,8 +37,10 @@ For deletions, include "delete" array with relative paths.
 
 Example response:
 {
+  "edits": [
+    {"path": "app.js", "search": "function start() {\\n  init();\\n}", "replace": "function start() {\\n  init();\\n  render();\\n}"}
+  ],
   "files": [
-    {"path": "index.html", "content": "<html>...</html>"},
     {"path": "style.css", "content": "body { ... }"}
   ],
   "delete": ["old_file.js"]
@@ -26,7 +48,8 @@ Example response:
 
 If no files need to be changed, return empty JSON: {}
 
-IMPORTANT: Write complete, working code. Include all necessary imports and dependencies.
+IMPORTANT: Never repeat unchanged parts of existing files: use small edits, several per file if needed.
+Edits of a file are applied in order. Write complete, working code. Include all necessary imports and dependencies.
 Only output JSON, no other text."""
 
 HELP_WITH_CODE_SYSTEM_PROMPT = """You are a coding assistant analyzing a codebase. Answer the user's question about the code.
@@ -49,3 +72,12 @@ Analyze the provided code changes and provide a detailed review with the followi
 
 Be constructive and specific in your feedback. Reference line numbers when possible.
 Format your response in a clear, organized way."""
+
+FILE_REVIEW_SYSTEM_PROMPT = """You are a senior software engineer reviewing one part of a larger commit.
+List concrete findings for this change only: bugs, security concerns, performance problems and clear
+readability issues, each with the file and line. Be concise: do not describe the change, do not rate it.
+If there is nothing worth mentioning, answer "No issues found"."""
+
+REVIEW_MERGE_SYSTEM_PROMPT = """You are merging code review findings for parts of one commit.
+Combine them into a single concise list grouped by file. Keep every concrete finding with its file and line,
+remove duplicates and drop "No issues found" entries."""
@@ -0,0 +1,104 @@
+"""Splitting git diffs into review units for AI Coder"""
+
+import re
+from dataclasses import dataclass, field
+from typing import List
+
+from project_index import estimate_tokens
+
+FILE_HEADER_RE = re.compile(r"^diff --git a/(.*?) b/(.*)$")
+
+
+@dataclass
+class FileDiff:
+    path: str
+    header: str
+    hunks: List[str] = field(default_factory=list)
+
+    @property
+    def text(self) -> str:
+        return self.header + "".join(self.hunks)
+
+
+@dataclass
+class ReviewUnit:
+    """Part of a diff reviewed by one model call"""
+    label: str
+    text: str
+
+
+def split_diff(diff: str) -> List[FileDiff]:
+    """Split a unified git diff into files, and each file into its hunks"""
+    files: List[FileDiff] = []
+    for line in diff.splitlines(keepends=True):
+        match = FILE_HEADER_RE.match(line)
+        if match:
+            files.append(FileDiff(match.group(2), line))
+        elif not files:
+            continue
+        elif line.startswith("@@"):
+            files[-1].hunks.append(line)
+        elif files[-1].hunks:
+            files[-1].hunks[-1] += line
+        else:
+            files[-1].header += line
+    return files
+
+
+def _split_lines(text: str, max_tokens: int) -> List[str]:
+    """Split an oversized hunk into pieces of whole lines within the budget"""
+    pieces = [""]
+    for line in text.splitlines(keepends=True):
+        if pieces[-1] and estimate_tokens(pieces[-1] + line) > max_tokens:
+            pieces.append("")
+        pieces[-1] += line
+    return pieces
+
+
+def make_review_units(files: List[FileDiff], max_tokens: int) -> List[ReviewUnit]:
+    """One unit per changed file, files over max_tokens are split at hunk boundaries.
+
+    Every part repeats the file header so it can be reviewed on its own.
+    Files without hunks (binary files, mode changes) are left out.
+    """
+    units = []
+    for file in files:
+        if not file.hunks:
+            continue
+        if estimate_tokens(file.text) <= max_tokens:
+            units.append(ReviewUnit(file.path, file.text))
+            continue
+
+        budget = max(max_tokens - estimate_tokens(file.header), max_tokens // 2)
+        parts = [""]
+        for hunk in file.hunks:
+            pieces = _split_lines(hunk, budget) if estimate_tokens(hunk) > budget else [hunk]
+            for piece in pieces:
+                if parts[-1] and estimate_tokens(parts[-1] + piece) > budget:
+                    parts.append("")
+                parts[-1] += piece
+        for number, part in enumerate(parts, 1):
+            units.append(ReviewUnit(f"{file.path} (part {number}/{len(parts)})", file.header + part))
+    return units
+
+
+def group_by_budget(texts: List[str], max_tokens: int) -> List[List[str]]:
+    """Group consecutive texts so that each group fits the budget"""
+    groups: List[List[str]] = [[]]
+    used = 0
+    for text in texts:
+        tokens = estimate_tokens(text)
+        if groups[-1] and used + tokens > max_tokens:
+            groups.append([])
+            used = 0
+        groups[-1].append(text)
+        used += tokens
+    return groups
+
+
+def truncate_to_budget(text: str, max_tokens: int) -> str:
+    """Cut text down to about max_tokens, marking where it was cut"""
+    if estimate_tokens(text) <= max_tokens:
+        return text
+    marker = "\n[... truncated ...]"
+    return text[:max(0, (max_tokens - 1) * 4 - len(marker))] + marker
@@ -0,0 +1,135 @@
+"""Search/replace edits for AI Coder"""
+
+import ast
+import difflib
+from typing import List, Dict, Optional, Tuple
+
+# Minimum similarity of a block of lines to count as a fuzzy match of the search text
+FUZZY_THRESHOLD = 0.9
+
+
+class EditError(Exception):
+    """An edit could not be applied unambiguously"""
+
+
+def _indent(line: str) -> str:
+    return line[:len(line) - len(line.lstrip())]
+
+
+def _find_lines(lines: List[str], search: List[str], key) -> List[int]:
+    """Start indexes where `search` matches `lines` after applying `key` to each line"""
+    wanted = [key(line) for line in search]
+    return [
+        i for i in range(len(lines) - len(search) + 1)
+        if [key(line) for line in lines[i:i + len(search)]] == wanted
+    ]
+
+
+def _reindent(replace: List[str], search: List[str], found: List[str]) -> List[str]:
+    """Shift the replacement by the indentation difference between the search text and the file"""
+    pairs = [(_indent(s), _indent(f)) for s, f in zip(search, found) if s.strip()]
+    if all(s == f for s, f in pairs):
+        return replace
+    search_indent, found_indent = pairs[0]
+    if found_indent.endswith(search_indent):
+        added = found_indent[:len(found_indent) - len(search_indent)]
+        if all(f == added + s for s, f in pairs):
+            return [added + line if line.strip() else line for line in replace]
+    elif search_indent.endswith(found_indent):
+        removed = len(search_indent) - len(found_indent)
+        if all(len(s) - len(f) == removed and s.endswith(f) for s, f in pairs):
+            return [line[removed:] if len(_indent(line)) >= removed else line.lstrip() for line in replace]
+    # Usually only the first line was copied without its indentation
+    if replace and _indent(replace[0]) == _indent(search[0]):
+        return [_indent(found[0]) + replace[0].lstrip()] + replace[1:]
+    return replace
+
+
+def _fuzzy_find(lines: List[str], search: List[str]) -> Optional[int]:
+    """Start of the only block of lines similar enough to the search text"""
+    target = "\n".join(line.strip() for line in search)
+    scores = []
+    for i in range(len(lines) - len(search) + 1):
+        block = "\n".join(line.strip() for line in lines[i:i + len(search)])
+        ratio = difflib.SequenceMatcher(None, target, block).ratio()
+        if ratio >= FUZZY_THRESHOLD:
+            scores.append((ratio, i))
+    if not scores:
+        return None
+    scores.sort(reverse=True)
+    if len(scores) > 1 and scores[1][0] == scores[0][0]:
+        raise EditError("search text matches several places equally well")
+    return scores[0][1]
+
+
+def apply_edit(content: str, search: str, replace: str) -> str:
+    """Replace the single occurrence of `search` in `content`.
+
+    Tries an exact match first, then ignores trailing whitespace, then
+    indentation (the replacement is re-indented to fit), and finally accepts
+    the only block of lines that is at least FUZZY_THRESHOLD similar.
+    """
+    if not search.strip():
+        raise EditError("empty search text")
+
+    count = content.count(search)
+    if count == 1:
+        return content.replace(search, replace, 1)
+    if count > 1:
+        raise EditError(f"search text found {count} times, include more surrounding lines")
+
+    lines = content.splitlines()
+    search_lines = search.strip("\n").splitlines()
+    replace_lines = replace.strip("\n").splitlines() if replace.strip() else []
+    trailing_newline = "\n" if content.endswith("\n") else ""
+
+    for key in (str.rstrip, str.strip):
+        matches = _find_lines(lines, search_lines, key)
+        if len(matches) > 1:
+            raise EditError(f"search text found {len(matches)} times, include more surrounding lines")
+        if matches:
+            start = matches[0]
+            break
+    else:
+        start = _fuzzy_find(lines, search_lines)
+        if start is None:
+            raise EditError("search text not found")
+
+    found = lines[start:start + len(search_lines)]
+    new_lines = lines[:start] + _reindent(replace_lines, search_lines, found) + lines[start + len(search_lines):]
+    return "\n".join(new_lines) + trailing_newline
+
+
+def apply_edits(path: str, content: str, edits: List[Dict[str, str]]) -> str:
+    """Apply the edits of one file in order and check the result.
+
+    Raises EditError naming the failing edit. A Python file that parsed
+    before the edits must still parse after them.
+    """
+    result = content
+    for number, edit in enumerate(edits, 1):
+        try:
+            result = apply_edit(result, edit.get("search", ""), edit.get("replace", ""))
+        except EditError as e:
+            raise EditError(f"edit {number}: {e}")
+
+    if path.endswith(".py"):
+        try:
+            ast.parse(content)
+        except SyntaxError:
+            return result
+        try:
+            ast.parse(result)
+        except SyntaxError as e:
+            raise EditError(f"result is not valid Python (line {e.lineno}: {e.msg})")
+    return result
+
+
+def group_edits(edits: List[Dict[str, str]]) -> List[Tuple[str, List[Dict[str, str]]]]:
+    """Group edits by file, keeping the order in which files first appear"""
+    grouped: Dict[str, List[Dict[str, str]]] = {}
+    for edit in edits:
+        path = edit.get("path", "")
+        if path:
+            grouped.setdefault(path, []).append(edit)
+    return list(grouped.items())
@@ -1,7 +1,8 @@
 """Ollama AI provider for AI Coder"""
 
+import json
 import os
-from typing import Optional
+from typing import Iterator, Optional
 import requests
 from dotenv import load_dotenv
 
@@ -17,6 +18,7 @@ class OllamaProvider:
     def __init__(self, model: Optional[str] = None):
         self.model = model or DEFAULT_MODEL
         self.host = OLLAMA_HOST
+        self.last_completion_tokens: Optional[int] = None
 
     def generate(self, prompt: str, system_prompt: Optional[str] = None) -> str:
         """Make request to Ollama"""
@@ -35,6 +37,44 @@ class OllamaProvider:
         except Exception as e:
             return f"Error: {str(e)}"
 
+    def generate_stream(self, prompt: str, system_prompt: Optional[str] = None) -> Iterator[str]:
+        """Stream the response from Ollama as text chunks.
+
+        Closing the generator closes the connection, which makes Ollama stop
+        generating. The completion token count is kept in last_completion_tokens.
+        """
+        url = f"{self.host}/api/generate"
+        payload = {"model": self.model, "prompt": prompt, "stream": True}
+        if system_prompt:
+            payload["system"] = system_prompt
+
+        self.last_completion_tokens = None
+        try:
+            response = requests.post(url, json=payload, stream=True)
+            response.raise_for_status()
+        except requests.exceptions.ConnectionError:
+            yield f"Error: Cannot connect to Ollama at {self.host}. Make sure Ollama is running."
+            return
+        except Exception as e:
+            yield f"Error: {str(e)}"
+            return
+
+        try:
+            for line in response.iter_lines():
+                if not line:
+                    continue
+                chunk = json.loads(line)
+                if chunk.get("error"):
+                    yield f"Error: {chunk['error']}"
+                    return
+                yield chunk.get("response", "")
+                if chunk.get("done"):
+                    self.last_completion_tokens = chunk.get("eval_count")
+        except Exception as e:
+            yield f"\nError: {str(e)}"
+        finally:
+            response.close()
+
     def generate_json(self, prompt: str, system_prompt: Optional[str] = None) -> dict:
         """Generate JSON response from Ollama"""
         response = self.generate(prompt, system_prompt)
@@ -1,10 +1,13 @@
 """Yandex AI provider for AI Coder"""
 
+import json
 import os
-from typing import Optional
+from typing import Iterator, Optional
 import requests
 from dotenv import load_dotenv
 
+from streaming import Replacement
+
 load_dotenv()
 
 YANDEX_FOLDER_ID = os.environ.get("YANDEX_FOLDER_ID", "")
@@ -23,12 +26,10 @@ class YandexProvider:
         self.api_key = api_key or YANDEX_API_KEY
         self.model = YANDEX_MODEL
         self.endpoint = YANDEX_ENDPOINT
+        self.last_completion_tokens: Optional[int] = None
 
-    def generate(self, prompt: str, system_prompt: Optional[str] = None) -> str:
-        """Make request to Yandex Cloud"""
-        if not self.folder_id or not self.api_key:
-            return "Error: YANDEX_FOLDER_ID and YANDEX_API_KEY environment variables must be set."
-
+    def _build_request(self, prompt: str, system_prompt: Optional[str], stream: bool):
+        """Headers and payload of a completion request"""
         headers = {
             "Authorization": f"Api-Key {self.api_key}",
             "Content-Type": "application/json",
@@ -42,12 +43,20 @@ class YandexProvider:
         payload = {
             "modelUri": f"gpt://{self.folder_id}/{self.model}",
             "completionOptions": {
-                "stream": False,
+                "stream": stream,
                 "temperature": 0.3,
                 "maxTokens": 4000,
             },
             "messages": messages,
         }
+        return headers, payload
+
+    def generate(self, prompt: str, system_prompt: Optional[str] = None) -> str:
+        """Make request to Yandex Cloud"""
+        if not self.folder_id or not self.api_key:
+            return "Error: YANDEX_FOLDER_ID and YANDEX_API_KEY environment variables must be set."
+
+        headers, payload = self._build_request(prompt, system_prompt, stream=False)
 
         try:
             response = requests.post(
@@ -66,6 +75,55 @@ class YandexProvider:
         except Exception as e:
             return f"Error: {str(e)}"
 
+    def generate_stream(self, prompt: str, system_prompt: Optional[str] = None) -> Iterator[str]:
+        """Stream the response from Yandex Cloud as text chunks.
+
+        The API sends the whole text so far in every chunk, only the new part
+        is yielded. If a chunk revises earlier text, the whole text is yielded
+        as a Replacement. Closing the generator closes the connection.
+        """
+        self.last_completion_tokens = None
+        if not self.folder_id or not self.api_key:
+            yield "Error: YANDEX_FOLDER_ID and YANDEX_API_KEY environment variables must be set."
+            return
+
+        headers, payload = self._build_request(prompt, system_prompt, stream=True)
+        try:
+            response = requests.post(
+                self.endpoint, json=payload, headers=headers, timeout=120, stream=True
+            )
+            response.raise_for_status()
+        except requests.exceptions.ConnectionError:
+            yield "Error: Cannot connect to Yandex API."
+            return
+        except Exception as e:
+            yield f"Error: {str(e)}"
+            return
+
+        try:
+            text = ""
+            for line in response.iter_lines():
+                if not line:
+                    continue
+                result = json.loads(line).get("result", {})
+                current = (
+                    result.get("alternatives", [{}])[0]
+                    .get("message", {})
+                    .get("text", "")
+                )
+                if current.startswith(text):
+                    yield current[len(text):]
+                else:
+                    yield Replacement(current)
+                text = current
+                usage = result.get("usage", {})
+                if usage.get("completionTokens"):
+                    self.last_completion_tokens = int(usage["completionTokens"])
+        except Exception as e:
+            yield f"\nError: {str(e)}"
+        finally:
+            response.close()
+
     def generate_json(self, prompt: str, system_prompt: Optional[str] = None) -> dict:
         """Generate JSON response from Yandex"""
         response = self.generate(prompt, system_prompt)
@@ -0,0 +1,95 @@
+"""Streaming terminal output for AI Coder"""
+
+import sys
+import time
+from typing import Iterator, Optional, Callable
+
+# Shortest interval a generation rate is computed over, and status line refresh period
+MIN_RATE_INTERVAL = 0.1
+STATUS_REFRESH = 0.1
+
+
+class Replacement(str):
+    """Stream chunk replacing all text received so far, for providers that revise earlier text"""
+
+
+class StreamResult:
+    """Text received from a streamed generation and its timings"""
+
+    def __init__(self):
+        self.text = ""
+        self.chunks = 0
+        self.tokens: Optional[int] = None  # reported by the provider, if it does
+        self.start_time = time.perf_counter()
+        self.first_token_time: Optional[float] = None
+        self.end_time: Optional[float] = None
+        self.cancelled = False
+
+    @property
+    def ttft(self) -> Optional[float]:
+        if self.first_token_time is None:
+            return None
+        return self.first_token_time - self.start_time
+
+    def tokens_per_second(self) -> Optional[float]:
+        end_time = self.end_time or time.perf_counter()
+        if self.first_token_time is None or end_time - self.first_token_time < MIN_RATE_INTERVAL:
+            return None
+        return (self.tokens or self.chunks) / (end_time - self.first_token_time)
+
+    def format_status(self) -> str:
+        parts = [f"TTFT {self.ttft:.2f}s" if self.ttft is not None else "no output"]
+        parts.append(f"{self.tokens or self.chunks} tokens")
+        rate = self.tokens_per_second()
+        if rate is not None:
+            parts.append(f"{rate:.1f} tok/s")
+        if self.cancelled:
+            parts.append("cancelled")
+        return "[" + " · ".join(parts) + "]"
+
+
+def stream_to_terminal(
+    chunks: Iterator[str],
+    echo: bool = True,
+    token_count: Optional[Callable[[], Optional[int]]] = None,
+) -> StreamResult:
+    """Print text chunks as they arrive, then a status line with TTFT and tokens/s.
+
+    With echo=False only the status line is shown, updated in place. Ctrl-C
+    stops reading and closes the stream, which closes the HTTP connection so
+    the server stops generating; the partial text is returned.
+    """
+    result = StreamResult()
+    last_status = 0.0
+    try:
+        for chunk in chunks:
+            if not chunk:
+                continue
+            if result.first_token_time is None:
+                result.first_token_time = time.perf_counter()
+            result.chunks += 1
+            if isinstance(chunk, Replacement):
+                result.text = str(chunk)
+                chunk = f"\n[revised by the model]\n{chunk}"
+            else:
+                result.text += chunk
+            if echo:
+                sys.stdout.write(chunk)
+                sys.stdout.flush()
+            elif time.perf_counter() - last_status >= STATUS_REFRESH:
+                last_status = time.perf_counter()
+                sys.stdout.write("\r" + result.format_status())
+                sys.stdout.flush()
+    except KeyboardInterrupt:
+        result.cancelled = True
+    finally:
+        close = getattr(chunks, "close", None)
+        if close:
+            close()
+
+    result.end_time = time.perf_counter()
+    if token_count:
+        result.tokens = token_count()
+    prefix = "\n" if echo and not result.text.endswith("\n") else "\r"
+    print(f"{prefix}{result.format_status()}")
+    return result
@@ -4,7 +4,7 @@ AI Service interface for interacting with different AI models.
 """
 
 from abc import ABC, abstractmethod
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, AsyncIterator
 
 
 class AIService(ABC):
@@ -34,6 +34,25 @@ class AIService(ABC):
         """
         pass
     
+    async def chat_stream(self, message: str, chat_history: Optional[List] = None) -> AsyncIterator[str]:
+        """
+        Send a message to the AI service and get the response in parts as it is generated.
+        
+        Services without streaming support yield the whole response at once.
+        
+        Args:
+            message (str): The user's message
+            chat_history (List, optional): Previous conversation history
+            
+        Yields:
+            str: The next part of the response
+        """
+        yield await self.chat(message, chat_history)
+    
+    async def close(self):
+        """Release resources held by the service, such as loaded models."""
+        pass
+    
     @abstractmethod
     def get_llm(self):
         """
@@ -3,11 +3,13 @@
 Ollama AI Service for interacting with Ollama models.
 """
 
+import asyncio
 import os
-from typing import List, Optional
+from typing import List, Optional, AsyncIterator
 from langchain_ollama import ChatOllama
 from langchain_core.messages import HumanMessage, AIMessage
 from ai_service.ai_service import AIService
+from ai_service.ollama_residency import ModelResidencyManager, parse_keep_alive
 
 
 class OllamaAIService(AIService):
@@ -20,6 +22,8 @@ class OllamaAIService(AIService):
         """
         self.model_name = model_name or os.getenv("OLLAMA_MODEL_NAME", "glm-4.7-flash:latest")
         self.llm = None
+        self.residency = None
+        self.last_usage = None
         
     async def initialize(self, tools: Optional[List] = None):
         """Initialize the LLM.
@@ -29,12 +33,16 @@ class OllamaAIService(AIService):
         """
         print(f"Initializing Ollama model: {self.model_name}")
         
+        base_url = os.getenv("OLLAMA_BASE_URL", "http://localhost:11434")
+        keep_alive = parse_keep_alive(os.getenv("OLLAMA_KEEP_ALIVE", "-1"))
+
         # Initialize Ollama LLM
         try:
             self.llm = ChatOllama(
                 model=self.model_name,
-                base_url=os.getenv("OLLAMA_BASE_URL", "http://localhost:11434"),
-                temperature=float(os.getenv("OLLAMA_TEMPERATURE", "0.7"))
+                base_url=base_url,
+                temperature=float(os.getenv("OLLAMA_TEMPERATURE", "0.7")),
+                keep_alive=keep_alive
             )
             print("✅ Ollama LLM initialized successfully")
         except Exception as e:
@@ -42,6 +50,15 @@ class OllamaAIService(AIService):
             print("Please ensure Ollama is running and the model is available.")
             raise
             
+        # Load the model now and keep it loaded, so the first message does not wait for it
+        self.residency = ModelResidencyManager(
+            chat_models=[self.model_name], keep_alive=keep_alive, host=base_url
+        )
+        timings = await asyncio.to_thread(self.residency.warm_up)
+        if timings.get(self.model_name) is None:
+            print("⚠️ Could not preload the model, the first response may be slow")
+        self.residency.start(warm_up=False)
+            
         print("🚀 Ollama AI Service initialization complete!")
     
     async def chat(self, message: str, chat_history: Optional[List] = None) -> str:
@@ -58,26 +75,62 @@ class OllamaAIService(AIService):
         if not self.llm:
             raise RuntimeError("Client not initialized. Call initialize() first.")
         
-        if chat_history is None:
-            chat_history = []
-        
         try:
-            # Convert chat history to the format expected by the LLM
-            messages = []
-            for msg in chat_history:
-                if isinstance(msg, HumanMessage):
-                    messages.append(("user", msg.content))
-                elif isinstance(msg, AIMessage):
-                    messages.append(("assistant", msg.content))
-            
-            messages.append(("user", message))
-            
             # Get response from LLM
-            response = self.llm.invoke(messages)
+            response = self.llm.invoke(self._build_messages(message, chat_history))
             return response.content
         except Exception as e:
             return f"Error processing request: {str(e)}"
+    
+    async def chat_stream(self, message: str, chat_history: Optional[List] = None) -> AsyncIterator[str]:
+        """
+        Send a message to the LLM and get the response in parts as they are generated.
+        
+        Cancelling the consuming task closes the connection to Ollama, which
+        stops the generation on the server.
+        
+        Args:
+            message (str): The user's message
+            chat_history (List, optional): Previous conversation history
             
+        Yields:
+            str: The next part of the response
+            
+        Raises:
+            RuntimeError: If the request fails, so the failed turn is not
+                mistaken for an answer
+        """
+        if not self.llm:
+            raise RuntimeError("Client not initialized. Call initialize() first.")
+        
+        self.last_usage = None
+        try:
+            async for chunk in self.llm.astream(self._build_messages(message, chat_history)):
+                if chunk.usage_metadata:
+                    self.last_usage = chunk.usage_metadata
+                if chunk.content:
+                    yield chunk.content
+        except Exception as e:
+            raise RuntimeError(f"Error processing request: {str(e)}") from e
+    
+    def _build_messages(self, message: str, chat_history: Optional[List]) -> List:
+        """Convert chat history to the format expected by the LLM"""
+        messages = []
+        for msg in chat_history or []:
+            if isinstance(msg, HumanMessage):
+                messages.append(("user", msg.content))
+            elif isinstance(msg, AIMessage):
+                messages.append(("assistant", msg.content))
+        
+        messages.append(("user", message))
+        return messages
+            
+    async def close(self):
+        """Stop keeping the model resident and unload it from Ollama."""
+        if self.residency:
+            await asyncio.to_thread(self.residency.stop, True)
+            self.residency = None
+    
     def get_llm(self):
         """Get the initialized LLM instance."""
         return self.llm
\ No newline at end of file
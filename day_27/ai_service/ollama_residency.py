@@ -0,0 +1,182 @@
+#!/usr/bin/env python3
+"""
+Ollama model residency: warm-up and keep_alive pinning.
+"""
+
+import os
+import threading
+import time
+from datetime import datetime, timezone
+from typing import List, Dict, Optional, Callable, Union
+import ollama
+
+# Called with (event, model, seconds): "load" after a model was loaded, "evict" when
+# a pinned model is found unloaded, "repin" when its keep_alive had been shortened
+EventCallback = Callable[[str, str, float], None]
+
+
+def parse_keep_alive(value: str) -> Union[int, str]:
+    """Ollama takes keep_alive as seconds or a duration such as "30m", -1 means forever"""
+    try:
+        return int(value)
+    except ValueError:
+        return value
+
+
+def _normalize(model: str) -> str:
+    return model if ":" in model.split("/")[-1] else f"{model}:latest"
+
+
+def _expires_in(expires_at) -> Optional[float]:
+    if expires_at is None:
+        return None
+    if isinstance(expires_at, str):
+        try:
+            expires_at = datetime.fromisoformat(expires_at.replace("Z", "+00:00"))
+        except ValueError:
+            return None
+    if expires_at.tzinfo is None:
+        expires_at = expires_at.replace(tzinfo=timezone.utc)
+    return (expires_at - datetime.now(timezone.utc)).total_seconds()
+
+
+class ModelResidencyManager:
+    """Keeps the chat and embedding models of an app loaded in Ollama.
+
+    warm_up() loads every model with a dummy request and `keep_alive` (-1 pins
+    the model until Ollama is restarted), so the first user request does not
+    pay the model load. A background thread checks /api/ps every
+    `check_interval` seconds: a model that was evicted (e.g. to make room for
+    another one) is loaded again, and a model whose keep_alive was shortened
+    by a request with the default keep_alive is pinned again.
+    """
+
+    def __init__(
+        self,
+        chat_models: List[str] = (),
+        embedding_models: List[str] = (),
+        keep_alive: Union[int, str] = -1,
+        check_interval: float = 30.0,
+        host: Optional[str] = None,
+        on_event: Optional[EventCallback] = None,
+    ):
+        self.models: Dict[str, str] = {}
+        for model in chat_models:
+            self.models[model] = "chat"
+        for model in embedding_models:
+            self.models[model] = "embedding"
+        self.keep_alive = keep_alive
+        self.check_interval = check_interval
+        self.client = ollama.Client(host=host or os.getenv("OLLAMA_HOST", "http://localhost:11434"))
+        self.on_event = on_event
+        self.loads = 0
+        self.evictions = 0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def load(self, model: str) -> Optional[float]:
+        """Load or pin one model, returns the load time in seconds"""
+        start_time = time.perf_counter()
+        try:
+            if self.models.get(model) == "embedding":
+                self.client.embed(model=model, input="warm up", keep_alive=self.keep_alive)
+            else:
+                self.client.generate(model=model, prompt="", keep_alive=self.keep_alive)
+        except Exception as e:
+            print(f"Error loading Ollama model {model}: {e}")
+            return None
+        return time.perf_counter() - start_time
+
+    def warm_up(self) -> Dict[str, Optional[float]]:
+        """Load all models, returns the load time of each"""
+        timings = {}
+        for model in self.models:
+            if self._stop.is_set():
+                break
+            timings[model] = self.load(model)
+            if timings[model] is not None:
+                self.loads += 1
+                self._emit("load", model, timings[model])
+                print(f"Ollama model {model} ready in {timings[model]:.1f}s")
+        return timings
+
+    def resident_models(self) -> Dict[str, Optional[float]]:
+        """Loaded models and the seconds until Ollama unloads them"""
+        resident = {}
+        for item in self.client.ps()["models"]:
+            name = item["model"] or item["name"]
+            resident[_normalize(name)] = _expires_in(item["expires_at"])
+        return resident
+
+    def check(self) -> List[str]:
+        """Reload evicted models and pin again expiring ones, returns the reloaded models"""
+        try:
+            resident = self.resident_models()
+        except Exception as e:
+            print(f"Error checking Ollama models: {e}")
+            return []
+
+        reloaded = []
+        for model in self.models:
+            name = _normalize(model)
+            if name not in resident:
+                self.evictions += 1
+                self._emit("evict", model, 0.0)
+                seconds = self.load(model)
+                if seconds is not None:
+                    self.loads += 1
+                    self._emit("load", model, seconds)
+                    reloaded.append(model)
+                    print(f"Ollama model {model} was unloaded, reloaded in {seconds:.1f}s")
+            elif resident[name] is not None and resident[name] < 2 * self.check_interval:
+                seconds = self.load(model)
+                if seconds is not None:
+                    self._emit("repin", model, seconds)
+        return reloaded
+
+    def start(self, warm_up: bool = True):
+        """Warm up the models and keep them resident from a background thread"""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self._run, args=(warm_up,), name="ollama-residency", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self, unload: bool = False):
+        """Stop the background checks; with unload, also unload the models from Ollama.
+
+        Short-lived programs should unload, otherwise models pinned with
+        keep_alive=-1 stay in memory until Ollama is restarted.
+        """
+        self._stop.set()
+        if self._thread is not None:
+            # Let a running check finish first, so it cannot load a model again after the unload
+            self._thread.join(timeout=self.check_interval)
+        if unload:
+            self.unload()
+
+    def unload(self):
+        """Ask Ollama to unload every model right away (keep_alive=0)"""
+        for model in self.models:
+            try:
+                if self.models[model] == "embedding":
+                    self.client.embed(model=model, input="unload", keep_alive=0)
+                else:
+                    self.client.generate(model=model, prompt="", keep_alive=0)
+            except Exception as e:
+                print(f"Error unloading Ollama model {model}: {e}")
+
+    def _run(self, warm_up: bool):
+        if warm_up:
+            self.warm_up()
+        while not self._stop.wait(self.check_interval):
+            self.check()
+
+    def _emit(self, event: str, model: str, seconds: float):
+        if self.on_event:
+            try:
+                self.on_event(event, model, seconds)
+            except Exception as e:
+                print(f"Error handling residency event: {e}")
@@ -11,13 +11,65 @@ from dotenv import load_dotenv
 load_dotenv()
 
 import asyncio
+import signal
 import sys
+import time
+from typing import List, Optional
 
 from langchain_core.messages import HumanMessage, AIMessage
 
+from ai_service.ai_service import AIService
 from ai_service.ollama_ai_service import OllamaAIService
 
 
+async def stream_reply(ai_service: AIService, message: str, chat_history: List) -> Optional[str]:
+    """Print the response as it is generated, then TTFT and generation speed.
+    
+    Ctrl-C cancels the request and returns None.
+    """
+    print("\n🤖 Assistant: ", end="", flush=True)
+    parts = []
+    start_time = time.perf_counter()
+    first_token_time = None
+
+    async def consume():
+        nonlocal first_token_time
+        async for part in ai_service.chat_stream(message, chat_history):
+            if first_token_time is None:
+                first_token_time = time.perf_counter()
+            parts.append(part)
+            print(part, end="", flush=True)
+
+    task = asyncio.ensure_future(consume())
+    loop = asyncio.get_running_loop()
+    try:
+        loop.add_signal_handler(signal.SIGINT, task.cancel)
+    except (NotImplementedError, RuntimeError):
+        pass  # No loop signal handlers on Windows, Ctrl-C raises KeyboardInterrupt there
+
+    try:
+        await task
+    except asyncio.CancelledError:
+        if not task.cancelled():
+            raise
+    finally:
+        try:
+            loop.remove_signal_handler(signal.SIGINT)
+        except (NotImplementedError, RuntimeError):
+            pass
+
+    end_time = time.perf_counter()
+    usage = getattr(ai_service, "last_usage", None)
+    tokens = usage["output_tokens"] if usage and not task.cancelled() else len(parts)
+    status = [f"TTFT {first_token_time - start_time:.2f}s" if first_token_time else "no output", f"{tokens} tokens"]
+    if first_token_time and end_time - first_token_time >= 0.1:
+        status.append(f"{tokens / (end_time - first_token_time):.1f} tok/s")
+    if task.cancelled():
+        status.append("cancelled")
+    print(f"\n[{' · '.join(status)}]")
+    return None if task.cancelled() else "".join(parts)
+
+
 async def interactive_chat():
     """Run an interactive chat session."""
     # Create AI service client
@@ -54,9 +106,10 @@ async def interactive_chat():
                     print("  /help - Show this help message")
                     continue
                 
-                # Process the user's message
-                response = await ai_service.chat(user_input, chat_history)
-                print(f"\n🤖 Assistant: {response}")
+                # Process the user's message, printing the response as it is generated
+                response = await stream_reply(ai_service, user_input, chat_history)
+                if response is None:
+                    continue
                 
                 # Update chat history
                 chat_history.append(HumanMessage(content=user_input))
@@ -81,6 +134,8 @@ async def interactive_chat():
         print("Please check that:")
         print("  1. Ollama is running (visit http://localhost:11434)")
         print("  2. The required model is available")
+    finally:
+        await ai_service.close()
 
 
 def main():
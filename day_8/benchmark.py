@@ -0,0 +1,264 @@
+import argparse
+import asyncio
+import csv
+import json
+import math
+import os
+import statistics
+import time
+from dataclasses import dataclass, asdict
+from datetime import datetime
+from typing import List, Optional, Dict, Tuple, Type
+
+from dotenv import load_dotenv
+
+from providers import GigachatProvider, OllamaProvider, YandexCloudProvider
+from providers.base import Provider
+
+
+@dataclass
+class BenchmarkResult:
+    """One completion request of the benchmark matrix"""
+    provider: str
+    model: str
+    prompt: str
+    temperature: float
+    repeat: int
+    ok: bool
+    # Wall time of the call, including extra requests such as GigaChat's token counting
+    latency: float
+    # Not measured: the providers do not stream, so there is no separate first token
+    ttft: Optional[float] = None
+    # Time of the completion HTTP request alone, used for the summary and tokens/s
+    provider_latency: Optional[float] = None
+    prompt_tokens: Optional[int] = None
+    completion_tokens: Optional[int] = None
+    total_tokens: Optional[int] = None
+    tokens_per_second: Optional[float] = None
+    error: Optional[str] = None
+
+
+@dataclass
+class BenchmarkSummary:
+    """Aggregated results of one provider/model/temperature combination"""
+    provider: str
+    model: str
+    temperature: float
+    runs: int
+    errors: int
+    latency_mean: Optional[float] = None
+    latency_ci95: Optional[float] = None
+    latency_p50: Optional[float] = None
+    latency_p95: Optional[float] = None
+    completion_tokens_mean: Optional[float] = None
+    tokens_per_second_mean: Optional[float] = None
+
+
+def _percentile(values: List[float], percent: float) -> float:
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(percent / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+async def run_case(
+    provider: Provider,
+    model: str,
+    prompt: str,
+    temperature: float,
+    repeat: int,
+    semaphore: asyncio.Semaphore,
+) -> BenchmarkResult:
+    """Run a single request, measuring the wall time outside the provider"""
+    async with semaphore:
+        start_time = time.time()
+        error = None
+        try:
+            response = await provider.completions(
+                messages=[{"role": "user", "content": prompt}],
+                temperature=temperature,
+                model=model,
+            )
+        except Exception as e:
+            response = None
+            error = str(e)
+        latency = time.time() - start_time
+
+    result = BenchmarkResult(
+        provider=provider.name,
+        model=model,
+        prompt=prompt,
+        temperature=temperature,
+        repeat=repeat,
+        ok=response is not None,
+        latency=latency,
+        error=error if response is None else None,
+    )
+    if response is None:
+        result.error = result.error or "No response received"
+        return result
+
+    result.provider_latency = response.latency or latency
+    result.prompt_tokens = response.prompt_tokens or response.prompt_tokens_calculated
+    result.completion_tokens = response.completion_tokens or response.completion_tokens_calculated
+    result.total_tokens = response.total_tokens
+    if result.completion_tokens and result.provider_latency > 0:
+        result.tokens_per_second = result.completion_tokens / result.provider_latency
+    return result
+
+
+async def run_benchmark(
+    prompts: List[str],
+    provider_configs: List[Tuple[Type[Provider], str]],
+    temperatures: List[float],
+    repeats: int,
+    concurrency: Dict[str, int],
+    default_concurrency: int = 2,
+) -> List[BenchmarkResult]:
+    """Run the prompt × provider × model × temperature matrix concurrently.
+
+    Requests to one provider are capped by its concurrency limit, so a slow
+    or rate limited provider does not distort the others.
+    """
+    providers: Dict[Type[Provider], Provider] = {}
+    semaphores: Dict[str, asyncio.Semaphore] = {}
+    cases = []
+    for provider_class, model in provider_configs:
+        if provider_class not in providers:
+            providers[provider_class] = provider_class()
+        provider = providers[provider_class]
+        if provider.name not in semaphores:
+            semaphores[provider.name] = asyncio.Semaphore(concurrency.get(provider.name, default_concurrency))
+        for prompt in prompts:
+            for temperature in temperatures:
+                for repeat in range(repeats):
+                    cases.append(run_case(provider, model, prompt, temperature, repeat, semaphores[provider.name]))
+
+    results = []
+    for done, future in enumerate(asyncio.as_completed(cases), start=1):
+        result = await future
+        status = f"{result.latency:.2f}s" if result.ok else f"error: {result.error}"
+        print(f"[{done}/{len(cases)}] {result.provider} {result.model} t={result.temperature}: {status}")
+        results.append(result)
+    return results
+
+
+def summarize(results: List[BenchmarkResult]) -> List[BenchmarkSummary]:
+    """Aggregate results per provider, model and temperature"""
+    groups: Dict[Tuple[str, str, float], List[BenchmarkResult]] = {}
+    for result in results:
+        groups.setdefault((result.provider, result.model, result.temperature), []).append(result)
+
+    summaries = []
+    for (provider, model, temperature), group in sorted(groups.items()):
+        successful = [r for r in group if r.ok]
+        summary = BenchmarkSummary(
+            provider=provider,
+            model=model,
+            temperature=temperature,
+            runs=len(group),
+            errors=len(group) - len(successful),
+        )
+        latencies = [r.provider_latency for r in successful]
+        if latencies:
+            summary.latency_mean = statistics.mean(latencies)
+            summary.latency_p50 = _percentile(latencies, 50)
+            summary.latency_p95 = _percentile(latencies, 95)
+            if len(latencies) > 1:
+                # Normal approximation of the 95% confidence interval of the mean
+                summary.latency_ci95 = 1.96 * statistics.stdev(latencies) / math.sqrt(len(latencies))
+        completion_tokens = [r.completion_tokens for r in successful if r.completion_tokens]
+        if completion_tokens:
+            summary.completion_tokens_mean = statistics.mean(completion_tokens)
+        throughput = [r.tokens_per_second for r in successful if r.tokens_per_second]
+        if throughput:
+            summary.tokens_per_second_mean = statistics.mean(throughput)
+        summaries.append(summary)
+    return summaries
+
+
+def _format(value: Optional[float], digits: int = 2, suffix: str = "") -> str:
+    return f"{value:.{digits}f}{suffix}" if value is not None else "-"
+
+
+def format_markdown(summaries: List[BenchmarkSummary]) -> str:
+    """Format the summary as a markdown table"""
+    lines = [
+        "| Provider | Model | Temp | Runs | Errors | Latency mean | p50 | p95 | Completion tokens | Tokens/s |",
+        "|---|---|---|---|---|---|---|---|---|---|",
+    ]
+    for s in summaries:
+        mean = _format(s.latency_mean, suffix="s")
+        if s.latency_ci95 is not None:
+            mean += f" ± {s.latency_ci95:.2f}"
+        lines.append(
+            f"| {s.provider} | {s.model} | {s.temperature} | {s.runs} | {s.errors} | {mean} | "
+            f"{_format(s.latency_p50, suffix='s')} | {_format(s.latency_p95, suffix='s')} | "
+            f"{_format(s.completion_tokens_mean, 0)} | {_format(s.tokens_per_second_mean, 1)} |"
+        )
+    return "\n".join(lines) + "\n"
+
+
+def save_results(results: List[BenchmarkResult], summaries: List[BenchmarkSummary], output_dir: str) -> str:
+    """Save raw results as JSON and CSV and the summary as markdown, returns the file prefix"""
+    os.makedirs(output_dir, exist_ok=True)
+    prefix = os.path.join(output_dir, f"benchmark-{datetime.now().strftime('%Y%m%d-%H%M%S')}")
+
+    with open(f"{prefix}.json", "w", encoding="utf-8") as f:
+        json.dump(
+            {"results": [asdict(r) for r in results], "summary": [asdict(s) for s in summaries]},
+            f, ensure_ascii=False, indent=2,
+        )
+
+    with open(f"{prefix}.csv", "w", encoding="utf-8", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=list(asdict(results[0]).keys()) if results else [])
+        writer.writeheader()
+        for result in results:
+            row = asdict(result)
+            if row["ttft"] is None:
+                row["ttft"] = "n/a"
+            writer.writerow(row)
+
+    with open(f"{prefix}.md", "w", encoding="utf-8") as f:
+        f.write(format_markdown(summaries))
+
+    return prefix
+
+
+if __name__ == "__main__":
+
+    load_dotenv(override=True)
+
+    parser = argparse.ArgumentParser(description="Benchmark providers and models")
+    parser.add_argument("--repeats", type=int, default=5, help="Requests per prompt, model and temperature")
+    parser.add_argument("--temperatures", type=float, nargs="+", default=[0.2])
+    parser.add_argument("--concurrency", type=int, default=2, help="Requests in flight per provider")
+    parser.add_argument("--output-dir", default="results")
+    args = parser.parse_args()
+
+    prompts = [
+        "Придумай 3 идеи подарков. Только идеи, без детализации.",
+        "быстрая сортировка на python",
+    ]
+
+    # Define the providers to test with their models
+    provider_configs = [
+        (YandexCloudProvider, "yandexgpt-lite"),
+        # (YandexCloudProvider, "aliceai-llm"),
+        (OllamaProvider, "qwen3:0.6b"),
+        # OpenRouterProvider and MistralProvider need to be imported from providers to be enabled
+        # (OpenRouterProvider, "meta-llama/llama-3.2-3b-instruct:free"),
+        (GigachatProvider, "GigaChat-2"),
+        # (MistralProvider, "mistral-tiny"),
+    ]
+
+    # Local models share one GPU, run them one at a time
+    concurrency = {"Ollama": 1}
+
+    results = asyncio.run(
+        run_benchmark(prompts, provider_configs, args.temperatures, args.repeats, concurrency, args.concurrency)
+    )
+    summaries = summarize(results)
+    prefix = save_results(results, summaries, args.output_dir)
+    print()
+    print(format_markdown(summaries))
+    print(f"Results saved to {prefix}.json, {prefix}.csv and {prefix}.md")
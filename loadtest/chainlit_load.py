@@ -0,0 +1,213 @@
+"""
+Load test for the Chainlit apps in this repository.
+
+Imports an app in-process and drives its registered on_chat_start /
+on_message / on_chat_end handlers with N concurrent synthetic sessions,
+each following a scripted conversation. Reports throughput, turn latency
+percentiles and event-loop lag, so blocking calls show up as numbers.
+
+    cd day_20 && python ../loadtest/chainlit_load.py app.py --users 50 --turns 5
+"""
+
+import argparse
+import asyncio
+import importlib.util
+import json
+import os
+import random
+import statistics
+import sys
+import time
+from dataclasses import dataclass, field
+from typing import List, Dict, Any, Optional
+
+DEFAULT_SCRIPT = [
+    ["Привет! Что ты умеешь?", "Расскажи коротко о быстрой сортировке", "Спасибо!"],
+    ["Как восстановить пароль?", "А если письмо не пришло?", "Понятно, спасибо"],
+    ["Придумай 3 идеи подарков", "Выбери лучшую из них", "Почему?"],
+]
+
+
+@dataclass
+class LoadTestStats:
+    """Raw measurements of a load test run"""
+    chat_start_latencies: List[float] = field(default_factory=list)
+    turn_latencies: List[float] = field(default_factory=list)
+    loop_lags: List[float] = field(default_factory=list)
+    errors: List[str] = field(default_factory=list)
+    messages_received: int = 0
+    started_at: float = 0.0
+    finished_at: float = 0.0
+
+
+def _percentile(values: List[float], percent: float) -> Optional[float]:
+    if not values:
+        return None
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(percent / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def load_app(path: str):
+    """Import a Chainlit app module so that its handlers get registered"""
+    app_path = os.path.abspath(path)
+    app_dir = os.path.dirname(app_path)
+    # Apps use relative paths (databases, mcp_server.py) and import their own packages
+    os.chdir(app_dir)
+    sys.path.insert(0, app_dir)
+    spec = importlib.util.spec_from_file_location("chainlit_app", app_path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def make_emitter_class():
+    from chainlit.emitter import BaseChainlitEmitter
+
+    class RecordingEmitter(BaseChainlitEmitter):
+        """Emitter that records the steps an app sends instead of delivering them"""
+
+        def __init__(self, session, stats: LoadTestStats):
+            super().__init__(session)
+            self.stats = stats
+
+        async def send_step(self, step_dict):
+            if step_dict.get("type") == "assistant_message":
+                self.stats.messages_received += 1
+            if step_dict.get("isError"):
+                self.stats.errors.append(str(step_dict.get("output", ""))[:200])
+
+    return RecordingEmitter
+
+
+async def run_user(user_index: int, conversation: List[str], args, stats: LoadTestStats, emitter_class):
+    """Run one synthetic chat session"""
+    import chainlit as cl
+    from chainlit.config import config
+    from chainlit.context import ChainlitContext, context_var
+    from chainlit.session import HTTPSession
+
+    session = HTTPSession(id=f"load-{user_index}", thread_id=f"load-thread-{user_index}", client_type="webapp")
+    context_var.set(ChainlitContext(session, emitter=emitter_class(session, stats)))
+
+    try:
+        if config.code.on_chat_start:
+            start_time = time.perf_counter()
+            await config.code.on_chat_start()
+            stats.chat_start_latencies.append(time.perf_counter() - start_time)
+
+        for turn, text in enumerate(conversation[: args.turns]):
+            if turn and args.think_time:
+                await asyncio.sleep(random.uniform(0, 2 * args.think_time))
+            message = cl.Message(content=text, author="User", type="user_message")
+            start_time = time.perf_counter()
+            await config.code.on_message(message)
+            stats.turn_latencies.append(time.perf_counter() - start_time)
+
+        if config.code.on_chat_end:
+            await config.code.on_chat_end()
+    except Exception as e:
+        stats.errors.append(f"user {user_index}: {e!r}")
+
+
+async def monitor_loop_lag(stats: LoadTestStats, interval: float = 0.05):
+    """Measure how late the event loop wakes up a sleeping task"""
+    while True:
+        start_time = time.perf_counter()
+        await asyncio.sleep(interval)
+        stats.loop_lags.append(max(0.0, time.perf_counter() - start_time - interval))
+
+
+async def run_load_test(args, script: List[List[str]]) -> LoadTestStats:
+    stats = LoadTestStats()
+    emitter_class = make_emitter_class()
+    monitor = asyncio.create_task(monitor_loop_lag(stats))
+
+    stats.started_at = time.perf_counter()
+    tasks = []
+    for user_index in range(args.users):
+        conversation = script[user_index % len(script)]
+        tasks.append(asyncio.create_task(run_user(user_index, conversation, args, stats, emitter_class)))
+        if args.ramp_up:
+            await asyncio.sleep(args.ramp_up / args.users)
+    await asyncio.gather(*tasks)
+    stats.finished_at = time.perf_counter()
+
+    monitor.cancel()
+    return stats
+
+
+def build_report(stats: LoadTestStats, args) -> Dict[str, Any]:
+    duration = stats.finished_at - stats.started_at
+
+    def distribution(values: List[float]) -> Dict[str, Optional[float]]:
+        return {
+            "mean": statistics.mean(values) if values else None,
+            "p50": _percentile(values, 50),
+            "p95": _percentile(values, 95),
+            "p99": _percentile(values, 99),
+            "max": max(values) if values else None,
+        }
+
+    return {
+        "users": args.users,
+        "turns": len(stats.turn_latencies),
+        "duration": duration,
+        "throughput": len(stats.turn_latencies) / duration if duration else 0.0,
+        "messages_received": stats.messages_received,
+        "errors": len(stats.errors),
+        "chat_start_latency": distribution(stats.chat_start_latencies),
+        "turn_latency": distribution(stats.turn_latencies),
+        "loop_lag": distribution(stats.loop_lags),
+        "error_samples": stats.errors[:10],
+    }
+
+
+def format_report(report: Dict[str, Any]) -> str:
+    def ms(value: Optional[float]) -> str:
+        return f"{value * 1000:.0f}ms" if value is not None else "-"
+
+    lines = [
+        f"Users: {report['users']}, turns: {report['turns']}, duration: {report['duration']:.1f}s",
+        f"Throughput: {report['throughput']:.2f} turns/s, messages received: {report['messages_received']}, "
+        f"errors: {report['errors']}",
+    ]
+    for name, title in (("chat_start_latency", "Chat start"), ("turn_latency", "Turn latency"), ("loop_lag", "Loop lag")):
+        d = report[name]
+        lines.append(
+            f"{title}: p50 {ms(d['p50'])}, p95 {ms(d['p95'])}, p99 {ms(d['p99'])}, max {ms(d['max'])}"
+        )
+    for sample in report["error_samples"]:
+        lines.append(f"  error: {sample}")
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test a Chainlit app with synthetic users")
+    parser.add_argument("app", help="Path to the Chainlit app, e.g. app.py or main.py")
+    parser.add_argument("--users", type=int, default=50)
+    parser.add_argument("--turns", type=int, default=3, help="Messages per conversation")
+    parser.add_argument("--script", help="JSON file with a list of conversations (lists of messages)")
+    parser.add_argument("--think-time", type=float, default=1.0, help="Mean pause between turns in seconds")
+    parser.add_argument("--ramp-up", type=float, default=5.0, help="Seconds over which users join")
+    parser.add_argument("--output", help="Save the report as JSON")
+    args = parser.parse_args()
+
+    script = DEFAULT_SCRIPT
+    if args.script:
+        with open(args.script, "r", encoding="utf-8") as f:
+            script = json.load(f)
+
+    output = os.path.abspath(args.output) if args.output else None
+    load_app(args.app)
+    stats = asyncio.run(run_load_test(args, script))
+    report = build_report(stats, args)
+    print(format_report(report))
+
+    if output:
+        with open(output, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == "__main__":
+    main()
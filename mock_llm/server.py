@@ -0,0 +1,382 @@
+"""
+Local stand-in for the LLM APIs used by the apps in this repository.
+
+Speaks the OpenAI-compatible chat/embeddings API (OpenRouter, Mistral,
+GigaChat and Ollama's /v1 endpoints), the native Ollama API and the
+YandexCloud foundation models API, with configurable latency, streaming
+speed and injected errors.
+"""
+
+import argparse
+import asyncio
+import hashlib
+import json
+import math
+import random
+import time
+import uuid
+from dataclasses import dataclass, field
+from typing import List, Dict, Any, Optional
+from aiohttp import web
+
+WORDS = (
+    "модель ответ данные запрос система пример контекст результат текст задача "
+    "значение функция список файл документ вопрос время процесс метод сервер"
+).split()
+
+
+@dataclass
+class MockConfig:
+    """Behaviour of the mock server"""
+    # "fixed:S", "uniform:MIN,MAX", "normal:MEAN,STD" or "lognormal:MEDIAN,SIGMA", in seconds
+    latency: str = "fixed:0.2"
+    tokens_per_second: float = 50.0
+    response_tokens: int = 60
+    error_rate: float = 0.0
+    error_statuses: List[int] = field(default_factory=lambda: [429, 500, 503])
+    retry_after: int = 1
+    embedding_dim: int = 768
+    seed: Optional[int] = None
+
+
+class MockLLM:
+    """Generates deterministic fake completions and embeddings"""
+
+    def __init__(self, config: MockConfig):
+        self.config = config
+        self.random = random.Random(config.seed)
+        self.requests: Dict[str, int] = {}
+        self.errors: Dict[str, int] = {}
+
+    def sample_latency(self) -> float:
+        kind, _, args = self.config.latency.partition(":")
+        values = [float(v) for v in args.split(",") if v]
+        if kind == "fixed":
+            return values[0]
+        if kind == "uniform":
+            return self.random.uniform(values[0], values[1])
+        if kind == "normal":
+            return max(0.0, self.random.gauss(values[0], values[1]))
+        if kind == "lognormal":
+            return self.random.lognormvariate(math.log(values[0]), values[1])
+        raise ValueError(f"Unknown latency distribution: {self.config.latency}")
+
+    def injected_error(self, endpoint: str) -> Optional[web.Response]:
+        """Return an error response for a share of requests"""
+        self.requests[endpoint] = self.requests.get(endpoint, 0) + 1
+        if self.random.random() >= self.config.error_rate:
+            return None
+        self.errors[endpoint] = self.errors.get(endpoint, 0) + 1
+        status = self.random.choice(self.config.error_statuses)
+        headers = {"Retry-After": str(self.config.retry_after)} if status == 429 else {}
+        return web.json_response({"error": {"message": "Injected error", "code": status}}, status=status, headers=headers)
+
+    def tokens_for(self, prompt: str) -> List[str]:
+        """Deterministic answer tokens for a prompt"""
+        seed = int(hashlib.sha256(prompt.encode("utf-8")).hexdigest()[:8], 16)
+        rng = random.Random(seed)
+        return [rng.choice(WORDS) + " " for _ in range(self.config.response_tokens)]
+
+    def embedding(self, text: str) -> List[float]:
+        """Deterministic unit vector for a text"""
+        seed = int(hashlib.sha256(text.encode("utf-8")).hexdigest()[:8], 16)
+        rng = random.Random(seed)
+        vector = [rng.gauss(0, 1) for _ in range(self.config.embedding_dim)]
+        norm = math.sqrt(sum(x * x for x in vector)) or 1.0
+        return [x / norm for x in vector]
+
+    @staticmethod
+    def count_tokens(text: str) -> int:
+        return max(1, len(text) // 4)
+
+    async def first_token_delay(self):
+        await asyncio.sleep(self.sample_latency())
+
+    async def token_delay(self):
+        if self.config.tokens_per_second > 0:
+            await asyncio.sleep(1 / self.config.tokens_per_second)
+
+    async def full_response_delay(self):
+        """Latency of a non-streamed answer: first token plus generation time"""
+        await self.first_token_delay()
+        if self.config.tokens_per_second > 0:
+            await asyncio.sleep(self.config.response_tokens / self.config.tokens_per_second)
+
+
+def _prompt_of(messages: List[Dict[str, Any]]) -> str:
+    return "\n".join(str(m.get("content") or m.get("text") or "") for m in messages)
+
+
+async def _ndjson_stream(request: web.Request, mock: MockLLM, chunks, final: Dict[str, Any]) -> web.StreamResponse:
+    response = web.StreamResponse(headers={"Content-Type": "application/x-ndjson"})
+    await response.prepare(request)
+    await mock.first_token_delay()
+    for chunk in chunks:
+        await response.write((json.dumps(chunk, ensure_ascii=False) + "\n").encode("utf-8"))
+        await mock.token_delay()
+    await response.write((json.dumps(final, ensure_ascii=False) + "\n").encode("utf-8"))
+    await response.write_eof()
+    return response
+
+
+# --- OpenAI-compatible API (OpenRouter, Mistral, GigaChat, Ollama /v1) ---
+
+async def openai_chat(request: web.Request) -> web.StreamResponse:
+    mock: MockLLM = request.app["mock"]
+    error = mock.injected_error("chat/completions")
+    if error:
+        return error
+    body = await request.json()
+    model = body.get("model", "mock")
+    prompt = _prompt_of(body.get("messages", []))
+    tokens = mock.tokens_for(prompt)
+    completion_id = f"chatcmpl-{uuid.uuid4().hex[:12]}"
+    usage = {
+        "prompt_tokens": mock.count_tokens(prompt),
+        "completion_tokens": len(tokens),
+        "total_tokens": mock.count_tokens(prompt) + len(tokens),
+    }
+
+    if not body.get("stream"):
+        await mock.full_response_delay()
+        return web.json_response({
+            "id": completion_id,
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": model,
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": "".join(tokens)}, "finish_reason": "stop"}],
+            "usage": usage,
+        })
+
+    response = web.StreamResponse(headers={"Content-Type": "text/event-stream", "Cache-Control": "no-cache"})
+    await response.prepare(request)
+    await mock.first_token_delay()
+    for token in tokens:
+        chunk = {
+            "id": completion_id,
+            "object": "chat.completion.chunk",
+            "created": int(time.time()),
+            "model": model,
+            "choices": [{"index": 0, "delta": {"content": token}, "finish_reason": None}],
+        }
+        await response.write(f"data: {json.dumps(chunk, ensure_ascii=False)}\n\n".encode("utf-8"))
+        await mock.token_delay()
+    final = {
+        "id": completion_id,
+        "object": "chat.completion.chunk",
+        "model": model,
+        "choices": [{"index": 0, "delta": {}, "finish_reason": "stop"}],
+        "usage": usage,
+    }
+    await response.write(f"data: {json.dumps(final)}\n\ndata: [DONE]\n\n".encode("utf-8"))
+    await response.write_eof()
+    return response
+
+
+async def openai_embeddings(request: web.Request) -> web.Response:
+    mock: MockLLM = request.app["mock"]
+    error = mock.injected_error("embeddings")
+    if error:
+        return error
+    body = await request.json()
+    texts = body.get("input", [])
+    texts = [texts] if isinstance(texts, str) else texts
+    await mock.first_token_delay()
+    return web.json_response({
+        "object": "list",
+        "model": body.get("model", "mock"),
+        "data": [{"object": "embedding", "index": i, "embedding": mock.embedding(t)} for i, t in enumerate(texts)],
+        "usage": {"prompt_tokens": sum(mock.count_tokens(t) for t in texts)},
+    })
+
+
+# --- Ollama native API ---
+
+async def ollama_chat(request: web.Request) -> web.StreamResponse:
+    mock: MockLLM = request.app["mock"]
+    error = mock.injected_error("api/chat")
+    if error:
+        return error
+    body = await request.json()
+    model = body.get("model", "mock")
+    prompt = _prompt_of(body.get("messages", []))
+    tokens = mock.tokens_for(prompt)
+    stats = {"prompt_eval_count": mock.count_tokens(prompt), "eval_count": len(tokens)}
+
+    if body.get("stream", True):
+        chunks = [
+            {"model": model, "created_at": time.strftime("%Y-%m-%dT%H:%M:%SZ"),
+             "message": {"role": "assistant", "content": token}, "done": False}
+            for token in tokens
+        ]
+        final = {"model": model, "message": {"role": "assistant", "content": ""}, "done": True, "done_reason": "stop", **stats}
+        return await _ndjson_stream(request, mock, chunks, final)
+
+    await mock.full_response_delay()
+    return web.json_response({
+        "model": model,
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%SZ"),
+        "message": {"role": "assistant", "content": "".join(tokens)},
+        "done": True,
+        "done_reason": "stop",
+        **stats,
+    })
+
+
+async def ollama_generate(request: web.Request) -> web.StreamResponse:
+    mock: MockLLM = request.app["mock"]
+    error = mock.injected_error("api/generate")
+    if error:
+        return error
+    body = await request.json()
+    model = body.get("model", "mock")
+    prompt = (body.get("system") or "") + (body.get("prompt") or "")
+    if not prompt:
+        # An empty prompt only loads the model
+        return web.json_response({"model": model, "response": "", "done": True, "done_reason": "load"})
+    tokens = mock.tokens_for(prompt)
+    stats = {"prompt_eval_count": mock.count_tokens(prompt), "eval_count": len(tokens)}
+
+    if body.get("stream", True):
+        chunks = [{"model": model, "response": token, "done": False} for token in tokens]
+        final = {"model": model, "response": "", "done": True, "done_reason": "stop", **stats}
+        return await _ndjson_stream(request, mock, chunks, final)
+
+    await mock.full_response_delay()
+    return web.json_response({"model": model, "response": "".join(tokens), "done": True, "done_reason": "stop", **stats})
+
+
+async def ollama_embed(request: web.Request) -> web.Response:
+    mock: MockLLM = request.app["mock"]
+    error = mock.injected_error("api/embed")
+    if error:
+        return error
+    body = await request.json()
+    texts = body.get("input", [])
+    texts = [texts] if isinstance(texts, str) else texts
+    await mock.first_token_delay()
+    return web.json_response({
+        "model": body.get("model", "mock"),
+        "embeddings": [mock.embedding(t) for t in texts],
+        "prompt_eval_count": sum(mock.count_tokens(t) for t in texts),
+    })
+
+
+async def ollama_tags(request: web.Request) -> web.Response:
+    return web.json_response({"models": [{"name": "mock:latest", "model": "mock:latest", "size": 0}]})
+
+
+# --- YandexCloud foundation models API ---
+
+async def yandex_completion(request: web.Request) -> web.StreamResponse:
+    mock: MockLLM = request.app["mock"]
+    error = mock.injected_error("foundationModels/completion")
+    if error:
+        return error
+    body = await request.json()
+    prompt = _prompt_of(body.get("messages", []))
+    tokens = mock.tokens_for(prompt)
+    model_version = body.get("modelUri", "").rsplit("/", 1)[-1] or "latest"
+
+    def result(text: str, status: str, completion_tokens: int) -> Dict[str, Any]:
+        return {"result": {
+            "alternatives": [{"message": {"role": "assistant", "text": text}, "status": status}],
+            "usage": {
+                "inputTextTokens": str(mock.count_tokens(prompt)),
+                "completionTokens": str(completion_tokens),
+                "totalTokens": str(mock.count_tokens(prompt) + completion_tokens),
+            },
+            "modelVersion": model_version,
+        }}
+
+    if body.get("completionOptions", {}).get("stream"):
+        # Every chunk carries the text generated so far
+        chunks = [
+            result("".join(tokens[: i + 1]), "ALTERNATIVE_STATUS_PARTIAL", i + 1)
+            for i in range(len(tokens) - 1)
+        ]
+        final = result("".join(tokens), "ALTERNATIVE_STATUS_FINAL", len(tokens))
+        return await _ndjson_stream(request, mock, chunks, final)
+
+    await mock.full_response_delay()
+    return web.json_response(result("".join(tokens), "ALTERNATIVE_STATUS_FINAL", len(tokens)))
+
+
+async def yandex_tokenize(request: web.Request) -> web.Response:
+    mock: MockLLM = request.app["mock"]
+    body = await request.json()
+    count = mock.count_tokens(_prompt_of(body.get("messages", [])))
+    return web.json_response({"tokens": [{"id": str(i), "text": "", "special": False} for i in range(count)]})
+
+
+# --- GigaChat auth and token counting ---
+
+async def gigachat_oauth(request: web.Request) -> web.Response:
+    return web.json_response({
+        "access_token": uuid.uuid4().hex,
+        "expires_at": int((time.time() + 1800) * 1000),
+    })
+
+
+async def gigachat_tokens_count(request: web.Request) -> web.Response:
+    mock: MockLLM = request.app["mock"]
+    body = await request.json()
+    return web.json_response([
+        {"object": "tokens", "tokens": mock.count_tokens(text), "characters": len(text)}
+        for text in body.get("input", [])
+    ])
+
+
+async def stats(request: web.Request) -> web.Response:
+    mock: MockLLM = request.app["mock"]
+    return web.json_response({"requests": mock.requests, "errors": mock.errors})
+
+
+def create_app(config: MockConfig) -> web.Application:
+    app = web.Application(client_max_size=64 * 1024 * 1024)
+    app["mock"] = MockLLM(config)
+    app.router.add_post("/v1/chat/completions", openai_chat)
+    app.router.add_post("/api/v1/chat/completions", openai_chat)
+    app.router.add_post("/v1/embeddings", openai_embeddings)
+    app.router.add_post("/api/chat", ollama_chat)
+    app.router.add_post("/api/generate", ollama_generate)
+    app.router.add_post("/api/embed", ollama_embed)
+    app.router.add_get("/api/tags", ollama_tags)
+    app.router.add_post("/foundationModels/v1/completion", yandex_completion)
+    app.router.add_post("/foundationModels/v1/tokenizeCompletion", yandex_tokenize)
+    app.router.add_post("/api/v2/oauth", gigachat_oauth)
+    app.router.add_post("/api/v1/tokens/count", gigachat_tokens_count)
+    app.router.add_get("/stats", stats)
+    return app
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Mock LLM server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=11434)
+    parser.add_argument("--latency", default="fixed:0.2",
+                        help="Time to first token: fixed:S, uniform:MIN,MAX, normal:MEAN,STD or lognormal:MEDIAN,SIGMA")
+    parser.add_argument("--tokens-per-second", type=float, default=50.0, help="Generation speed, 0 for instant")
+    parser.add_argument("--response-tokens", type=int, default=60)
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Share of requests answered with an error")
+    parser.add_argument("--error-statuses", default="429,500,503")
+    parser.add_argument("--retry-after", type=int, default=1, help="Retry-After seconds sent with 429")
+    parser.add_argument("--embedding-dim", type=int, default=768)
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+
+    config = MockConfig(
+        latency=args.latency,
+        tokens_per_second=args.tokens_per_second,
+        response_tokens=args.response_tokens,
+        error_rate=args.error_rate,
+        error_statuses=[int(s) for s in args.error_statuses.split(",") if s],
+        retry_after=args.retry_after,
+        embedding_dim=args.embedding_dim,
+        seed=args.seed,
+    )
+    web.run_app(create_app(config), host=args.host, port=args.port)
+
+
+if __name__ == "__main__":
+    main()